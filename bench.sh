@@ -0,0 +1 @@
+uv run python -m bench "$@"
\ No newline at end of file
@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+# the sources use flat imports, the same way src/main.py is run. Every benchmark is run as
+# `python -m bench.<name>`, this package is imported first and puts src/ on the import path for all of them
+SRC_PATH = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_PATH) not in sys.path:
+    sys.path.insert(0, str(SRC_PATH))
@@ -0,0 +1,107 @@
+import argparse
+import io
+import re
+import timeit
+
+from htmlnode import BlockType
+from md_to_html import block_to_tag_and_content, classify_block, parse_blocks
+
+
+def regex_blocks(markdown: str) -> list[tuple[str, BlockType]]:
+    # the "\n\n" split and the per block regex classifier used before parse_blocks() classified while reading
+    blocks = []
+    for block in markdown.split('\n\n'):
+        block = block.strip()
+        if block:
+            blocks.append((block, regex_block_type(block)))
+    return blocks
+
+
+def regex_block_type(markdown: str) -> BlockType:
+    if re.match(r'^#{1,6} ', markdown):
+        return BlockType.HEADING
+    if markdown.startswith('```') and markdown.endswith('```'):
+        return BlockType.CODE
+    lines = markdown.splitlines()
+    if all(line.startswith('>') for line in lines):
+        return BlockType.QUOTE
+    if all(line.startswith('- ') for line in lines):
+        return BlockType.ULIST
+    if markdown.startswith('1. '):
+        matches = [re.match(r"^(\d+)\. ", line) for line in lines]
+        if [int(m.group(1)) for m in matches if m] == [n for n in range(1, len(lines) + 1)]:
+            return BlockType.OLIST
+    return BlockType.PARAGRAPH
+
+
+def regex_content(block: str, block_type: BlockType) -> str | list[str]:
+    # the re.sub(..., flags=re.MULTILINE) extraction, the list text split again into items
+    match block_type:
+        case BlockType.HEADING:
+            level = block[:6].count('#')
+            return re.sub(rf"^{'#' * level} ", '', block)
+        case BlockType.QUOTE:
+            return re.sub(r"^>\s*", '', block, flags=re.MULTILINE).strip()
+        case BlockType.ULIST:
+            return re.sub(r"^- ", '', block, flags=re.MULTILINE).splitlines()
+        case BlockType.OLIST:
+            return re.sub(r"^\d+\. ", '', block, flags=re.MULTILINE).splitlines()
+        case _:
+            return block_to_tag_and_content(block, block_type)[1]
+
+
+def list_heavy_markdown(lists: int, items: int) -> str:
+    # unordered and ordered lists of short linked items, with a heading, a quote and a paragraph between them
+    blocks = []
+    for idx in range(lists):
+        blocks.append(f"## Section {idx}")
+        blocks.append("\n".join(f"- item {n} of [list {idx}](/lists/{idx})" for n in range(items)))
+        blocks.append("\n".join(f"{n}. step {n} with **bold** text" for n in range(1, items + 1)))
+        blocks.append(f"> quoted line one of {idx}\n>\n> quoted line two")
+        blocks.append(f"A short paragraph\nafter list {idx}.")
+    return "\n\n".join(blocks)
+
+
+def new_blocks(markdown: str) -> list[tuple[str, BlockType]]:
+    return [(block.text, block.block_type) for block in parse_blocks(io.StringIO(markdown))]
+
+
+def regex_classify(blocks: list[tuple[str, BlockType]]) -> list[BlockType]:
+    return [regex_block_type(block) for block, _ in blocks]
+
+
+def new_classify(blocks: list[tuple[str, BlockType]]) -> list[BlockType]:
+    return [classify_block(block) for block, _ in blocks]
+
+
+def regex_extract(blocks: list[tuple[str, BlockType]]) -> list:
+    return [regex_content(block, block_type) for block, block_type in blocks]
+
+
+def new_extract(blocks: list[tuple[str, BlockType]]) -> list:
+    return [block_to_tag_and_content(block, block_type)[1] for block, block_type in blocks]
+
+
+def time_per_call(func, blocks: list[tuple[str, BlockType]]) -> float:
+    return min(timeit.repeat(lambda: func(blocks), number=5, repeat=7)) / 5
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the regex block classifier and extractor with parse_blocks().")
+    parser.add_argument('--lists', type=int, default=200, help="lists of each kind in the document")
+    args = parser.parse_args()
+    print(f'{"items":>6} | {"stage":<8} | {"regex":>10} | {"single scan":>11} | speedup')
+    for items in (3, 10, 50, 200):
+        markdown = list_heavy_markdown(args.lists, items)
+        blocks = new_blocks(markdown)
+        if regex_blocks(markdown) != blocks or regex_extract(blocks) != new_extract(blocks):
+            raise AssertionError("the single scan classifier doesn't match the regex one")
+        stages = {"classify": (regex_classify, new_classify), "extract": (regex_extract, new_extract)}
+        for stage, (old_func, new_func) in stages.items():
+            old = time_per_call(old_func, blocks)
+            new = time_per_call(new_func, blocks)
+            print(f'{items:>6} | {stage:<8} | {old * 1000:>7.2f} ms | {new * 1000:>8.2f} ms | {old / new:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import argparse
+import random
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+
+from . import SRC_PATH
+
+TEMPLATE_PATH = SRC_PATH.parent / "templates" / "template.html"
+
+WORDS = (
+    "the ring of power was forged in the fires of mount doom by sauron who hid it "
+    "from elves dwarves and men until frodo carried it through the shire rivendell "
+    "moria lothlorien and mordor with sam gandalf aragorn legolas gimli and boromir"
+).split()
+
+
+@dataclass(slots=True)
+class CorpusShape:
+    pages: int = 100
+    pages_per_folder: int = 50
+    paragraphs: int = 8
+    paragraph_words: int = 60
+    # chance for every word of a paragraph to be a link, an image or emphasized
+    link_density: float = 0.05
+    image_density: float = 0.01
+    emphasis_density: float = 0.05
+    list_items: int = 6
+    code_blocks: int = 1
+    seed: int = 405
+
+
+# slotted dataclasses have no class level defaults, the CLIs read them from here
+DEFAULT_SHAPE = CorpusShape()
+
+
+def paragraph(rng: random.Random, shape: CorpusShape) -> str:
+    words = []
+    for idx in range(shape.paragraph_words):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < shape.link_density:
+            word = f"[{word}](/blog/{word}-{idx})"
+        elif roll < shape.link_density + shape.image_density:
+            word = f"![{word}](/images/{word}.png)"
+        elif roll < shape.link_density + shape.image_density + shape.emphasis_density:
+            word = rng.choice(("**{}**", "_{}_", "`{}`")).format(word)
+        words.append(word)
+        # paragraphs are wrapped like hand written markdown
+        if idx % 12 == 11:
+            words.append("\n")
+    return " ".join(words).replace(" \n ", "\n")
+
+
+def page_markdown(rng: random.Random, shape: CorpusShape, index: int) -> str:
+    blocks = [f"# Page {index}"]
+    for idx in range(shape.paragraphs):
+        blocks.append(paragraph(rng, shape))
+        if idx == shape.paragraphs // 2:
+            blocks.append("\n".join(f"- {rng.choice(WORDS)} item {item}" for item in range(shape.list_items)))
+            blocks.append("\n".join(f"{item + 1}. {rng.choice(WORDS)}" for item in range(shape.list_items)))
+            blocks.append(f"> {paragraph(rng, shape)}".replace("\n", "\n> "))
+    for _ in range(shape.code_blocks):
+        blocks.append("```\n" + "\n".join(f"print('{rng.choice(WORDS)}')" for _ in range(8)) + "\n```")
+    blocks.append("## Notes")
+    return "\n\n".join(blocks) + "\n"
+
+
+def iter_pages(shape: CorpusShape):
+    rng = random.Random(shape.seed)
+    for index in range(shape.pages):
+        folder = Path(f"section-{index // shape.pages_per_folder}") / f"page-{index}"
+        yield folder / "index.md", page_markdown(rng, shape, index)
+
+
+def write_corpus(root: Path, shape: CorpusShape) -> Path:
+    # lays the corpus out like the repo: content/, templates/ and static/ under root
+    content = root / "content"
+    if content.exists():
+        shutil.rmtree(content)
+    for path, markdown in iter_pages(shape):
+        (content / path).parent.mkdir(parents=True, exist_ok=True)
+        (content / path).write_text(markdown)
+    (root / "templates").mkdir(parents=True, exist_ok=True)
+    shutil.copy(TEMPLATE_PATH, root / "templates" / TEMPLATE_PATH.name)
+    (root / "static").mkdir(parents=True, exist_ok=True)
+    return root
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic site to build and benchmark.")
+    parser.add_argument('root', type=Path, help="folder that gets the content/, templates/ and static/ folders")
+    parser.add_argument('--pages', type=int, default=DEFAULT_SHAPE.pages)
+    parser.add_argument('--paragraphs', type=int, default=DEFAULT_SHAPE.paragraphs)
+    parser.add_argument('--paragraph-words', type=int, default=DEFAULT_SHAPE.paragraph_words)
+    parser.add_argument('--link-density', type=float, default=DEFAULT_SHAPE.link_density)
+    parser.add_argument('--image-density', type=float, default=DEFAULT_SHAPE.image_density)
+    parser.add_argument('--list-items', type=int, default=DEFAULT_SHAPE.list_items)
+    parser.add_argument('--code-blocks', type=int, default=DEFAULT_SHAPE.code_blocks)
+    args = parser.parse_args()
+    shape = CorpusShape(args.pages, paragraphs=args.paragraphs, paragraph_words=args.paragraph_words,
+                        link_density=args.link_density, image_density=args.image_density,
+                        list_items=args.list_items, code_blocks=args.code_blocks)
+    write_corpus(args.root, shape)
+    print(f'CORPUS: {shape.pages} pages in \'{args.root / "content"}\'')
+
+
+if __name__ == '__main__':
+    main()
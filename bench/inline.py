@@ -0,0 +1,42 @@
+import timeit
+
+from htmlnode import TextNode, TextType
+from md_to_html import split_nodes_delimiter, split_nodes_image, split_nodes_link, text_to_textnodes
+
+
+def five_pass_textnodes(text: str) -> list[TextNode]:
+    # the pipeline text_to_textnodes() used before the single pass scanner
+    new_nodes = [TextNode(text, TextType.TEXT)]
+    new_nodes = split_nodes_image(new_nodes)
+    new_nodes = split_nodes_link(new_nodes)
+    new_nodes = split_nodes_delimiter(new_nodes, '**', TextType.BOLD)
+    new_nodes = split_nodes_delimiter(new_nodes, '_', TextType.ITALIC)
+    new_nodes = split_nodes_delimiter(new_nodes, '`', TextType.CODE)
+    return new_nodes
+
+
+def link_heavy_paragraph(links: int) -> str:
+    return " ".join(
+        f"See [post {idx}](/blog/post-{idx}) next to ![figure {idx}](/images/{idx}.png), **bold {idx}** and _more_ `code`."
+        for idx in range(links)
+    )
+
+
+def time_per_call(func, text: str) -> float:
+    number = max(1, 2000 // max(1, len(text) // 100))
+    return min(timeit.repeat(lambda: func(text), number=number, repeat=5)) / number
+
+
+def main():
+    print(f'{"links":>6} | {"five-pass":>12} | {"single-pass":>12} | speedup')
+    for links in (1, 10, 100, 1000, 5000):
+        text = link_heavy_paragraph(links)
+        if five_pass_textnodes(text) != text_to_textnodes(text):
+            raise AssertionError("the single pass scanner doesn't match the five pass pipeline")
+        old = time_per_call(five_pass_textnodes, text)
+        new = time_per_call(text_to_textnodes, text)
+        print(f'{links:>6} | {old * 1000:>9.3f} ms | {new * 1000:>9.3f} ms | {old / new:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
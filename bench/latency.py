@@ -0,0 +1,64 @@
+import argparse
+import tempfile
+import time
+from contextlib import contextmanager
+from collections.abc import Iterator
+from pathlib import Path
+from unittest import mock
+
+from .corpus import CorpusShape, write_corpus
+from .suite import quiet
+from async_build import generate_page_recursive_async
+from generate import generate_page_recursive, load_template
+from manifest import BuildManifest
+
+
+@contextmanager
+def slow_disk(latency: float) -> Iterator[None]:
+    # every file open, read and write waits like it would on a network volume
+    def delayed(method):
+        def wrapper(*args, **kwargs):
+            time.sleep(latency)
+            return method(*args, **kwargs)
+        return wrapper
+
+    with mock.patch.object(Path, 'open', delayed(Path.open)), \
+            mock.patch.object(Path, 'read_text', delayed(Path.read_text)), \
+            mock.patch.object(Path, 'read_bytes', delayed(Path.read_bytes)), \
+            mock.patch.object(Path, 'write_text', delayed(Path.write_text)):
+        yield
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the serial and the asyncio build on a simulated slow disk.")
+    parser.add_argument('--pages', type=int, default=500)
+    parser.add_argument('--latency-ms', type=float, default=5.0, help="added to every file open, read and write")
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = write_corpus(Path(tmp), CorpusShape(pages=args.pages))
+        with quiet():
+            template = load_template(root / "templates")
+        # with a manifest like build_site, every page is hashed and its front matter read before it's rendered
+        builds = {
+            "generate_page_recursive": lambda dest: generate_page_recursive(
+                root / "content", template, dest, '/', BuildManifest("", '/')),
+            f"generate_page_recursive_async ({args.concurrency})": lambda dest: generate_page_recursive_async(
+                root / "content", template, dest, '/', BuildManifest("", '/'), concurrency=args.concurrency),
+        }
+        outputs = []
+        print(f'{args.pages} pages, {args.latency_ms} ms per file operation')
+        for name, build in builds.items():
+            dest = Path(tmp) / f"docs-{len(outputs)}"
+            start = time.perf_counter()
+            with quiet(), slow_disk(args.latency_ms / 1000):
+                build(dest)
+            print(f'{name:<36} | {time.perf_counter() - start:>7.2f} s')
+            outputs.append({str(path.relative_to(dest)): path.read_bytes() for path in dest.rglob("*.html")})
+        if outputs[0] != outputs[1]:
+            raise AssertionError("the asyncio build doesn't match the serial one")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from .corpus import DEFAULT_SHAPE, CorpusShape, page_markdown
+from md_to_html import markdown_to_arena, markdown_to_html_node
+
+
+def large_markdown(lines: int, shape: CorpusShape) -> str:
+    # synthetic pages joined until the document has the wanted number of lines
+    rng = random.Random(shape.seed)
+    pages = []
+    count = 0
+    while count < lines:
+        markdown = page_markdown(rng, shape, len(pages))
+        pages.append(markdown)
+        count += markdown.count("\n") + 1
+    return "\n".join(pages)
+
+
+def measure(build, markdown: str) -> dict[str, float]:
+    # timed without tracemalloc, it slows every allocation down
+    start = time.perf_counter()
+    document = build(markdown)
+    build_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    html = document.to_html()
+    to_html_seconds = time.perf_counter() - start
+    del document
+
+    gc.collect()
+    tracemalloc.start()
+    document = build(markdown)
+    snapshot = tracemalloc.take_snapshot()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # allocations still alive once the tree is built, the ones the tree is made of
+    blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+    return {"retained": retained, "peak": peak, "blocks": blocks, "build": build_seconds,
+            "to_html": to_html_seconds, "html": len(html)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the memory of the HTMLNode tree and the DocumentArena.")
+    parser.add_argument('--lines', type=int, default=50_000, help="lines of the synthetic document")
+    parser.add_argument('--link-density', type=float, default=DEFAULT_SHAPE.link_density)
+    args = parser.parse_args()
+    markdown = large_markdown(args.lines, CorpusShape(link_density=args.link_density))
+
+    results = {"HTMLNode": measure(markdown_to_html_node, markdown), "DocumentArena": measure(markdown_to_arena, markdown)}
+    if results["HTMLNode"]["html"] != results["DocumentArena"]["html"]:
+        raise AssertionError("the arena doesn't serialize to the same HTML as the node tree")
+    print(f'{markdown.count(chr(10)) + 1} lines, {len(markdown) / 1e6:.1f} MB of markdown')
+    print(f'{"tree":<14} | {"retained":>10} | {"peak":>10} | {"allocations":>11} | {"build":>9} | {"to_html":>9}')
+    for name, result in results.items():
+        print(f'{name:<14} | {result["retained"] / 1e6:>7.1f} MB | {result["peak"] / 1e6:>7.1f} MB | '
+              f'{result["blocks"]:>11} | {result["build"] * 1000:>6.0f} ms | {result["to_html"] * 1000:>6.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import dataclasses
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from . import SRC_PATH
+from .corpus import CorpusShape, write_corpus
+from .suite import parse_counts
+
+
+def build(root: Path) -> tuple[float, int]:
+    # a whole `main.py --clean` process with the default options, the block cache on and cold,
+    # its peak resident memory is read from the kernel when it exits
+    command = [sys.executable, str(SRC_PATH / "main.py"), '/', '--clean']
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=root, stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    seconds = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command)
+    # ru_maxrss is in kilobytes on Linux
+    return seconds, usage.ru_maxrss * 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak resident memory of a whole build for growing synthetic sites.")
+    parser.add_argument('--pages', type=parse_counts, default=[1000, 10000, 100000],
+                        help="comma separated page counts")
+    parser.add_argument('--paragraphs', type=int, default=2, help="paragraphs per page, small pages keep it quick")
+    # the synthetic links point to pages the corpus doesn't have, every one would be kept as a broken link
+    parser.add_argument('--link-density', type=float, default=0.0)
+    args = parser.parse_args()
+
+    shape = CorpusShape(paragraphs=args.paragraphs, pages_per_folder=100, link_density=args.link_density)
+    print(f'{"pages":>8} | {"build":>9} | {"per page":>9} | {"peak RSS":>10} | {"manifest":>10} | {"RSS per page":>12}')
+    first = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            root = write_corpus(Path(tmp) / f"pages-{pages}", dataclasses.replace(shape, pages=pages))
+            seconds, peak = build(root)
+            manifest = (root / ".cache" / "manifest.json").stat().st_size
+            # what every page adds to the peak over the smallest site, the manifest record and little else
+            growth = f'{(peak - first[1]) / (pages - first[0]):>8.0f} B' if first else f'{"-":>10}'
+            first = first or (pages, peak)
+            print(f'{pages:>8} | {seconds:>7.1f} s | {seconds / pages * 1000:>6.2f} ms | {peak / 1e6:>7.1f} MB | '
+                  f'{manifest / 1e6:>7.1f} MB | {growth:>12}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+import argparse
+import contextlib
+import json
+import dataclasses
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+from . import SRC_PATH
+from .corpus import DEFAULT_SHAPE, CorpusShape, write_corpus
+from generate import discover_pages, generate_page_recursive, generate_pages_parallel, load_template
+from htmlnode import BlockType
+from md_to_html import markdown_to_html_node, parse_blocks, text_to_textnodes
+
+
+@contextlib.contextmanager
+def quiet() -> Iterator[None]:
+    # the build prints a line per page, silence it at the file descriptor so worker processes are quiet too
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with open(os.devnull, 'w') as devnull:
+        os.dup2(devnull.fileno(), 1)
+        try:
+            yield
+        finally:
+            sys.stdout.flush()
+            os.dup2(saved, 1)
+            os.close(saved)
+
+
+def best_time(func: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def time_stages(root: Path, repeat: int) -> dict[str, float]:
+    markdowns = [path.read_text() for path in sorted((root / "content").rglob("*.md"))]
+    texts = [block.text for markdown in markdowns for block in parse_blocks(markdown.splitlines())
+             if block.block_type == BlockType.PARAGRAPH]
+    nodes = [markdown_to_html_node(markdown) for markdown in markdowns]
+    return {
+        "text_to_textnodes": best_time(lambda: [text_to_textnodes(text) for text in texts], repeat),
+        "markdown_to_html_node": best_time(lambda: [markdown_to_html_node(markdown) for markdown in markdowns], repeat),
+        "to_html": best_time(lambda: [node.to_html() for node in nodes], repeat),
+    }
+
+
+def time_build(root: Path, jobs: int, repeat: int) -> float:
+    templates = root / "templates"
+    with tempfile.TemporaryDirectory() as tmp, quiet():
+        dest = Path(tmp) / "docs"
+        if jobs == 1:
+            return best_time(lambda: generate_page_recursive(root / "content", load_template(templates), dest, '/'), repeat)
+        return best_time(
+            lambda: generate_pages_parallel(discover_pages(root / "content", dest), templates, None, '/', jobs), repeat
+        )
+
+
+def time_cold_start(root: Path, repeat: int) -> float:
+    # a whole `main.py --clean` process, interpreter start and imports included, like every CI preview build
+    command = [sys.executable, str(SRC_PATH / "main.py"), '/', '--clean']
+    return best_time(lambda: subprocess.run(command, cwd=root, stdout=subprocess.DEVNULL, check=True), repeat)
+
+
+def run(shape: CorpusShape, page_counts: list[int], jobs: list[int], repeat: int) -> dict[str, float]:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # mostly startup, the one page takes a few milliseconds
+        root = write_corpus(Path(tmp) / "cold-start", dataclasses.replace(shape, pages=1))
+        results["cold_start/pages=1"] = time_cold_start(root, max(repeat, 5))
+        for pages in page_counts:
+            shape.pages = pages
+            root = write_corpus(Path(tmp) / f"pages-{pages}", shape)
+            for stage, seconds in time_stages(root, repeat).items():
+                results[f"{stage}/pages={pages}"] = seconds
+            for workers in jobs:
+                results[f"generate_page_recursive/pages={pages}/jobs={workers}"] = time_build(root, workers, repeat)
+    return results
+
+
+def print_results(results: dict[str, float], baseline: dict[str, float]) -> None:
+    print(f'{"benchmark":<50} | {"seconds":>9} | {"per page":>9} | {"baseline":>9}')
+    for name, seconds in results.items():
+        pages = int(name.split("pages=")[1].split("/")[0])
+        old = f'{baseline[name]:>9.4f}' if name in baseline else f'{"-":>9}'
+        print(f'{name:<50} | {seconds:>9.4f} | {seconds / pages * 1000:>6.3f} ms | {old}')
+
+
+def find_regressions(results: dict[str, float], baseline: dict[str, float], threshold: float) -> list[str]:
+    regressions = []
+    for name, seconds in results.items():
+        if name in baseline and seconds > baseline[name] * (1 + threshold):
+            regressions.append(f'{name}: {seconds:.4f}s vs {baseline[name]:.4f}s baseline '
+                               f'(+{(seconds / baseline[name] - 1) * 100:.0f}%)')
+    return regressions
+
+
+def parse_counts(value: str) -> list[int]:
+    return [int(count) for count in value.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every build stage on synthetic sites and compare to a baseline.")
+    parser.add_argument('--pages', type=parse_counts, default=[100, 1000], help="comma separated page counts")
+    parser.add_argument('--jobs', type=parse_counts, default=[1, 2, 4], help="comma separated worker counts")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per benchmark, the fastest one counts")
+    parser.add_argument('--paragraphs', type=int, default=DEFAULT_SHAPE.paragraphs)
+    parser.add_argument('--paragraph-words', type=int, default=DEFAULT_SHAPE.paragraph_words)
+    parser.add_argument('--link-density', type=float, default=DEFAULT_SHAPE.link_density)
+    parser.add_argument('--image-density', type=float, default=DEFAULT_SHAPE.image_density)
+    parser.add_argument('--list-items', type=int, default=DEFAULT_SHAPE.list_items)
+    parser.add_argument('--code-blocks', type=int, default=DEFAULT_SHAPE.code_blocks)
+    parser.add_argument('--baseline', type=Path, help="JSON results of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed slowdown against the baseline, 0.2 = 20%%")
+    parser.add_argument('--save', type=Path, help="write the results as JSON, e.g. to become the new baseline")
+    args = parser.parse_args()
+
+    shape = CorpusShape(paragraphs=args.paragraphs, paragraph_words=args.paragraph_words,
+                        link_density=args.link_density, image_density=args.image_density,
+                        list_items=args.list_items, code_blocks=args.code_blocks)
+    results = run(shape, args.pages, args.jobs, args.repeat)
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else {}
+    print_results(results, baseline)
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=1))
+        print(f'SAVE: \'{args.save}\'')
+    regressions = find_regressions(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f'REGRESSION: {regression}')
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
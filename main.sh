@@ -1,2 +1 @@
-uv run src/main.py
-cd docs && uv run python -m http.server
+uv run src/watch.py
\ No newline at end of file
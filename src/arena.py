@@ -0,0 +1,197 @@
+from array import array
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import TextIO
+from htmlnode import PRESERVE_TAGS, HTMLNode, LeafNode, ParentNode, attribute_to_html, compact_text
+
+# every tag the markdown converter produces, nodes store the index
+TAGS = ('', 'div', 'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'pre', 'code', 'blockquote', 'ul', 'ol', 'li',
+        'b', 'i', 'a', 'img')
+TAG_IDS = {tag: idx for idx, tag in enumerate(TAGS)}
+# start offset of parent nodes, they have children instead of text
+PARENT = -1
+
+
+def props_to_html(props: dict[str, str], compact: bool = False) -> str:
+    return "".join(attribute_to_html(att, value, compact) for att, value in props.items())
+
+
+@dataclass(slots=True)
+class DocumentArena:
+    # A whole document as parallel arrays instead of one object per node.
+    # Nodes are stored in document order, node i has the tag TAGS[tags[i]], shows
+    # text[starts[i]:ends[i]] and its descendants are the nodes i + 1 to subtree_ends[i] - 1.
+    # Only links and images have props, so props are kept for them alone.
+    tags: array = field(default_factory=lambda: array('B'))
+    starts: array = field(default_factory=lambda: array('i'))
+    ends: array = field(default_factory=lambda: array('i'))
+    subtree_ends: array = field(default_factory=lambda: array('i'))
+    props: dict[int, dict[str, str]] = field(default_factory=dict)
+    # the text of every node, joined into one string by pack()
+    chunks: list[str] = field(default_factory=list)
+    size: int = 0
+    # characters compact output left out since the last clear()
+    saved: int = 0
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def add_text(self, text: str) -> int:
+        # returns the offset of text in the arena's text
+        offset = self.size
+        self.chunks.append(text)
+        self.size += len(text)
+        return offset
+
+    def pack(self) -> None:
+        # one string instead of one per block or list item
+        if len(self.chunks) > 1:
+            self.chunks[:] = [''.join(self.chunks)]
+
+    @property
+    def text(self) -> str:
+        self.pack()
+        return self.chunks[0] if self.chunks else ''
+
+    def clear(self) -> None:
+        # reuses the arrays for the next document
+        del self.tags[:], self.starts[:], self.ends[:], self.subtree_ends[:]
+        self.props.clear()
+        self.chunks.clear()
+        self.size = 0
+        self.saved = 0
+
+    def open(self, tag: str, props: dict[str, str] | None = None) -> int:
+        # the subtree end is set by close() once the children are added
+        return self.leaf(tag, PARENT, PARENT, props)
+
+    def close(self, index: int) -> None:
+        self.subtree_ends[index] = len(self.tags)
+
+    def leaf(self, tag: str, start: int, end: int, props: dict[str, str] | None = None) -> int:
+        index = len(self.tags)
+        self.tags.append(TAG_IDS[tag])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.subtree_ends.append(index + 1)
+        if props:
+            self.props[index] = props
+        return index
+
+    def children(self, index: int) -> Iterator[int]:
+        child = index + 1
+        while child < self.subtree_ends[index]:
+            yield child
+            child = self.subtree_ends[child]
+
+    def iter_html(self, index: int = 0, compact: bool = False) -> Iterator[str]:
+        # same output and errors as HTMLNode.iter_html(), the closing tags wait on a
+        # stack until the scan passes the end of their subtree
+        tags, starts, ends, subtree_ends, props = self.tags, self.starts, self.ends, self.subtree_ends, self.props
+        text = self.text
+        closing: list[tuple[int, str]] = []
+        preserved = 0
+        for idx in range(index, subtree_ends[index]):
+            while closing and closing[-1][0] <= idx:
+                closed = closing.pop()[1]
+                if closed in PRESERVE_TAGS:
+                    preserved -= 1
+                yield f'</{closed}>'
+            tag = TAGS[tags[idx]]
+            compact_node = compact and not preserved and tag not in PRESERVE_TAGS
+            attrs = ''
+            if idx in props:
+                attrs = props_to_html(props[idx], compact_node)
+                if compact_node:
+                    # the unquoted values, counted against the quoted output
+                    self.saved += len(props_to_html(props[idx])) - len(attrs)
+            start = starts[idx]
+            if start == PARENT:
+                if not tag:
+                    raise ValueError("tag is required")
+                if subtree_ends[idx] == idx + 1:
+                    raise ValueError("ParentNode must have at least one child")
+                yield f'<{tag}{attrs}>'
+                if tag in PRESERVE_TAGS:
+                    preserved += 1
+                closing.append((subtree_ends[idx], tag))
+                continue
+            value = text[start:ends[idx]]
+            if not value and tag != 'img':
+                raise ValueError("All leaf nodes must have a value")
+            if compact_node:
+                compacted = compact_text(value)
+                self.saved += len(value) - len(compacted)
+                value = compacted
+            if not tag:
+                yield value
+            elif tag == 'img':
+                yield f'<{tag}{attrs}>'
+            else:
+                yield f'<{tag}{attrs}>{value}</{tag}>'
+        while closing:
+            yield f'</{closing.pop()[1]}>'
+
+    def iter_text(self, index: int = 0) -> Iterator[str]:
+        # the text a reader sees, every leaf's value and the alt text of the images
+        text = self.text
+        img = TAG_IDS['img']
+        for idx in range(index, self.subtree_ends[index]):
+            start = self.starts[idx]
+            if self.tags[idx] == img:
+                yield self.props[idx]['alt']
+            elif start != PARENT:
+                yield text[start:self.ends[idx]]
+
+    def to_html(self, index: int = 0, compact: bool = False) -> str:
+        return ''.join(self.iter_html(index, compact))
+
+    def root(self) -> 'ArenaNode':
+        return ArenaNode(self, 0)
+
+
+@dataclass(slots=True, frozen=True)
+class ArenaNode:
+    # HTMLNode API over one node of an arena for the callers that walk the tree,
+    # the views are made on demand and hold nothing but the index
+    arena: DocumentArena
+    index: int = 0
+
+    @property
+    def tag(self) -> str | None:
+        return TAGS[self.arena.tags[self.index]] or None
+
+    @property
+    def value(self) -> str | None:
+        start = self.arena.starts[self.index]
+        if start == PARENT:
+            return None
+        return self.arena.text[start:self.arena.ends[self.index]]
+
+    @property
+    def children(self) -> list['ArenaNode'] | None:
+        if self.arena.starts[self.index] != PARENT:
+            return None
+        return [ArenaNode(self.arena, child) for child in self.arena.children(self.index)]
+
+    @property
+    def props(self) -> dict[str, str]:
+        return self.arena.props.get(self.index, {})
+
+    def props_to_html(self, compact: bool = False) -> str:
+        return props_to_html(self.props, compact)
+
+    def iter_html(self, compact: bool = False) -> Iterator[str]:
+        return self.arena.iter_html(self.index, compact)
+
+    def to_html(self, compact: bool = False) -> str:
+        return self.arena.to_html(self.index, compact)
+
+    def write_html(self, fp: TextIO, compact: bool = False) -> None:
+        fp.writelines(self.iter_html(compact))
+
+    def to_html_node(self) -> HTMLNode:
+        # a standalone copy as HTMLNode objects
+        if self.children is None:
+            return LeafNode(self.tag, self.value, dict(self.props))
+        return ParentNode(self.tag, [child.to_html_node() for child in self.children], dict(self.props))
@@ -0,0 +1,49 @@
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from manifest import hash_bytes
+
+# hex digits of the content hash put in a fingerprinted name, index.css -> index.3f9a1c2b.css
+FINGERPRINT_LENGTH = 8
+# files fetched by a fixed name, by browsers, crawlers or the host, keep it
+FIXED_NAMES = frozenset(('CNAME', '.nojekyll', 'robots.txt', 'favicon.ico', 'sitemap.xml', 'manifest.json'))
+
+
+def is_fingerprinted(path: Path) -> bool:
+    # static pages are linked like the generated ones, by name
+    return path.suffix != '.html' and path.name not in FIXED_NAMES
+
+
+def split_query(path: str) -> tuple[str, str]:
+    # 'index.css?v=2#top' -> 'index.css', '?v=2#top'
+    end = min((idx for idx in (path.find('?'), path.find('#')) if idx >= 0), default=len(path))
+    return path[:end], path[end:]
+
+
+def fingerprinted_name(path: str, content_hash: str) -> str:
+    # the hash goes before the last suffix so the server still finds the content type
+    folder, _, name = path.rpartition('/')
+    stem, dot, suffix = name.rpartition('.')
+    name = f'{stem}.{content_hash[:FINGERPRINT_LENGTH]}.{suffix}' if dot and stem else \
+        f'{name}.{content_hash[:FINGERPRINT_LENGTH]}'
+    return f'{folder}/{name}' if folder else name
+
+
+@dataclass(slots=True, eq=False)
+class AssetMap:
+    # static asset path -> fingerprinted output path, both relative to their folders like 'images/tom.png'
+    paths: dict[str, str] = field(default_factory=dict)
+    # hash of the whole map, the rendered blocks are cached per asset map
+    key: str = ''
+
+    @classmethod
+    def create(cls, paths: dict[str, str]) -> 'AssetMap':
+        return cls(paths, hash_bytes(json.dumps(paths, sort_keys=True).encode())[:16])
+
+    def path(self, path: str) -> str:
+        # the output path of a site path, with its query or fragment, any path but an asset's is kept
+        name = self.paths.get(path)
+        if name is not None:
+            return name
+        path, query = split_query(path)
+        return f'{self.paths.get(path, path)}{query}'
@@ -0,0 +1,133 @@
+import asyncio
+import io
+from collections.abc import Iterable
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from block_cache import BlockCache
+from generate import PageStats, add_source, iter_page, iter_pages, print_savings, record_page, write_page
+from instrument import NO_TRACE, BuildTrace, NullTrace, PageTrace
+from manifest import BuildManifest, hash_bytes
+from metadata import is_draft, read_header
+from minify import is_compact
+from page_template import PageTemplate
+from search import SearchIndex
+from shard import Shard
+from assets import AssetMap
+from images import ImageSizes
+
+DEFAULT_CONCURRENCY = 16
+
+
+def _render_page(source: Path, dest: Path, markdown: str, template: PageTemplate, base_path: str,
+                 trace: PageTrace | NullTrace, cache: BlockCache | None, searched: bool,
+                 assets: AssetMap | None, images: ImageSizes | None) -> tuple[str, PageStats]:
+    print(f'Generating page \'{source}\' -> \'{dest}\' | Template: \'{template.filename}\'')
+    trace.lap('queue')
+    stats = PageStats(terms=Counter() if searched else None)
+    chunks = iter_page(io.StringIO(markdown), template, base_path, trace, cache, stats, assets, images)
+    return ''.join(chunks), stats
+
+
+def _read_page(source: Path, drafts: bool) -> tuple[str | None, str]:
+    # The page is read once, its hash, front matter and markdown all come from the same bytes
+    # in an I/O thread, so the event loop never waits on the disk. Returns None for a draft.
+    data = source.read_bytes()
+    # decoded like read_text() would, universal newlines included
+    markdown = io.TextIOWrapper(io.BytesIO(data)).read()
+    if not drafts and is_draft(read_header(iter(markdown.splitlines(True)))[0]):
+        return None, ''
+    return markdown, hash_bytes(data)
+
+
+async def generate_pages_async(pages: Iterable[tuple[Path, Path]], template: PageTemplate, base_path: str,
+                               concurrency: int = DEFAULT_CONCURRENCY, trace: BuildTrace | None = None,
+                               cache: BlockCache | None = None, manifest: BuildManifest | None = None,
+                               search: SearchIndex | None = None, assets: AssetMap | None = None,
+                               images: ImageSizes | None = None, previous: BuildManifest | None = None,
+                               drafts: bool = False) -> None:
+    # Three stages joined by bounded queues: up to `concurrency` reads and writes are in flight
+    # while one thread renders, a full queue makes the stage before it wait, so no more than
+    # about 2 * concurrency pages are ever held in memory. The first failure cancels the rest.
+    # The drafts are left out and, with a manifest, the pages that didn't change since previous
+    # once they are read.
+    loop = asyncio.get_running_loop()
+    to_render: asyncio.Queue = asyncio.Queue(concurrency)
+    to_write: asyncio.Queue = asyncio.Queue(concurrency)
+    pending = iter(pages)
+    compact = is_compact(template)
+    traced = trace is not None and trace.enabled
+
+    async def read(io_executor: ThreadPoolExecutor) -> None:
+        # the readers share one iterator, each takes the next page when it's free
+        for source, dest in pending:
+            page_trace = PageTrace(str(source)) if traced else NO_TRACE
+            if manifest is not None:
+                # holds the page's place, the manifest lists the pages in the order they were found
+                manifest.add_page(source, dest, '')
+            markdown, source_hash = await loop.run_in_executor(io_executor, _read_page, source, drafts)
+            page_trace.lap('read')
+            if markdown is None:
+                print(f'DRAFT: \'{source}\' skipped')
+                if manifest is not None:
+                    del manifest.pages[str(source)]
+                continue
+            if manifest is not None and not add_source(manifest, previous, source, dest, source_hash, images):
+                continue
+            if traced:
+                trace.pages.append(page_trace)
+            await to_render.put((source, dest, markdown, page_trace))
+
+    async def render(executor: ThreadPoolExecutor) -> None:
+        while (item := await to_render.get()) is not None:
+            source, dest, markdown, page_trace = item
+            html, stats = await loop.run_in_executor(executor, _render_page, source, dest, markdown, template,
+                                                     base_path, page_trace, cache, search is not None, assets,
+                                                     images)
+            await to_write.put((source, dest, html, stats, page_trace))
+
+    async def write(io_executor: ThreadPoolExecutor) -> None:
+        while (item := await to_write.get()) is not None:
+            source, dest, html, stats, page_trace = item
+            page_trace.lap('queue')
+            # the same write as a serial build, an interrupted one never leaves a truncated page
+            await loop.run_in_executor(io_executor, write_page, dest, [html])
+            page_trace.lap('write')
+            page_trace.count('chars', len(html))
+            record_page(source, dest, stats, manifest, search)
+            if compact:
+                size = (await loop.run_in_executor(io_executor, dest.stat)).st_size
+                print_savings(dest, stats.saved, size)
+                page_trace.count('saved', stats.saved)
+            page_trace.finish()
+
+    # rendering is pure Python and holds the GIL, one thread keeps it off the event loop
+    # the blocking file calls get their own threads, enough for every read and write in flight
+    with ThreadPoolExecutor(max_workers=1) as executor, ThreadPoolExecutor(max_workers=concurrency * 2) as io_executor:
+        try:
+            async with asyncio.TaskGroup() as group:
+                readers = [group.create_task(read(io_executor)) for _ in range(concurrency)]
+                renderer = group.create_task(render(executor))
+                writers = [group.create_task(write(io_executor)) for _ in range(concurrency)]
+                await asyncio.gather(*readers)
+                await to_render.put(None)
+                await renderer
+                for _ in writers:
+                    await to_write.put(None)
+        except ExceptionGroup as errors:
+            # raise what the page raised, like the other build drivers do
+            raise errors.exceptions[0] from None
+
+
+def generate_page_recursive_async(dir_path_content: Path, template: PageTemplate, dest_dir_path: Path,
+                                  base_path: str, manifest: BuildManifest | None = None,
+                                  previous: BuildManifest | None = None,
+                                  trace: BuildTrace | None = None, cache: BlockCache | None = None,
+                                  concurrency: int = DEFAULT_CONCURRENCY, search: SearchIndex | None = None,
+                                  drafts: bool = False, shard: Shard | None = None,
+                                  assets: AssetMap | None = None, images: ImageSizes | None = None) -> None:
+    # same pages and output as generate_page_recursive, with the reads and writes overlapped,
+    # the walk reads no page, the front matter and the hash come with the read in the pipeline
+    pages = iter_pages(dir_path_content, dest_dir_path, drafts=True, shard=shard)
+    asyncio.run(generate_pages_async(pages, template, base_path, concurrency, trace, cache, manifest,
+                                     search, assets, images, previous, drafts))
@@ -0,0 +1,144 @@
+import hashlib
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from htmlnode import Block, TextType, UrlResolver
+from md_to_html import iter_block_urls
+
+# bump this whenever the HTML rendered for a block changes, older entries then never match
+RENDERER_VERSION = 3
+# bump this whenever the table changes, an older table is dropped when the cache is opened
+SCHEMA_VERSION = 3
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# the new entries are written once they hold this much, or max_bytes when the whole cache is smaller
+WRITE_BUFFER_BYTES = 1024 * 1024
+# a cache that outgrows max_bytes while a build writes to it is evicted down to this share of it,
+# so it isn't evicted again on every following write
+EVICT_TO = 0.75
+
+
+@dataclass(slots=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evicted: int = 0
+
+    def add(self, other: 'CacheStats') -> None:
+        self.hits += other.hits
+        self.misses += other.misses
+        self.evicted += other.evicted
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass(slots=True)
+class BlockCache:
+    # Rendered HTML of single blocks in sqlite, keyed by everything the HTML depends on.
+    # A lookup is one primary key query, none of the cache is held in memory. New entries
+    # and the last use of the hits are buffered and written in one transaction by flush(),
+    # put() flushes on its own once the buffer is full so a cold build never holds more.
+    connection: sqlite3.Connection
+    max_bytes: int = DEFAULT_MAX_BYTES
+    stats: CacheStats = field(default_factory=CacheStats)
+    pending: dict[bytes, tuple[str, int, str | None]] = field(default_factory=dict)
+    used: set[bytes] = field(default_factory=set)
+    # characters of HTML and text in pending and bytes of the keys in used, waiting for flush()
+    buffered_bytes: int = 0
+    # size of the stored entries, counted up by flush() and made exact again by evict()
+    stored_bytes: int = 0
+
+    @classmethod
+    def open(cls, path: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> 'BlockCache':
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # worker processes share the file, wait for each other's writes instead of failing,
+        # the async build renders in its own thread, only ever one thread at a time uses the connection
+        connection = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        with connection:
+            # the check and the new table in one write transaction, so concurrent workers migrate it once
+            connection.execute('BEGIN IMMEDIATE')
+            if connection.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+                connection.execute('DROP TABLE IF EXISTS blocks')
+                connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS blocks (key BLOB PRIMARY KEY, html TEXT NOT NULL, '
+                'saved INTEGER NOT NULL, text TEXT, size INTEGER NOT NULL, used INTEGER NOT NULL)'
+            )
+        cache = cls(connection, max_bytes)
+        cache.stored_bytes = cache.size()
+        return cache
+
+    @staticmethod
+    def key(block: Block, resolver: UrlResolver, compact: bool = False) -> bytes:
+        # a block is only keyed by the sizes of its own images, an image added to the site misses no other block
+        image_urls = [url for text_type, url in iter_block_urls(block.text, block.block_type)
+                      if text_type == TextType.IMAGE] if '![' in block.text else []
+        data = (f'{RENDERER_VERSION}\0{resolver.cache_key(image_urls)}\0{compact:d}\0{block.block_type.value}'
+                f'\0{block.text}')
+        return hashlib.sha256(data.encode()).digest()
+
+    def get(self, key: bytes) -> tuple[str, int, str | None] | None:
+        # the HTML, the characters compact output saved on it and the block's plain text,
+        # the text is None unless a build with the search index stored it
+        entry = self.pending.get(key)
+        if entry is None:
+            entry = self.connection.execute('SELECT html, saved, text FROM blocks WHERE key = ?', (key,)).fetchone()
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        if key not in self.used:
+            self.used.add(key)
+            self._buffered(len(key))
+        return entry
+
+    def put(self, key: bytes, html: str, saved: int = 0, text: str | None = None) -> None:
+        self.pending[key] = (html, saved, text)
+        self._buffered(len(html) + len(text or ''))
+
+    def _buffered(self, size: int) -> None:
+        # the buffer counts against the cache's own limit, a small cache is written more often
+        self.buffered_bytes += size
+        if self.buffered_bytes >= min(WRITE_BUFFER_BYTES, self.max_bytes):
+            self.flush()
+            # a cold build bigger than the cache doesn't grow the file far past its limit until the build ends
+            if self.stored_bytes > self.max_bytes:
+                self.evict(int(self.max_bytes * EVICT_TO))
+
+    def flush(self) -> None:
+        now = time.time_ns()
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO blocks (key, html, saved, text, size, used) VALUES (?, ?, ?, ?, ?, ?)',
+                [(key, html, saved, text, len(html), now) for key, (html, saved, text) in self.pending.items()]
+            )
+            self.connection.executemany('UPDATE blocks SET used = ? WHERE key = ?', [(now, key) for key in self.used])
+        self.stored_bytes += sum(len(html) for html, _, _ in self.pending.values())
+        self.pending.clear()
+        self.buffered_bytes = 0
+        self.used.clear()
+
+    def evict(self, max_bytes: int | None = None) -> int:
+        # least recently used first, until the rest fits in max_bytes
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        with self.connection:
+            deleted = self.connection.execute(
+                'DELETE FROM blocks WHERE key IN (SELECT key FROM '
+                '(SELECT key, SUM(size) OVER (ORDER BY used DESC, key) AS total FROM blocks) WHERE total > ?)',
+                (max_bytes,)
+            ).rowcount
+        self.stats.evicted += deleted
+        self.stored_bytes = self.size()
+        return deleted
+
+    def size(self) -> int:
+        return self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM blocks').fetchone()[0]
+
+    def close(self) -> None:
+        self.flush()
+        self.connection.close()
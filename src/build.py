@@ -0,0 +1,164 @@
+from dataclasses import dataclass
+from pathlib import Path
+from generate import (TEMPLATE_NAME, discover_pages, fingerprint_assets, generate_public, generate_page_recursive,
+                      generate_pages_parallel, load_template, pages_to_render, remove_stale_outputs)
+from manifest import BuildManifest, hash_file
+from instrument import BuildTrace
+from block_cache import DEFAULT_MAX_BYTES, BlockCache
+from compress import compress_outputs
+from links import check_links
+from search import SearchIndex
+from metadata import write_page_index
+from shard import Shard
+from images import measure_images
+
+PUBLIC_FOLDER = Path("docs")
+STATIC_FOLDER = Path("static")
+TEMPLATES_FOLDER = Path("templates")
+CONTENT_FOLDER = Path("content")
+
+CACHE_FOLDER = Path(".cache")
+MANIFEST_PATH = CACHE_FOLDER / "manifest.json"
+TEMPLATE_CACHE_FOLDER = CACHE_FOLDER / "jinja"
+BLOCK_CACHE_PATH = CACHE_FOLDER / "blocks.sqlite"
+SEARCH_CACHE_PATH = CACHE_FOLDER / "search.json"
+IMAGE_CACHE_PATH = CACHE_FOLDER / "images.json"
+
+
+@dataclass(slots=True)
+class BuildOptions:
+    base_path: str = '/'
+    clean: bool = False
+    jobs: int = 1
+    # pages read and written at once by the asyncio pipeline, 0 reads and writes them one by one
+    async_io: int = 0
+    link_static: bool = False
+    # Chrome trace / JSON file for the per page stage timings, None leaves the pages untraced
+    trace: Path | None = None
+    trace_top: int = 10
+    # level of the .gz sidecars written next to the text outputs, 0 writes none
+    gzip_level: int = 0
+    # size limit of the rendered block cache, 0 turns it off
+    block_cache_bytes: int = DEFAULT_MAX_BYTES
+    # write the pages without the whitespace and quotes the browser doesn't need
+    minify: bool = False
+    # write a client side search index of the pages' text to docs/search/
+    search: bool = False
+    # render the pages marked 'draft: true' in their front matter too
+    drafts: bool = False
+    # write the front matter of every page to docs/pages.json
+    page_index: bool = False
+    # build only this shard's pages and static files to its own folder, merge.py joins the shards
+    shard: Shard | None = None
+    # write the static assets under content hashed names the pages and the template link them by
+    fingerprint: bool = False
+
+
+def build_site(options: BuildOptions) -> BuildManifest:
+    trace = BuildTrace(enabled=options.trace is not None)
+    shard = options.shard
+    public, manifest_path = (PUBLIC_FOLDER, MANIFEST_PATH) if shard is None else (shard.public_path, shard.manifest_path)
+    if shard is not None and (options.search or options.page_index):
+        raise ValueError('The search and page indexes need every page, build them when merging the shards.')
+    with trace.span('manifest'):
+        previous = None if options.clean else BuildManifest.load(manifest_path)
+        manifest = BuildManifest(hash_file(TEMPLATES_FOLDER / TEMPLATE_NAME), options.base_path, compact=options.minify,
+                                 search=options.search)
+        if shard is not None:
+            manifest.shard = str(shard)
+            manifest.root = str(public)
+    with trace.span('static'):
+        assets = None
+        if options.fingerprint:
+            # the assets whose outputs didn't change keep the names the previous build gave them
+            assets = fingerprint_assets(STATIC_FOLDER, public, previous.assets if previous is not None else {})
+            manifest.assets = assets.paths
+        # the size of every image, not only a shard's, its pages can show the images of the others
+        images = measure_images(STATIC_FOLDER, IMAGE_CACHE_PATH)
+        # without a usable manifest the output folder can't be trusted, so start from scratch
+        static_files = generate_public(public, STATIC_FOLDER, clean=previous is None, link=options.link_static,
+                                       shard=shard, assets=assets)
+        for source, dest in static_files:
+            manifest.add_static(source, dest)
+    trace.count('static_files', len(static_files))
+
+    print('Generating contents...')
+    fresh = previous if previous is not None and previous.matches(manifest) else None
+    cached = options.block_cache_bytes > 0
+    search = None
+    if options.search:
+        search = SearchIndex.load(SEARCH_CACHE_PATH, public, options.base_path) if fresh is not None else None
+        if search is None:
+            # without the terms of the pages that wouldn't be rendered, the whole index is made again
+            fresh = None
+            search = SearchIndex.create(public, options.base_path)
+    with trace.span('pages'):
+        if options.jobs > 1:
+            pages = pages_to_render(discover_pages(CONTENT_FOLDER, public, options.drafts, shard), manifest, fresh,
+                                    images)
+            # the workers open the block cache themselves, this process only evicts and reports
+            stats = generate_pages_parallel(pages, TEMPLATES_FOLDER, TEMPLATE_CACHE_FOLDER, options.base_path,
+                                            options.jobs, trace, BLOCK_CACHE_PATH if cached else None,
+                                            options.block_cache_bytes, options.minify, manifest, search, assets,
+                                            images)
+            block_cache = BlockCache.open(BLOCK_CACHE_PATH, options.block_cache_bytes) if cached else None
+            if block_cache is not None:
+                block_cache.stats.add(stats)
+        else:
+            block_cache = BlockCache.open(BLOCK_CACHE_PATH, options.block_cache_bytes) if cached else None
+            template = load_template(TEMPLATES_FOLDER, TEMPLATE_CACHE_FOLDER, options.minify)
+            if options.async_io > 0:
+                # asyncio is only imported for the builds that use it
+                from async_build import generate_page_recursive_async
+                generate_page_recursive_async(CONTENT_FOLDER, template, public, options.base_path, manifest,
+                                              fresh, trace, block_cache, options.async_io, search,
+                                              options.drafts, shard, assets, images)
+            else:
+                generate_page_recursive(CONTENT_FOLDER, template, public, options.base_path, manifest, fresh,
+                                        trace, block_cache, search, options.drafts, shard, assets, images)
+    generated = []
+    if search is not None:
+        with trace.span('search'):
+            search.remove_missing(manifest.pages)
+            generated.extend(search.write())
+            search.save(SEARCH_CACHE_PATH)
+    if options.page_index:
+        with trace.span('page_index'):
+            # the pages that weren't rendered again have their metadata in the manifest
+            generated.append(write_page_index(manifest, public))
+    manifest.generated = [str(output) for output in generated]
+    if shard is None:
+        with trace.span('links'):
+            # every internal link of the site against every output, the pages collected their links while rendering
+            broken = check_links(manifest, public)
+        trace.count('broken_links', len(broken))
+    else:
+        # the links into the other shards can only be checked once merge.py has every output
+        print(f'LINKS: not checked in shard {shard}')
+    if options.gzip_level > 0:
+        with trace.span('gzip'):
+            # sidecars made at another level are all out of date
+            same_level = previous is not None and previous.gzip_level == options.gzip_level
+            outputs = [Path(output) for output in manifest.outputs()]
+            manifest.compressed = compress_outputs(outputs, previous.compressed if same_level else {}, options.gzip_level)
+            manifest.gzip_level = options.gzip_level
+    with trace.span('cleanup'):
+        if previous is not None:
+            remove_stale_outputs(previous, manifest, public)
+        manifest.save(manifest_path)
+        if block_cache is not None:
+            close_block_cache(block_cache)
+
+    if options.trace is not None:
+        trace.print_summary(options.trace_top)
+        trace.export(options.trace)
+    return manifest
+
+
+def close_block_cache(block_cache: BlockCache) -> None:
+    block_cache.flush()
+    block_cache.evict()
+    stats = block_cache.stats
+    print(f'BLOCK-CACHE: {stats.hits} hits, {stats.misses} misses ({stats.hit_rate():.0%} hit rate), '
+          f'{stats.evicted} evicted, {block_cache.size() / 1e6:.1f} MB')
+    block_cache.close()
@@ -0,0 +1,44 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from manifest import hash_bytes
+
+# text formats worth compressing, images and fonts are compressed already
+COMPRESSIBLE_SUFFIXES = {'.html', '.htm', '.css', '.js', '.mjs', '.json', '.map', '.svg', '.txt', '.xml', '.md'}
+DEFAULT_LEVEL = 9
+
+
+def is_compressible(path: Path) -> bool:
+    return path.suffix.lower() in COMPRESSIBLE_SUFFIXES
+
+
+def sidecar_path(path: Path) -> Path:
+    # nginx gzip_static serves <file>.gz in place of <file>
+    return path.with_name(f'{path.name}.gz')
+
+
+def compress_file(path: Path, previous_hash: str | None, level: int) -> tuple[str, bool]:
+    # returns the content hash and whether the sidecar had to be written
+    data = path.read_bytes()
+    content_hash = hash_bytes(data)
+    sidecar = sidecar_path(path)
+    if content_hash == previous_hash and sidecar.exists():
+        return content_hash, False
+    # mtime=0 keeps the sidecar the same for the same content, write then rename so it's never served half written
+    tmp_path = sidecar.with_name(f'{sidecar.name}.tmp')
+    tmp_path.write_bytes(gzip.compress(data, compresslevel=level, mtime=0))
+    os.replace(tmp_path, sidecar)
+    return content_hash, True
+
+
+def compress_outputs(outputs: list[Path], previous: dict[str, str], level: int) -> dict[str, str]:
+    # Writes a .gz sidecar next to every compressible output whose content changed since the
+    # sidecar was made, and returns the new output -> content hash map for the manifest.
+    # zlib releases the GIL while it compresses, so a thread pool uses every core.
+    outputs = [output for output in outputs if is_compressible(output)]
+    with ThreadPoolExecutor() as executor:
+        results = list(executor.map(lambda output: compress_file(output, previous.get(str(output)), level), outputs))
+    written = sum(1 for _, changed in results if changed)
+    print(f'GZIP: {written} compressed, {len(results) - written} unchanged (level {level})')
+    return {str(output): content_hash for output, (content_hash, _) in zip(outputs, results)}
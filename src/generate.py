@@ -1,57 +1,483 @@
+import os
 import shutil
+import time
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader, Template
-from md_to_html import extract_title, markdown_to_html_node
+from functools import cache
+from itertools import chain
+from htmlnode import UrlResolver
+from arena import DocumentArena
+from block_cache import DEFAULT_MAX_BYTES, BlockCache, CacheStats
+from htmlnode import Block
+from md_to_html import DOCUMENT_TAG, block_to_arena, extract_title, parse_blocks
+from manifest import BuildManifest, hash_file
+from links import LinkCollector
+from metadata import is_draft, read_front_matter, read_header
+from search import SearchIndex, tokenize
+from minify import compact_savings, compact_template, is_compact
+from page_template import PageTemplate, SimpleTemplate
+from shard import Shard
+from assets import AssetMap, fingerprinted_name, is_fingerprinted
+from images import ImageSizes, sizes_changed
+from instrument import NO_TRACE, BuildTrace, NullTrace, PageTrace, timed_lines
 
-def copy_static_files(src_dir_path: Path, dest_dir_path: Path) -> None:
+TEMPLATE_NAME = 'template.html'
+# rendered in place of the page content, the body is then streamed into the output between the two halves
+CONTENT_PLACEHOLDER = '\x00content\x00'
+
+
+@dataclass(slots=True)
+class PageStats:
+    # filled in by iter_page while the page is written
+    saved: int = 0
+    # internal URLs of the page -> line, see links.py
+    links: dict[str, int] = field(default_factory=dict)
+    title: str = ''
+    # the page's front matter with its title
+    meta: dict[str, object] = field(default_factory=dict)
+    # how often every word of the page's text is used, None unless the page goes in the search index
+    terms: Counter | None = None
+    # site absolute images of the page -> their size, see PageRecord.images
+    images: dict[str, list[int] | None] = field(default_factory=dict)
+
+
+def copy_static_files(src_dir_path: Path, dest_dir_path: Path, link: bool = False,
+                      shard: Shard | None = None, assets: AssetMap | None = None) -> list[tuple[Path, Path]]:
+    # Only copies the files whose size or modification time differ from the existing output,
+    # the copies run in a thread pool since they are bound by I/O, not by the GIL
+    files = [file for file in _walk_static_files(src_dir_path, dest_dir_path)
+             if shard is None or shard.owns(file[0].relative_to(src_dir_path))]
+    changed = [(src, dest) for src, dest, src_stat in files if _needs_copy(src_stat, dest)]
+    # A fingerprinted asset keeps its own name too, for the CSS, scripts and static pages that link it by that.
+    # The fingerprinted output is a hardlink to the other one, a large static folder doesn't take twice the space.
+    fingerprinted = []
+    if assets is not None:
+        for _, dest, src_stat in files:
+            path = dest.relative_to(dest_dir_path).as_posix()
+            if path in assets.paths:
+                fingerprinted.append((dest, dest_dir_path / assets.paths[path], src_stat))
+    linked = [(dest, fingerprinted_dest) for dest, fingerprinted_dest, src_stat in fingerprinted
+              if _needs_copy(src_stat, fingerprinted_dest)]
+    with ThreadPoolExecutor() as executor:
+        for src, dest in executor.map(lambda file: _copy_file(*file, link), changed):
+            print(f'COPY-FILE: \'{src}\' -> \'{dest}\'')
+        # the outputs they link to are all written by now
+        for src, dest in executor.map(lambda file: _copy_file(*file, True), linked):
+            print(f'COPY-FILE: \'{src}\' -> \'{dest}\'')
+    print(f'COPY: {len(changed) + len(linked)} changed, {len(files) + len(fingerprinted) - len(changed) - len(linked)} '
+          f'unchanged')
+    sources = {dest: src for src, dest, _ in files}
+    return [(src, dest) for src, dest, _ in files] + [(sources[dest], fingerprinted_dest)
+                                                       for dest, fingerprinted_dest, _ in fingerprinted]
+
+
+def _walk_static_files(src_dir_path: Path, dest_dir_path: Path) -> Iterator[tuple[Path, Path, os.stat_result]]:
     dest_dir_path.mkdir(parents=True, exist_ok=True)
+    with os.scandir(src_dir_path) as entries:
+        for entry in entries:
+            dest_path = dest_dir_path / entry.name
+            if entry.is_dir():
+                yield from _walk_static_files(Path(entry.path), dest_path)
+            else:
+                yield Path(entry.path), dest_path, entry.stat()
+
+
+def fingerprint_assets(src_dir_path: Path, dest_dir_path: Path, previous: dict[str, str]) -> AssetMap:
+    # The fingerprinted name of every static asset, from the hash of its content. An asset whose
+    # output still has its size and modification time keeps the name of the previous build unhashed.
+    # Every asset is named, not only a shard's, the pages of one shard link the assets of the others.
+    paths = {}
+    hashed = 0
+    for src, dest, src_stat in _walk_static_files(src_dir_path, dest_dir_path):
+        if not is_fingerprinted(src):
+            continue
+        path = src.relative_to(src_dir_path).as_posix()
+        name = previous.get(path)
+        if name is None or _needs_copy(src_stat, dest_dir_path / name):
+            name = fingerprinted_name(path, hash_file(src))
+            hashed += 1
+        paths[path] = name
+    print(f'FINGERPRINT: {len(paths)} assets, {hashed} hashed')
+    return AssetMap.create(paths)
+
+
+def _needs_copy(src_stat: os.stat_result, dest_path: Path) -> bool:
+    try:
+        dest_stat = dest_path.stat()
+    except FileNotFoundError:
+        return True
+    # copies keep the source mtime (and hardlinks are the same file), so equal stats mean equal files
+    return dest_stat.st_size != src_stat.st_size or dest_stat.st_mtime_ns != src_stat.st_mtime_ns
+
+
+def _copy_file(src_path: Path, dest_path: Path, link: bool) -> tuple[Path, Path]:
+    # never write through the old output, it may be a hardlink to the source
+    dest_path.unlink(missing_ok=True)
+    if link:
+        try:
+            os.link(src_path, dest_path)
+            return src_path, dest_path
+        except OSError:
+            # different filesystem or no hardlink support, fall back to a copy
+            pass
+    try:
+        _copy_file_range(src_path, dest_path)
+    except OSError:
+        shutil.copyfile(src_path, dest_path)
+    shutil.copystat(src_path, dest_path)
+    return src_path, dest_path
+
 
-    for filename in src_dir_path.iterdir():
-        dest_path = dest_dir_path / filename.name
-        if filename.is_file():
-            shutil.copy(filename, dest_path)
-            print(f'COPY-FILE: \'{filename}\' -> \'{dest_path}\'')
-        else:
-            copy_static_files(filename, dest_path)
+def _copy_file_range(src_path: Path, dest_path: Path) -> None:
+    if not hasattr(os, 'copy_file_range'):
+        raise OSError("os.copy_file_range is not available")
+    # copy_file_range copies inside the kernel and can share the blocks on copy-on-write filesystems
+    with src_path.open('rb') as src, dest_path.open('wb') as dest:
+        remaining = os.fstat(src.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(src.fileno(), dest.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
 
 
-def generate_public(dest_path: Path, static_path: Path) -> None:
-    if dest_path.exists():
+def generate_public(dest_path: Path, static_path: Path, clean: bool = True, link: bool = False,
+                    shard: Shard | None = None, assets: AssetMap | None = None) -> list[tuple[Path, Path]]:
+    if clean and dest_path.exists():
         shutil.rmtree(dest_path)
-    dest_path.mkdir()
-    print(f'CREATE: \'{dest_path}\' folder')
+    if not dest_path.exists():
+        dest_path.mkdir(parents=True)
+        print(f'CREATE: \'{dest_path}\' folder')
 
     print(f'COPY: \'{static_path}\' -> \'{dest_path}\'')
-    copy_static_files(static_path, dest_path)
+    return copy_static_files(static_path, dest_path, link, shard, assets)
 
 
-def generate_page_recursive(dir_path_content: Path, template_path: Path, dest_dir_path: Path, base_path: str) -> None:
+def load_template(template_path: Path, cache_path: Path | None = None, compact: bool = False) -> PageTemplate:
+    start = time.perf_counter()
+    # a template that only prints variables is rendered without importing Jinja at all
+    path = template_path / TEMPLATE_NAME
+    template = SimpleTemplate.parse(path.read_text(encoding='utf-8'), str(path))
+    if template is None:
+        from jinja_template import load_jinja_template
+        template = load_jinja_template(template_path, TEMPLATE_NAME, cache_path, compact)
+    elif compact:
+        # compact pages drop the whitespace between the template's tags, see minify.py
+        compact_template(template)
+    renderer = 'built-in' if isinstance(template, SimpleTemplate) else 'Jinja'
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f'LOAD-TEMPLATE: \'{template.filename}\' in {elapsed:.2f} ms ({renderer})')
+    return template
+
+
+def iter_pages(dir_path_content: Path, dest_dir_path: Path, drafts: bool = False, shard: Shard | None = None,
+               content_root: Path | None = None) -> Iterator[tuple[Path, Path]]:
+    # the output folders are created while walking so empty content folders are mirrored too
     dest_dir_path.mkdir(parents=True, exist_ok=True)
-    
-    for filename in dir_path_content.iterdir():
-        dest_path = dest_dir_path / filename.name
-        if filename.is_file() and filename.suffix == '.md':
-            dest_path = dest_path.with_suffix(".html")
-            generate_page(filename, template_path, dest_path, base_path)
-        elif filename.is_dir():
-            generate_page_recursive(filename, template_path, dest_path, base_path)
+    # a shard only keeps the pages whose path from the top content folder hashes to it
+    content_root = content_root or dir_path_content
+
+    # the entries know their type from the directory listing, no page or folder is stat'ed to find it
+    with os.scandir(dir_path_content) as entries:
+        for entry in entries:
+            if entry.is_file() and os.path.splitext(entry.name)[1] == '.md':
+                filename = Path(entry.path)
+                if shard is not None and not shard.owns(filename.relative_to(content_root)):
+                    continue
+                # only the front matter is read, a draft is left out before any of its markdown is parsed
+                if not drafts and is_draft(read_front_matter(filename)):
+                    print(f'DRAFT: \'{filename}\' skipped')
+                    continue
+                yield filename, (dest_dir_path / entry.name).with_suffix(".html")
+            elif entry.is_dir():
+                yield from iter_pages(Path(entry.path), dest_dir_path / entry.name, drafts, shard, content_root)
+
+
+def discover_pages(dir_path_content: Path, dest_dir_path: Path, drafts: bool = False, shard: Shard | None = None,
+                   content_root: Path | None = None) -> list[tuple[Path, Path]]:
+    return list(iter_pages(dir_path_content, dest_dir_path, drafts, shard, content_root))
+
+
+def iter_pages_to_render(pages: Iterable[tuple[Path, Path]], manifest: BuildManifest,
+                         previous: BuildManifest | None,
+                         images: ImageSizes | None = None) -> Iterator[tuple[Path, Path]]:
+    for source, dest in pages:
+        if add_source(manifest, previous, source, dest, hash_file(source), images):
+            yield source, dest
+
+
+def add_source(manifest: BuildManifest, previous: BuildManifest | None, source: Path, dest: Path, source_hash: str,
+               images: ImageSizes | None = None) -> bool:
+    # adds the page to the manifest, returns whether it has to be rendered
+    # a page is rendered again when one of its own images got another size, not for any other image
+    if (previous is None or not previous.is_fresh(source, dest, source_hash)
+            or sizes_changed(previous.pages[str(source)].images, images)):
+        manifest.add_page(source, dest, source_hash)
+        return True
+    # the links of a page that isn't rendered again are still checked and its metadata indexed
+    record = previous.pages[str(source)]
+    manifest.add_page(source, dest, source_hash, record.links, record.meta, record.images)
+    return False
+
+
+def pages_to_render(pages: Iterable[tuple[Path, Path]], manifest: BuildManifest,
+                    previous: BuildManifest | None, images: ImageSizes | None = None) -> list[tuple[Path, Path]]:
+    return list(iter_pages_to_render(pages, manifest, previous, images))
+
 
+def generate_page_recursive(dir_path_content: Path, template: PageTemplate, dest_dir_path: Path, base_path: str,
+                            manifest: BuildManifest | None = None, previous: BuildManifest | None = None,
+                            trace: BuildTrace | None = None, cache: BlockCache | None = None,
+                            search: SearchIndex | None = None, drafts: bool = False,
+                            shard: Shard | None = None, assets: AssetMap | None = None,
+                            images: ImageSizes | None = None) -> None:
+    # the pages are rendered while the content folder is walked, one at a time, so only the manifest
+    # records grow with the size of the site
+    pages = iter_pages(dir_path_content, dest_dir_path, drafts, shard)
+    if manifest is not None:
+        pages = iter_pages_to_render(pages, manifest, previous, images)
+    for source, dest in pages:
+        page_trace = trace.page(str(source)) if trace is not None else NO_TRACE
+        stats = generate_page(source, template, dest, base_path, page_trace, cache, search is not None, assets,
+                              images)
+        record_page(source, dest, stats, manifest, search)
 
-def generate_page(from_path: Path, template_path: str, dest_path: Path, base_path: str) -> None:
-    print(f'Generating page \'{from_path}\' -> \'{dest_path}\' | Template: \'{template_path}\'')
 
-    md = from_path.read_text()
-    title = extract_title(md)
+def record_page(source: Path, dest: Path, stats: PageStats, manifest: BuildManifest | None,
+                search: SearchIndex | None) -> None:
+    # what the build keeps of a rendered page once it's written
+    if manifest is not None:
+        manifest.set_page_data(source, stats.links, stats.meta, stats.images)
+    if search is not None:
+        search.add_page(source, dest, stats.title, stats.terms)
 
-    content: str = markdown_to_html_node(md).to_html()
-    content = content.replace('href=\"/', f'href=\"{base_path}').replace('src=\"/', f'src=\"{base_path}')
 
-    env = Environment(loader=FileSystemLoader(template_path))
-    template = env.get_template("template.html")
+# each worker process loads the template once in _init_worker, Jinja templates can't be pickled
+_worker_template: PageTemplate | None = None
+_worker_block_cache: BlockCache | None = None
+_worker_assets: AssetMap | None = None
+_worker_images: ImageSizes | None = None
+
+
+def _init_worker(template_path: Path, cache_path: Path | None, block_cache_path: Path | None, block_cache_bytes: int,
+                 compact: bool, assets: AssetMap | None, images: ImageSizes | None) -> None:
+    global _worker_template, _worker_block_cache, _worker_assets, _worker_images
+    _worker_template = load_template(template_path, cache_path, compact)
+    _worker_assets = assets
+    _worker_images = images
+    if block_cache_path is not None:
+        # the size the build was given, a worker evicts the shared cache once it outgrows it
+        _worker_block_cache = BlockCache.open(block_cache_path, block_cache_bytes)
+
+
+def _generate_batch(batch: list[tuple[Path, Path]], base_path: str, traced: bool,
+                    searched: bool) -> tuple[list[PageTrace], CacheStats, list[PageStats]]:
+    # the page traces, block cache stats and page stats are sent back to the main process with the result of the batch
+    traces = []
+    pages = []
+    for source, dest in batch:
+        trace = PageTrace(str(source)) if traced else NO_TRACE
+        pages.append(generate_page(source, _worker_template, dest, base_path, trace, _worker_block_cache, searched,
+                                   _worker_assets, _worker_images))
+        if traced:
+            traces.append(trace)
+    stats = CacheStats()
+    if _worker_block_cache is not None:
+        _worker_block_cache.flush()
+        stats, _worker_block_cache.stats = _worker_block_cache.stats, stats
+    return traces, stats, pages
+
+
+def generate_pages_parallel(pages: list[tuple[Path, Path]], template_path: Path, cache_path: Path | None,
+                            base_path: str, jobs: int, trace: BuildTrace | None = None,
+                            block_cache_path: Path | None = None, block_cache_bytes: int = DEFAULT_MAX_BYTES,
+                            compact: bool = False,
+                            manifest: BuildManifest | None = None, search: SearchIndex | None = None,
+                            assets: AssetMap | None = None, images: ImageSizes | None = None) -> CacheStats:
+    stats = CacheStats()
+    if not pages:
+        return stats
+    # largest files first so a big page doesn't start last and hold up the whole build
+    pages = sorted(pages, key=lambda page: page[0].stat().st_size, reverse=True)
+    # a few batches per worker keeps the IPC overhead low while still balancing the load
+    batch_size = max(1, len(pages) // (jobs * 4))
+    batches = [pages[idx:idx + batch_size] for idx in range(0, len(pages), batch_size)]
+
+    # the multiprocessing modules take a while to import, a serial build never needs them
+    from concurrent.futures import ProcessPoolExecutor
+    initargs = (template_path, cache_path, block_cache_path, block_cache_bytes, compact, assets, images)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=initargs) as executor:
+        traced = trace is not None and trace.enabled
+        futures = {executor.submit(_generate_batch, batch, base_path, traced, search is not None): batch
+                   for batch in batches}
+        try:
+            for future in as_completed(futures):
+                traces, batch_stats, page_stats = future.result()
+                stats.add(batch_stats)
+                for (source, dest), page in zip(futures[future], page_stats):
+                    record_page(source, dest, page, manifest, search)
+                if traced:
+                    trace.pages.extend(traces)
+        except BaseException:
+            # fail fast, drop every batch that hasn't started yet
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    return stats
+
+
+def remove_stale_outputs(previous: BuildManifest, manifest: BuildManifest, dest_root: Path) -> None:
+    for output in previous.stale_outputs(manifest):
+        if output.exists():
+            output.unlink()
+            print(f'REMOVE: \'{output}\'')
+        # prune the folders that only held the removed output
+        parent = output.parent
+        while parent != dest_root and parent.is_relative_to(dest_root) and parent.is_dir() and not any(parent.iterdir()):
+            parent.rmdir()
+            parent = parent.parent
+
+
+def write_page(dest_path: Path, chunks: Iterable[str], trace: PageTrace | NullTrace = NO_TRACE) -> None:
+    # streamed next to the output and renamed over it once the last chunk is written, a block that
+    # fails or a build stopped halfway leaves the previous page in place instead of a truncated one
+    tmp_path = dest_path.with_name(f'{dest_path.name}.tmp')
+    try:
+        with tmp_path.open('w') as fp:
+            for chunk in chunks:
+                fp.write(chunk)
+                trace.lap('write')
+                trace.count('chars', len(chunk))
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_path, dest_path)
+
+
+def generate_page(from_path: Path, template: PageTemplate, dest_path: Path, base_path: str,
+                  trace: PageTrace | NullTrace = NO_TRACE, cache: BlockCache | None = None,
+                  search: bool = False, assets: AssetMap | None = None,
+                  images: ImageSizes | None = None) -> PageStats:
+    # every lap charges the time since the previous one to a stage, a no-op unless the page is traced
+    print(f'Generating page \'{from_path}\' -> \'{dest_path}\' | Template: \'{template.filename}\'')
+    trace.lap('log')
+
+    stats = PageStats(terms=Counter() if search else None)
+    with from_path.open() as md_fp:
+        chunks = iter_page(md_fp, template, base_path, trace, cache, stats, assets, images)
+        # the output is only created once the title is parsed and the template rendered
+        head = next(chunks)
+        write_page(dest_path, chain([head], chunks), trace)
+    if is_compact(template):
+        print_savings(dest_path, stats.saved, dest_path.stat().st_size)
+        trace.count('saved', stats.saved)
+    trace.lap('write')
+    trace.finish()
+    return stats
+
+
+def print_savings(dest_path: Path, saved: int, size: int) -> None:
+    # every character compact output leaves out is ASCII whitespace or a quote, one byte each
+    print(f'MINIFY: \'{dest_path}\' {saved} bytes saved ({saved / (size + saved or 1):.1%})')
+
+
+def iter_page(lines: Iterable[str], template: PageTemplate, base_path: str,
+              trace: PageTrace | NullTrace = NO_TRACE, cache: BlockCache | None = None,
+              stats: PageStats | None = None, assets: AssetMap | None = None,
+              images: ImageSizes | None = None) -> Iterator[str]:
+    # yields the page in chunks: the template up to the content, then every block and the rest of the template
+    if stats is None:
+        stats = PageStats()
+    lines = iter(lines)
+    # the front matter and the title come first, the rest of the file is parsed one block at a time
+    meta, first_line, number = read_header(lines)
+    trace.lap('read')
+    title = str(meta['title']) if 'title' in meta else extract_title(first_line)
+    stats.title = title
+    stats.meta = {**meta, 'title': title}
+    lines = chain([first_line], lines)
+    blocks = parse_blocks(lines if trace is NO_TRACE else timed_lines(lines, trace), number)
+    # link and image URLs get the base_path and the assets their fingerprinted names while the nodes
+    # are built, the images their sizes, the HTML is never rewritten, the internal URLs are collected
+    # on the way for the link check
+    resolver = LinkCollector(base_path, assets, images, links=stats.links, used_images=stats.images)
+    # the arena's arrays are reused from block to block
+    arena = DocumentArena()
+    # a template loaded with compact=True makes the blocks compact too
+    compact = is_compact(template)
+    if compact:
+        stats.saved += compact_savings(template)
+
     data = {
         "title": title,
-        "content": content,
-        "base_path": base_path
+        "content": CONTENT_PLACEHOLDER,
+        "base_path": base_path,
+        "meta": stats.meta,
+        "asset": resolver.asset
     }
-    html = template.render(data)
-    dest_path.write_text(html)
\ No newline at end of file
+    head, placeholder, tail = template.render(data).partition(CONTENT_PLACEHOLDER)
+    trace.lap('render')
+    if not streams_content(template) or not placeholder or CONTENT_PLACEHOLDER in tail:
+        # the template transforms or repeats the content, it has to get the whole string
+        rendered = [render_block(block, resolver, arena, cache, trace, compact, stats) for block in blocks]
+        trace.count('blocks', len(rendered))
+        data["content"] = f'<{DOCUMENT_TAG}>{"".join(rendered)}</{DOCUMENT_TAG}>'
+        page = template.render(data)
+        trace.lap('render')
+        yield page
+        return
+
+    yield f'{head}<{DOCUMENT_TAG}>'
+    # one block is rendered at a time, so the page never has to fit in memory
+    for block in blocks:
+        trace.lap('blocks')
+        yield render_block(block, resolver, arena, cache, trace, compact, stats)
+        trace.count('blocks')
+    yield f'</{DOCUMENT_TAG}>{tail}'
+
+
+def render_block(block: Block, resolver: UrlResolver, arena: DocumentArena, cache: BlockCache | None,
+                 trace: PageTrace | NullTrace = NO_TRACE, compact: bool = False,
+                 stats: PageStats | None = None) -> str:
+    searched = stats is not None and stats.terms is not None
+    # an unchanged block is spliced in from the cache without being parsed again,
+    # unless the search index needs its text and the cached entry was stored without it
+    if cache is not None:
+        key = BlockCache.key(block, resolver, compact)
+        entry = cache.get(key)
+        trace.lap('cache')
+        if entry is not None and (entry[2] is not None or not searched):
+            resolver.start_block(block, cached=True)
+            html, saved, text = entry
+            if stats is not None:
+                stats.saved += saved
+                if searched:
+                    stats.terms.update(tokenize(text))
+            return html
+    resolver.start_block(block)
+    block_to_arena(arena, block.text, block.block_type, resolver)
+    trace.lap('inline')
+    html = arena.to_html(compact=compact)
+    saved = arena.saved
+    # the words the reader sees, without the markdown syntax and the URLs
+    text = ' '.join(arena.iter_text()) if searched else None
+    arena.clear()
+    trace.lap('to_html')
+    if stats is not None:
+        stats.saved += saved
+        if searched:
+            stats.terms.update(tokenize(text))
+    if cache is not None:
+        cache.put(key, html, saved, text)
+    return html
+
+
+@cache
+def streams_content(template: PageTemplate) -> bool:
+    # the body can only be streamed when the template prints it exactly once as a plain {{ content }}
+    if isinstance(template, SimpleTemplate):
+        return template.streams_content()
+    from jinja_template import streams_content as jinja_streams_content
+    return jinja_streams_content(template)
@@ -1,9 +1,30 @@
 # so type checkers won't throw a not defined warning for 
 # class value types referencing to themselves
 from __future__ import annotations
+import re
+from collections.abc import Iterator, Sequence
 from dataclasses import dataclass, field
-from typing import override
+from typing import TextIO, override
 from enum import Enum
+from assets import AssetMap
+from images import ImageSizes
+
+# whitespace runs that render as one space, and attribute values that need no quotes
+HTML_WHITESPACE = re.compile(r'[ \t\n\r\f]{2,}|[\t\n\r\f]')
+UNQUOTED_VALUE = re.compile(r'[^ \t\n\r\f"\'=<>`]+')
+# elements whose text is shown as written, compact output leaves it alone
+PRESERVE_TAGS = frozenset(('pre', 'code', 'textarea', 'script', 'style'))
+
+
+def compact_text(text: str) -> str:
+    return HTML_WHITESPACE.sub(' ', text)
+
+
+def attribute_to_html(att: str, value: str, compact: bool = False) -> str:
+    if compact and UNQUOTED_VALUE.fullmatch(value):
+        return f' {att}={value}'
+    return f' {att}="{value}"'
+
 
 # slots=True so the class values are strictly the only ones initiated
 # spelling errors for class values throws an error 'node.tga' throws an error
@@ -15,13 +36,37 @@ class HTMLNode:
     children: list[HTMLNode] | None = None
     props: dict[str, str] = field(default_factory=dict)
 
-    def to_html(self):
+    def to_html(self, compact: bool = False):
         raise NotImplementedError()
+
+    def iter_html(self, compact: bool = False) -> Iterator[str]:
+        # walks the tree with an explicit stack instead of recursing, so a deeply
+        # nested tree can't hit the recursion limit and no string is copied per level
+        stack: list[HTMLNode | str] = [self]
+        # compact output skips the text inside pre, code, ... at any depth
+        preserved = 0
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                if compact and node[2:-1] in PRESERVE_TAGS:
+                    preserved -= 1
+                yield node
+            elif isinstance(node, ParentNode):
+                yield node.start_tag(compact)
+                if compact and node.tag in PRESERVE_TAGS:
+                    preserved += 1
+                stack.append(f'</{node.tag}>')
+                stack.extend(reversed(node.children))
+            else:
+                yield node.to_html(compact and not preserved)
+
+    def write_html(self, fp: TextIO, compact: bool = False) -> None:
+        fp.writelines(self.iter_html(compact))
     
-    def props_to_html(self):
+    def props_to_html(self, compact: bool = False):
         if not self.props:
             return ''
-        return "".join(f' {att}="{value}"' for att, value in self.props.items())
+        return "".join(attribute_to_html(att, value, compact) for att, value in self.props.items())
     
 @dataclass(slots=True)
 class LeafNode(HTMLNode):
@@ -29,34 +74,33 @@ class LeafNode(HTMLNode):
     children: None = field(default=None, init=False)
 
     @override
-    def to_html(self):
+    def to_html(self, compact: bool = False):
         # only img have a '' value.
         if not self.value and self.tag != 'img':
             raise ValueError("All leaf nodes must have a value")
+        # compact output collapses whitespace the browser would collapse anyway
+        value = compact_text(self.value) if compact and self.tag not in PRESERVE_TAGS else self.value
         if not self.tag:
-            return self.value
+            return value
         if self.tag == 'img':
-            return f'<{self.tag}{self.props_to_html()}>'
-        return f'<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>'
+            return f'<{self.tag}{self.props_to_html(compact)}>'
+        return f'<{self.tag}{self.props_to_html(compact)}>{value}</{self.tag}>'
     
 @dataclass(slots=True)
 class ParentNode(HTMLNode):
     value: None = field(default=None, init=False)
     children: list[HTMLNode] = field(default_factory=list)
 
-    @override
-    def to_html(self):
+    def start_tag(self, compact: bool = False) -> str:
         if not self.tag:
             raise ValueError("tag is required")
         if not self.children:
             raise ValueError("ParentNode must have at least one child")
-        
-        html = f'<{self.tag}{self.props_to_html()}>'
-        for child in self.children:
-            html += child.to_html()
-        html += f'</{self.tag}>'
-        
-        return html
+        return f'<{self.tag}{self.props_to_html(compact)}>'
+
+    @override
+    def to_html(self, compact: bool = False):
+        return ''.join(self.iter_html(compact))
     
 
 class TextType(Enum):
@@ -76,13 +120,92 @@ class BlockType(Enum):
     OLIST = "ordered_list"
 
 
+@dataclass(slots=True)
+class Block:
+    text: str
+    block_type: BlockType
+    # 1-based line of the block's first line in the markdown source
+    line: int = 1
+
+
+@dataclass(slots=True)
+class UrlResolver:
+    # maps the URLs written in the markdown to the ones put in the HTML,
+    # subclass it to rewrite links and images some other way
+    base_path: str = '/'
+    # fingerprinted names of the static assets, None links them by their own names
+    assets: AssetMap | None = None
+    # sizes of the static images, None leaves the images without size and lazy loading
+    images: ImageSizes | None = None
+    # images of the page so far, the first one is loaded right away
+    images_seen: int = 0
+
+    def resolve(self, url: str) -> str:
+        # site absolute URLs are served under base_path, relative,
+        # external and protocol relative ('//host') ones are kept as they are
+        if url.startswith('/') and not url.startswith('//'):
+            if self.assets is not None:
+                return f'{self.base_path}{self.assets.path(url[1:])}'
+            return f'{self.base_path}{url[1:]}'
+        return url
+
+    def asset(self, path: str) -> str:
+        # the URL of a static asset for the template, {{ asset('index.css') }}
+        path = path.lstrip('/')
+        if self.assets is not None:
+            path = self.assets.path(path)
+        return f'{self.base_path}{path}'
+
+    def image_props(self, url: str) -> dict[str, str]:
+        # attributes added to an image after src and alt: the size of the site's images so the
+        # layout doesn't shift when they load, and lazy loading for all but the page's first one
+        if self.images is None:
+            return {}
+        props = {}
+        size = self.image_size(url)
+        if size is not None:
+            props["width"], props["height"] = str(size[0]), str(size[1])
+        if self.images_seen:
+            props["loading"] = 'lazy'
+            props["decoding"] = 'async'
+        self.images_seen += 1
+        return props
+
+    def image_size(self, url: str) -> tuple[int, int] | None:
+        # only the site absolute URLs point into the static folder
+        if self.images is None or not url.startswith('/') or url.startswith('//'):
+            return None
+        return self.images.size(url[1:])
+
+    def cache_key(self, image_urls: Sequence[str] = ()) -> str:
+        # everything the resolved URLs of a block with these images depend on,
+        # cached blocks are only reused when it matches
+        key = self.base_path
+        if self.assets is not None:
+            key = f'{key}\0{self.assets.key}'
+        if self.images is not None and image_urls:
+            # only the sizes of the block's own images, and a block renders its first image
+            # differently when the page had one before
+            sizes = ','.join(f'{size[0]}x{size[1]}' if size else '-' for size in map(self.image_size, image_urls))
+            key = f'{key}\0{self.images_seen > 0:d}\0{sizes}'
+        return key
+
+    def start_block(self, block: Block, cached: bool = False) -> None:
+        # called before the URLs of every block are resolved, cached is True when the
+        # block's HTML comes from the cache and resolve() and image_props() won't be called for it
+        pass
+
+
+DEFAULT_RESOLVER = UrlResolver()
+
+
 @dataclass(slots=True)
 class TextNode:
     text: str
     text_type: TextType
     url: str | None = None
 
-    def to_html_node(self) -> LeafNode:
+    def to_html_node(self, resolver: UrlResolver = DEFAULT_RESOLVER) -> LeafNode:
         match self.text_type:
             case TextType.TEXT:
                 return LeafNode(None, self.text)
@@ -93,9 +216,10 @@ class TextNode:
             case TextType.CODE:
                 return LeafNode('code', self.text)
             case TextType.LINK:
-                return LeafNode('a', self.text, {"href": self.url})
+                return LeafNode('a', self.text, {"href": resolver.resolve(self.url)})
             case TextType.IMAGE:
-                return LeafNode('img', '', {"src": self.url, "alt": self.text})
+                return LeafNode('img', '', {"src": resolver.resolve(self.url), "alt": self.text,
+                                            **resolver.image_props(self.url)})
             
             case _:
                 raise ValueError("Invalid TextType for TextNode")
\ No newline at end of file
@@ -0,0 +1,149 @@
+import json
+import os
+import struct
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from assets import split_query
+from manifest import hash_bytes
+
+# bump this when the sizes read from a format change so older caches are ignored
+IMAGE_CACHE_VERSION = 1
+IMAGE_SUFFIXES = frozenset(('.png', '.jpg', '.jpeg', '.gif', '.webp'))
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+GIF_SIGNATURES = (b'GIF87a', b'GIF89a')
+# the start of frame markers hold the size of a JPEG, 0xC4, 0xC8 and 0xCC are other segments
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def image_size(data: bytes) -> tuple[int, int] | None:
+    # width and height from the header of a PNG, GIF, JPEG or WebP file, None for anything else
+    if data.startswith(PNG_SIGNATURE) and data[12:16] == b'IHDR' and len(data) >= 24:
+        return struct.unpack('>II', data[16:24])
+    if data.startswith(GIF_SIGNATURES) and len(data) >= 10:
+        return struct.unpack('<HH', data[6:10])
+    if data.startswith(b'\xff\xd8'):
+        return _jpeg_size(data)
+    if data.startswith(b'RIFF') and data[8:12] == b'WEBP':
+        return _webp_size(data)
+    return None
+
+
+def _jpeg_size(data: bytes) -> tuple[int, int] | None:
+    # the segments before the frame header are skipped by their lengths
+    idx = 2
+    while idx + 9 <= len(data):
+        if data[idx] != 0xFF:
+            return None
+        marker = data[idx + 1]
+        if marker == 0xFF:
+            # fill byte before the marker
+            idx += 1
+        elif marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # markers without a length
+            idx += 2
+        elif marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack('>HH', data[idx + 5:idx + 9])
+            return width, height
+        elif marker in (0xD9, 0xDA):
+            # the image data or the end of it, there's no frame header
+            return None
+        else:
+            idx += 2 + struct.unpack('>H', data[idx + 2:idx + 4])[0]
+    return None
+
+
+def _webp_size(data: bytes) -> tuple[int, int] | None:
+    chunk = data[12:16]
+    if chunk == b'VP8 ' and data[23:26] == b'\x9d\x01\x2a' and len(data) >= 30:
+        # lossy, 14 bits each after the frame's start code
+        width, height = struct.unpack('<HH', data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and len(data) >= 25 and data[20] == 0x2F:
+        # lossless, both minus one packed in 14 bits each
+        bits = int.from_bytes(data[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X' and len(data) >= 30:
+        # extended, both minus one in 24 bits each
+        return int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+    return None
+
+
+@dataclass(slots=True, eq=False)
+class ImageSizes:
+    # static image path -> width and height, relative to the static folder like 'images/tom.png'
+    sizes: dict[str, tuple[int, int]] = field(default_factory=dict)
+    # hash of all the sizes, the rendered blocks are cached per set of sizes
+    key: str = ''
+
+    @classmethod
+    def create(cls, sizes: dict[str, tuple[int, int]]) -> 'ImageSizes':
+        return cls(sizes, hash_bytes(json.dumps(sizes, sort_keys=True).encode())[:16])
+
+    def size(self, path: str) -> tuple[int, int] | None:
+        return self.sizes.get(split_query(path)[0])
+
+
+def sizes_changed(used: dict[str, list[int] | None], images: ImageSizes | None) -> bool:
+    # whether an image a page was rendered with got another size, or appeared or went away since
+    for path, size in used.items():
+        current = images.sizes.get(path) if images is not None else None
+        if (list(current) if current is not None else None) != size:
+            return True
+    return False
+
+
+def iter_images(root: Path) -> Iterator[Path]:
+    for folder, _, names in os.walk(root):
+        for name in names:
+            if os.path.splitext(name)[1].lower() in IMAGE_SUFFIXES:
+                yield Path(folder, name)
+
+
+def load_image_cache(path: Path | None) -> tuple[dict[str, list], dict[str, list[int] | None]]:
+    # image file -> [mtime, size, content hash] and content hash -> [width, height], None when unreadable
+    try:
+        data = json.loads(path.read_text()) if path is not None else {}
+    except (OSError, ValueError):
+        data = {}
+    if data.get("version") != IMAGE_CACHE_VERSION:
+        return {}, {}
+    return data["files"], data["sizes"]
+
+
+def save_image_cache(path: Path, files: dict[str, list], sizes: dict[str, list[int] | None]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # write then rename, the shard builds can save theirs at the same time
+    tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+    tmp_path.write_text(json.dumps({"version": IMAGE_CACHE_VERSION, "files": files, "sizes": sizes}))
+    tmp_path.replace(path)
+
+
+def measure_images(static_root: Path, cache_path: Path | None = None) -> ImageSizes:
+    # Reads the size of every image under static_root. The sizes are cached by the hash of the file,
+    # an image whose modification time and size didn't change isn't opened at all, one that did is
+    # hashed and its header only read again when the content is new.
+    files, sizes = load_image_cache(cache_path)
+    seen_files = {}
+    measured = {}
+    read = 0
+    for path in iter_images(static_root):
+        stat = path.stat()
+        entry = files.get(str(path))
+        if entry is None or entry[:2] != [stat.st_mtime_ns, stat.st_size] or entry[2] not in sizes:
+            data = path.read_bytes()
+            content_hash = hash_bytes(data)
+            if content_hash not in sizes:
+                sizes[content_hash] = image_size(data)
+                read += 1
+            entry = [stat.st_mtime_ns, stat.st_size, content_hash]
+        seen_files[str(path)] = entry
+        size = sizes[entry[2]]
+        if size is not None:
+            measured[path.relative_to(static_root).as_posix()] = (size[0], size[1])
+    print(f'IMAGES: {len(measured)} sizes, {read} read')
+    if cache_path is not None:
+        # the sizes of deleted images are dropped with them
+        hashes = {entry[2] for entry in seen_files.values()}
+        save_image_cache(cache_path, seen_files, {key: size for key, size in sizes.items() if key in hashes})
+    return ImageSizes.create(measured)
@@ -0,0 +1,156 @@
+import json
+import os
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+@dataclass(slots=True)
+class PageTrace:
+    name: str
+    pid: int = field(default_factory=os.getpid)
+    start: float = field(default_factory=time.perf_counter)
+    end: float = 0.0
+    # seconds spent in every stage, summed over all the blocks of the page
+    stages: dict[str, float] = field(default_factory=dict)
+    counts: dict[str, int] = field(default_factory=dict)
+    last: float = 0.0
+
+    def __post_init__(self):
+        self.last = self.start
+
+    def lap(self, stage: str) -> None:
+        # everything since the previous lap was spent in this stage
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self.last
+        self.last = now
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def finish(self) -> None:
+        self.end = time.perf_counter()
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class NullTrace:
+    # stands in for PageTrace when tracing is off, so the build only pays for an empty method call
+    __slots__ = ()
+
+    def lap(self, stage: str) -> None:
+        pass
+
+    def count(self, name: str, amount: int = 1) -> None:
+        pass
+
+    def finish(self) -> None:
+        pass
+
+
+NO_TRACE = NullTrace()
+
+
+def timed_lines(lines: Iterable[str], trace: PageTrace) -> Iterator[str]:
+    # splits the time the block parser spends waiting for lines ('read') from its own work ('blocks')
+    iterator = iter(lines)
+    while True:
+        trace.lap('blocks')
+        line = next(iterator, None)
+        trace.lap('read')
+        if line is None:
+            return
+        yield line
+
+
+@dataclass(slots=True)
+class BuildTrace:
+    # the build level spans are always recorded, there are only a handful of them,
+    # the per page stages only when enabled
+    enabled: bool = False
+    start: float = field(default_factory=time.perf_counter)
+    pages: list[PageTrace] = field(default_factory=list)
+    # build level spans as (name, start, end)
+    spans: list[tuple[str, float, float]] = field(default_factory=list)
+    counts: dict[str, int] = field(default_factory=dict)
+
+    def page(self, name: str) -> PageTrace | NullTrace:
+        if not self.enabled:
+            return NO_TRACE
+        trace = PageTrace(name)
+        self.pages.append(trace)
+        return trace
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((name, start, time.perf_counter()))
+
+    def stage_totals(self) -> dict[str, float]:
+        totals = {}
+        for page in self.pages:
+            for stage, seconds in page.stages.items():
+                totals[stage] = totals.get(stage, 0.0) + seconds
+        return totals
+
+    def count_totals(self) -> dict[str, int]:
+        totals = dict(self.counts)
+        for page in self.pages:
+            for name, amount in page.counts.items():
+                totals[name] = totals.get(name, 0) + amount
+        return totals
+
+    def print_summary(self, top: int) -> None:
+        for name, start, end in self.spans:
+            print(f'TRACE: {name:<12} {(end - start) * 1000:>10.2f} ms')
+        for stage, seconds in sorted(self.stage_totals().items(), key=lambda item: item[1], reverse=True):
+            print(f'TRACE: page/{stage:<7} {seconds * 1000:>10.2f} ms')
+        counts = ', '.join(f'{name} {amount}' for name, amount in self.count_totals().items())
+        print(f'TRACE: {len(self.pages)} pages | {counts}')
+        for page in sorted(self.pages, key=lambda page: page.duration, reverse=True)[:top]:
+            print(f'SLOW-PAGE: {page.duration * 1000:>8.2f} ms \'{page.name}\'')
+
+    def to_chrome_trace(self) -> dict:
+        # Chrome trace event format (chrome://tracing, ui.perfetto.dev), timestamps in microseconds.
+        # The stage spans of a page are laid end to end inside the page span, their
+        # durations are the totals over all the blocks of the page.
+        def micros(seconds: float) -> float:
+            return round((seconds - self.start) * 1_000_000, 3)
+
+        events = []
+        main_pid = os.getpid()
+        for name, start, end in self.spans:
+            events.append({"name": name, "cat": "build", "ph": "X", "pid": main_pid, "tid": 0,
+                           "ts": micros(start), "dur": micros(end) - micros(start)})
+        for page in self.pages:
+            events.append({"name": page.name, "cat": "page", "ph": "X", "pid": page.pid, "tid": 1,
+                           "ts": micros(page.start), "dur": micros(page.end) - micros(page.start),
+                           "args": {"stages_ms": {stage: seconds * 1000 for stage, seconds in page.stages.items()},
+                                    "counts": page.counts}})
+            offset = page.start
+            for stage, seconds in page.stages.items():
+                events.append({"name": stage, "cat": "stage", "ph": "X", "pid": page.pid, "tid": 1,
+                               "ts": micros(offset), "dur": round(seconds * 1_000_000, 3)})
+                offset += seconds
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "stages_ms": {stage: seconds * 1000 for stage, seconds in self.stage_totals().items()},
+                "counts": self.count_totals()
+            }
+        }
+
+    def export(self, path: Path) -> None:
+        path.write_text(json.dumps(self.to_chrome_trace()))
+        print(f'TRACE: written to \'{path}\'')
@@ -0,0 +1,70 @@
+from collections.abc import Iterator
+from functools import cache
+from pathlib import Path
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template, nodes
+from jinja2.ext import Extension
+from jinja2.lexer import Token, TokenStream
+from minify import COMPACT_VERSION, MarkupCompactor
+
+# Everything the build needs from Jinja, only imported for the templates SimpleTemplate can't render.
+
+
+class CompactWhitespace(Extension):
+    # drops the whitespace between the template's tags when it's compiled, the rendered
+    # pages come out compact without the output ever being scanned again
+    def filter_stream(self, stream: TokenStream) -> Iterator[Token]:
+        compactor = MarkupCompactor()
+        for token in stream:
+            if token.type == 'data':
+                yield Token(token.lineno, token.type, compactor.feed(token.value))
+            else:
+                compactor.interrupt()
+                yield token
+
+
+def load_jinja_template(template_path: Path, template_name: str, cache_path: Path | None = None,
+                        compact: bool = False) -> Template:
+    # the bytecode cache lets a cold build reuse the template compiled by the previous one
+    bytecode_cache = None
+    if cache_path is not None:
+        # the cache only checks the source, the compact template is compiled to different code
+        if compact:
+            cache_path = cache_path / f'compact-{COMPACT_VERSION}'
+        cache_path.mkdir(parents=True, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(cache_path)
+    # compact pages drop the whitespace between the template's tags
+    extensions = [CompactWhitespace] if compact else []
+    # one build never edits its template, so don't stat it again for every page
+    env = Environment(loader=FileSystemLoader(template_path), bytecode_cache=bytecode_cache, auto_reload=False,
+                      extensions=extensions)
+    return env.get_template(template_name)
+
+
+def is_compact(template: Template) -> bool:
+    return CompactWhitespace.identifier in template.environment.extensions
+
+
+@cache
+def compact_savings(template: Template) -> int:
+    # the characters the compiled template leaves out of every page, counted on the
+    # source since a template loaded from the bytecode cache isn't compiled again
+    env = template.environment
+    source, _, _ = env.loader.get_source(env, template.name)
+    compactor = MarkupCompactor()
+    saved = 0
+    for _, token_type, value in env.lex(source):
+        if token_type == 'data':
+            saved += len(value) - len(compactor.feed(value))
+        elif token_type != 'whitespace' and not token_type.startswith('comment'):
+            compactor.interrupt()
+    return saved
+
+
+def streams_content(template: Template) -> bool:
+    # the body can only be streamed when the template prints it exactly once as a plain {{ content }}
+    env = template.environment
+    source, _, _ = env.loader.get_source(env, template.name)
+    ast = env.parse(source)
+    names = [node for node in ast.find_all(nodes.Name) if node.name == 'content']
+    outputs = [node for output in ast.find_all(nodes.Output) for node in output.nodes if node in names]
+    return len(names) == 1 and len(outputs) == 1
@@ -0,0 +1,126 @@
+import os
+import posixpath
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import override
+from urllib.parse import unquote
+from assets import split_query
+from htmlnode import Block, TextType, UrlResolver
+from manifest import BuildManifest
+from md_to_html import iter_block_urls
+
+# 'https:', 'mailto:', ... urlsplit() would find the same, at a fraction of the cost
+SCHEME = re.compile(r'[A-Za-z][A-Za-z0-9+.-]*:')
+
+
+def is_internal(url: str) -> bool:
+    # links to other sites, to another protocol ('mailto:') or to the same page aren't checked
+    if not url or url.startswith(('#', '//')):
+        return False
+    return SCHEME.match(url) is None
+
+
+@dataclass(slots=True)
+class LinkCollector(UrlResolver):
+    # Resolves URLs like UrlResolver and keeps the internal ones of the page with the line
+    # of the block they're in, only the first line is kept for a URL used more than once.
+    links: dict[str, int] = field(default_factory=dict)
+    # the site absolute images of the page -> the size they got, see PageRecord.images
+    used_images: dict[str, list[int] | None] = field(default_factory=dict)
+    line: int = 1
+
+    @override
+    def resolve(self, url: str) -> str:
+        if url not in self.links and is_internal(url):
+            # the pages of a site link the same URLs, the manifest keeps one copy of each
+            self.links[sys.intern(url)] = self.line
+        return UrlResolver.resolve(self, url)
+
+    @override
+    def image_props(self, url: str) -> dict[str, str]:
+        if url.startswith('/') and not url.startswith('//'):
+            size = self.image_size(url)
+            self.used_images[split_query(url[1:])[0]] = list(size) if size is not None else None
+        return UrlResolver.image_props(self, url)
+
+    @override
+    def start_block(self, block: Block, cached: bool = False) -> None:
+        self.line = block.line
+        if cached:
+            # a cached block isn't parsed again, only the URLs are picked out of it
+            for text_type, url in iter_block_urls(block.text, block.block_type):
+                self.resolve(url)
+                if text_type == TextType.IMAGE:
+                    self.image_props(url)
+
+
+@dataclass(slots=True)
+class BrokenLink:
+    source: str
+    line: int
+    url: str
+
+
+def url_to_path(url: str, page: str) -> str:
+    # the output path a URL of the page points to, both relative to the output folder
+    path = url.partition('#')[0].partition('?')[0]
+    if '%' in path:
+        path = unquote(path)
+    if not path.startswith('/'):
+        path = posixpath.join('/', posixpath.dirname(page), path)
+    return posixpath.normpath(path).lstrip('/')
+
+
+def target_exists(path: str, targets: set[str]) -> bool:
+    # '/blog/post' is served from blog/post, blog/post/index.html or blog/post.html
+    if path in targets:
+        return True
+    return (f'{path}/index.html' if path else 'index.html') in targets or f'{path}.html' in targets
+
+
+def find_line(source: Path, url: str, line: int) -> int:
+    # the links only know the first line of their block, only broken ones are looked up exactly
+    try:
+        with source.open() as fp:
+            for number, text in enumerate(fp, 1):
+                if number >= line and f']({url})' in text:
+                    return number
+    except OSError:
+        pass
+    return line
+
+
+def find_broken_links(manifest: BuildManifest, dest_root: Path) -> tuple[int, list[BrokenLink]]:
+    # every page and static output of the build, then one set lookup or three per link
+    prefix = len(f'{dest_root}{os.sep}')
+    targets = {output[prefix:].replace(os.sep, '/') for output in manifest.outputs()}
+    # a fingerprinted asset is linked by its own name in the markdown
+    targets.update(manifest.assets)
+    # site absolute URLs point to the same file from every page, they are only looked up once
+    absolute: dict[str, bool] = {}
+    checked = 0
+    broken = []
+    for source, record in manifest.pages.items():
+        page = record.output[prefix:].replace(os.sep, '/')
+        checked += len(record.links)
+        for url, line in record.links.items():
+            exists = absolute.get(url)
+            if exists is None:
+                exists = target_exists(url_to_path(url, page), targets)
+                if url.startswith('/'):
+                    absolute[url] = exists
+            if not exists:
+                broken.append(BrokenLink(source, line, url))
+    return checked, broken
+
+
+def check_links(manifest: BuildManifest, dest_root: Path) -> list[BrokenLink]:
+    checked, broken = find_broken_links(manifest, dest_root)
+    for link in broken:
+        link.line = find_line(Path(link.source), link.url, link.line)
+        print(f'BROKEN-LINK: \'{link.source}:{link.line}\' -> \'{link.url}\'')
+    print(f'LINKS: {checked} internal links checked, {len(broken)} broken')
+    return broken
+
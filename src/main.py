@@ -1,21 +1,64 @@
-from generate import generate_public, generate_page_recursive
-import sys
-from pathlib import Path
+import time
+# taken before the other imports, every build reports how long its startup took
+STARTED = time.perf_counter()
+from build import BuildOptions, build_site  # noqa: E402
+from shard import Shard  # noqa: E402
+from pathlib import Path  # noqa: E402
+import argparse  # noqa: E402
+
+
+def parse_shard(text: str) -> Shard:
+    try:
+        return Shard.parse(text)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error)) from None
 
-def main():
-    base_path = '/'
-    if len(sys.argv) >= 2:
-        base_path = sys.argv[1]
 
-    public_folder = Path("docs")
-    static_folder = Path("static")
-    generate_public(public_folder, static_folder)
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate the static site from the markdown content.")
+    parser.add_argument('base_path', nargs='?', default='/', help="URL prefix for the generated links")
+    parser.add_argument('--clean', action='store_true', help="ignore the build manifest and rebuild every page")
+    parser.add_argument('--link-static', action='store_true', help="hardlink static files into the output instead of copying them")
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N', help="render pages with N worker processes")
+    parser.add_argument('--async-io', type=int, default=0, metavar='N',
+                        help="overlap reading, rendering and writing with up to N pages in flight, for slow disks")
+    parser.add_argument('--gzip', type=int, nargs='?', const=9, default=0, choices=range(0, 10), metavar='LEVEL',
+                        help="write a .gz sidecar next to every page and text asset, LEVEL 1-9 (default 9)")
+    parser.add_argument('--minify', action='store_true',
+                        help="write compact HTML without the whitespace and quotes the browser doesn't need")
+    parser.add_argument('--search', action='store_true',
+                        help="write a search index of the pages and its loader script to docs/search/")
+    parser.add_argument('--drafts', action='store_true', help="also render the pages marked as drafts in their front matter")
+    parser.add_argument('--page-index', action='store_true',
+                        help="write the title, front matter and URL of every page to docs/pages.json")
+    parser.add_argument('--fingerprint', action='store_true',
+                        help="write the static assets under content hashed names, like index.3f9a1c2b.css, "
+                             "so they can be cached for good")
+    parser.add_argument('--shard', type=parse_shard, metavar='i/N',
+                        help="build only shard i of N of the pages and static files to shards/i-of-N/, "
+                             "src/merge.py joins the shards into docs/")
+    parser.add_argument('--block-cache-mb', type=int, default=64, metavar='MB',
+                        help="size limit of the rendered block cache in .cache/, 0 turns it off")
+    parser.add_argument('--trace', type=Path, metavar='FILE', help="time every stage of every page and write a Chrome trace to FILE")
+    parser.add_argument('--trace-top', type=int, default=10, metavar='N', help="slowest pages listed after a traced build")
+    args = parser.parse_args()
+    if args.shard is not None and (args.search or args.page_index):
+        parser.error("--search and --page-index need every page, --page-index can be given to src/merge.py instead")
+    if args.jobs > 1 and args.async_io > 0:
+        parser.error("--jobs and --async-io are two ways to run the build, give one of them")
+    return args
 
-    templates_folder = "templates"
-    content_folder = Path("content")
-    print('Generating contents...')
-    generate_page_recursive(content_folder, templates_folder, public_folder, base_path)
+
+def main():
+    args = parse_args()
+    print(f'STARTUP: {(time.perf_counter() - STARTED) * 1000:.1f} ms to import the build')
+    options = BuildOptions(args.base_path, clean=args.clean, jobs=args.jobs, async_io=args.async_io,
+                           link_static=args.link_static, trace=args.trace, trace_top=args.trace_top,
+                           gzip_level=args.gzip, block_cache_bytes=args.block_cache_mb * 1024 * 1024,
+                           minify=args.minify, search=args.search, drafts=args.drafts,
+                           page_index=args.page_index, shard=args.shard, fingerprint=args.fingerprint)
+    build_site(options)
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,127 @@
+from __future__ import annotations
+import hashlib
+import json
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+
+# bump this when the layout or the rendered pages change so older manifests are ignored
+MANIFEST_VERSION = 13
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: Path) -> str:
+    return hash_bytes(path.read_bytes())
+
+
+@dataclass(slots=True)
+class PageRecord:
+    source_hash: str
+    output: str
+    # internal link and image URLs of the page -> line they're on, for the link check
+    links: dict[str, int] = field(default_factory=dict)
+    # front matter of the page with its title, for the page index
+    meta: dict[str, object] = field(default_factory=dict)
+    # site absolute static images of the page -> the width and height it was rendered with, None without
+    images: dict[str, list[int] | None] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class BuildManifest:
+    template_hash: str
+    base_path: str
+    pages: dict[str, PageRecord] = field(default_factory=dict)
+    # static output -> source, only needed to find the outputs of deleted assets,
+    # a fingerprinted asset is written under its own name and its fingerprinted one
+    static: dict[str, str] = field(default_factory=dict)
+    # output -> hash of the content its .gz sidecar was compressed from, and the level used
+    compressed: dict[str, str] = field(default_factory=dict)
+    gzip_level: int = 0
+    # whether the pages were written as compact HTML and indexed for search
+    compact: bool = False
+    search: bool = False
+    # outputs written by the build stages after the pages, like the search index
+    generated: list[str] = field(default_factory=list)
+    # static asset -> fingerprinted output path, relative to their folders, empty without --fingerprint
+    assets: dict[str, str] = field(default_factory=dict)
+    # 'i/N' for the manifest of a shard build and the output folder its paths start with, see merge.py
+    shard: str = ''
+    root: str = ''
+
+    def matches(self, other: BuildManifest) -> bool:
+        # a new template, base_path or output mode changes every page, so nothing can be reused,
+        # turning the search index on needs the text of every page, the pages link the assets by their hashes,
+        # the image sizes are checked page by page, see PageRecord.images
+        return (self.template_hash == other.template_hash and self.base_path == other.base_path
+                and self.compact == other.compact and self.search == other.search and self.assets == other.assets)
+
+    def is_fresh(self, source: Path, dest: Path, source_hash: str) -> bool:
+        record = self.pages.get(str(source))
+        if record is None:
+            return False
+        return record.source_hash == source_hash and record.output == str(dest) and dest.exists()
+
+    def add_page(self, source: Path, dest: Path, source_hash: str, links: dict[str, int] | None = None,
+                 meta: dict[str, object] | None = None, images: dict[str, list[int] | None] | None = None) -> None:
+        self.pages[str(source)] = PageRecord(source_hash, str(dest), links if links is not None else {},
+                                             meta if meta is not None else {}, images if images is not None else {})
+
+    def set_page_data(self, source: Path, links: dict[str, int], meta: dict[str, object],
+                      images: dict[str, list[int] | None]) -> None:
+        record = self.pages[str(source)]
+        record.links = links
+        record.meta = meta
+        record.images = images
+
+    def add_static(self, source: Path, dest: Path) -> None:
+        self.static[str(dest)] = str(source)
+
+    def outputs(self) -> list[str]:
+        sidecars = [f'{output}.gz' for output in self.compressed]
+        pages = [record.output for record in self.pages.values()]
+        return pages + list(self.static) + self.generated + sidecars
+
+    def stale_outputs(self, current: BuildManifest) -> list[Path]:
+        outputs = set(current.outputs())
+        return [Path(output) for output in self.outputs() if output not in outputs]
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "template_hash": self.template_hash,
+            "base_path": self.base_path,
+            "pages": self.pages,
+            "static": self.static,
+            "compressed": self.compressed,
+            "gzip_level": self.gzip_level,
+            "compact": self.compact,
+            "search": self.search,
+            "generated": self.generated,
+            "assets": self.assets,
+            "shard": self.shard,
+            "root": self.root
+        }
+        # write then rename so an interrupted build never leaves a half written manifest
+        tmp_path = path.with_suffix('.tmp')
+        with tmp_path.open('w') as fp:
+            # written as it's encoded, a record at a time, the manifest of a large site is never copied whole
+            json.dump(data, fp, indent=1, default=asdict)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> BuildManifest | None:
+        if not path.exists():
+            return None
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != MANIFEST_VERSION:
+            return None
+        pages = {source: PageRecord(**record) for source, record in data["pages"].items()}
+        return cls(data["template_hash"], data["base_path"], pages, data["static"], data["compressed"], data["gzip_level"],
+                   data["compact"], data["search"], data["generated"], data["assets"],
+                   data["shard"], data["root"])
@@ -1,5 +1,16 @@
+import io
 import re
-from htmlnode import HTMLNode, LeafNode, ParentNode, TextNode, TextType, BlockType
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from htmlnode import (HTMLNode, LeafNode, ParentNode, TextNode, TextType, Block, BlockType,
+                      DEFAULT_RESOLVER, UrlResolver)
+from arena import DocumentArena
+
+# the tag that wraps every block of a page
+DOCUMENT_TAG = 'div'
+# the markers a block starts with, compiled once for every line of every page
+HEADING_MARKER = re.compile(r'#{1,6} ')
+OLIST_MARKER = re.compile(r'(\d+)\. ')
 
 
 def split_nodes_delimiter(old_nodes: list[TextNode], delimiter: str, text_type: TextType) -> list[TextNode]:
@@ -85,89 +96,271 @@ def split_nodes_link(old_nodes: list[TextNode]) -> list[TextNode]:
     return new_nodes
 
 
+# images, links and the inline delimiters in one pattern, so the text is scanned once from left to right.
+# The image and link alternatives are the same patterns as extract_markdown_images() and extract_markdown_links(),
+# the leading lookahead lets the regex engine skip plain text without trying every alternative
+INLINE_PATTERN = re.compile(
+    r"(?=[!\[*_`])(?:"
+    r"!\[(?P<image_alt>[^\[\]]*)\]\((?P<image_url>[^\(\)]*)\)"
+    r"|(?<!!)\[(?P<link_text>[^\[\]]*)\]\((?P<link_url>[^\(\)]*)\)"
+    r"|(?P<delimiter>\*\*|_|`)"
+    r")"
+)
+# tags of the inline nodes that aren't links or images, same as TextNode.to_html_node()
+INLINE_TAGS = {TextType.TEXT: '', TextType.BOLD: 'b', TextType.ITALIC: 'i', TextType.CODE: 'code'}
+DELIMITER_TYPES = {'**': TextType.BOLD, '_': TextType.ITALIC, '`': TextType.CODE}
+# Lower ranks win, like the order the delimiters used to be split in.
+# A delimiter with a higher rank than the open one is literal text (`_` inside bold),
+# one with a lower rank would cut the open one in half (`**` inside italic) and is invalid.
+DELIMITER_RANKS = {'**': 0, '_': 1, '`': 2}
+
+
+def iter_inline(text: str) -> Iterator[tuple[TextType, int, int, str | None]]:
+    # Yields (text type, start, end, url) for every inline node of text, start:end is the
+    # slice of text the node shows (the alt text for images), url is None unless it's a link or image.
+    if not text:
+        yield TextType.TEXT, 0, 0, None
+        return
+
+    open_delimiter = None
+    start = 0
+    for match in INLINE_PATTERN.finditer(text):
+        kind = match.lastgroup
+        match_start, match_end = match.span()
+        if kind != 'delimiter':
+            # images and links can't be inside a delimiter
+            if open_delimiter:
+                raise SyntaxError("Invalid Markdown Syntax")
+            if start < match_start:
+                yield TextType.TEXT, start, match_start, None
+            if kind == 'image_url':
+                yield TextType.IMAGE, *match.span('image_alt'), match['image_url']
+            else:
+                yield TextType.LINK, *match.span('link_text'), match['link_url']
+            start = match_end
+            continue
+
+        delimiter = match['delimiter']
+        if open_delimiter is None:
+            if start < match_start:
+                yield TextType.TEXT, start, match_start, None
+            open_delimiter = delimiter
+            start = match_end
+        elif delimiter == open_delimiter:
+            if start < match_start:
+                yield DELIMITER_TYPES[delimiter], start, match_start, None
+            open_delimiter = None
+            start = match_end
+        elif DELIMITER_RANKS[delimiter] < DELIMITER_RANKS[open_delimiter]:
+            raise SyntaxError("Invalid Markdown Syntax")
+
+    if open_delimiter:
+        raise SyntaxError("Invalid Markdown Syntax")
+    if start < len(text):
+        yield TextType.TEXT, start, len(text), None
+
+
 def text_to_textnodes(text: str) -> list[TextNode]:
-    new_nodes = [TextNode(text, TextType.TEXT)]
-    new_nodes = split_nodes_image(new_nodes)
-    new_nodes = split_nodes_link(new_nodes)
-    new_nodes = split_nodes_delimiter(new_nodes, '**', TextType.BOLD)
-    new_nodes = split_nodes_delimiter(new_nodes, '_', TextType.ITALIC)
-    new_nodes = split_nodes_delimiter(new_nodes, '`', TextType.CODE)
+    return [TextNode(text[start:end], text_type, url) for text_type, start, end, url in iter_inline(text)]
 
-    return new_nodes
 
+@dataclass(slots=True)
+class BlockBuilder:
+    lines: list[str] = field(default_factory=list)
+    # whitespace only lines, they are only part of the block if more text follows them
+    held: list[str] = field(default_factory=list)
+    line: int = 1
+    fence_open: bool = False
 
-def markdown_to_blocks(markdown: str) -> list[str]:
-    return [block.strip() for block in markdown.split("\n\n") if block.strip()]
+    def add(self, line: str, number: int = 1) -> None:
+        lines = self.lines
+        if not line or line.isspace():
+            if lines:
+                self.held.append(line)
+            return
+        if not lines:
+            # same as the strip() of the old "\n\n" split
+            line = line.lstrip()
+            self.line = number
+            self.fence_open = line.startswith('```') and not (len(line) >= 6 and line.rstrip().endswith('```'))
+        elif self.fence_open and line.rstrip().endswith('```'):
+            self.fence_open = False
+        if self.held:
+            lines.extend(self.held)
+            self.held.clear()
+        lines.append(line)
 
-        
-def block_to_block_type(markdown: str) -> BlockType:
-    if re.match(r'^#{1,6} ', markdown):
+    def build(self) -> Block:
+        text = '\n'.join(self.lines).rstrip()
+        return Block(text, classify_block(text), self.line)
+
+
+def classify_block(text: str) -> BlockType:
+    # Every line of a quote or a list starts with its marker, so the line breaks followed by the
+    # marker are as many as the line breaks: str.count() checks all the lines without splitting them.
+    if HEADING_MARKER.match(text):
         return BlockType.HEADING
-    
-    if markdown.startswith('```') and markdown.endswith('```'):
+    if text.startswith('```') and text.endswith('```'):
         return BlockType.CODE
-    
-    lines = markdown.splitlines()
-
-    if all(line.startswith('>') for line in lines):
+    breaks = text.count('\n')
+    if text.startswith('>') and text.count('\n>') == breaks:
         return BlockType.QUOTE
-    
-    if all(line.startswith('- ') for line in lines):
+    if text.startswith('- ') and text.count('\n- ') == breaks:
         return BlockType.ULIST
-    
-    if markdown.startswith('1. '):
-        matches = [re.match(r"^(\d+)\. ", line) for line in lines]
-        if [int(m.group(1)) for m in matches if m] == [n for n in range(1, len(lines) + 1)]:
-            return BlockType.OLIST
-        
+    if text.startswith('1. ') and is_numbered(text):
+        return BlockType.OLIST
     return BlockType.PARAGRAPH
 
 
-def text_to_children(text: str) -> list[LeafNode]:
-    return [textnode.to_html_node() for textnode in text_to_textnodes(text)]
+def is_numbered(text: str) -> bool:
+    # '1. ', '2. ', ... in order, only the blocks starting like an ordered list get here
+    for number, line in enumerate(text.split('\n'), 1):
+        match = OLIST_MARKER.match(line)
+        if match is None or int(match.group(1)) != number:
+            return False
+    return True
+
+
+def parse_blocks(lines: Iterable[str], start: int = 1) -> Iterator[Block]:
+    # Reads the lines once and yields every block as soon as it ends,
+    # so only the current block is ever held in memory.
+    # Blank lines end a block unless they're inside a fenced code block.
+    # start is the number of the first line, the lines of a page's front matter aren't blocks.
+    builder = BlockBuilder()
+    for number, line in enumerate(lines, start):
+        line = line.rstrip('\n')
+        if not line and not builder.fence_open:
+            if builder.lines:
+                yield builder.build()
+                builder = BlockBuilder()
+            continue
+        builder.add(line, number)
+    if builder.lines:
+        yield builder.build()
+
+
+def markdown_to_blocks(markdown: str) -> list[str]:
+    return [block.text for block in parse_blocks(io.StringIO(markdown))]
+
+        
+def block_to_block_type(markdown: str) -> BlockType:
+    builder = BlockBuilder()
+    for line in markdown.split('\n'):
+        builder.add(line)
+    return builder.build().block_type
 
 
-def text_list_to_children(text: str) -> list[LeafNode]:
-    return [ParentNode('li', text_to_children(li_text)) for li_text in text.splitlines()]
+def text_to_children(text: str, resolver: UrlResolver = DEFAULT_RESOLVER) -> list[LeafNode]:
+    return [textnode.to_html_node(resolver) for textnode in text_to_textnodes(text)]
 
 
-def block_to_html_node(block: str, block_type: BlockType) -> ParentNode:
+def list_items_to_children(items: list[str], resolver: UrlResolver = DEFAULT_RESOLVER) -> list[ParentNode]:
+    return [ParentNode('li', text_to_children(li_text, resolver)) for li_text in items]
+
+
+def block_to_tag_and_content(block: str, block_type: BlockType) -> tuple[str, str | list[str]]:
+    # The tag of the block and its text without the markdown syntax, the items of a list.
+    # parse_blocks already checked every line's marker, so they're sliced off without another regex pass.
     match block_type:
         case BlockType.HEADING:
-            level = block[:6].count('#')
-            text = re.sub(rf"^{'#' * level} ", '', block)
-            return ParentNode(f'h{level}', text_to_children(text))
+            marker = HEADING_MARKER.match(block).end()
+            return f'h{marker - 1}', block[marker:]
         case BlockType.CODE:
             text = block.replace('```', '')
             if text.startswith('\n'):
                 text = text[1:]
-            children = [LeafNode('code', text)]
-            return ParentNode('pre', children)
+            return 'pre', text
         case BlockType.QUOTE:
-            text = re.sub(r"^>\s*", '', block, flags=re.MULTILINE).strip()
-            return ParentNode('blockquote', text_to_children(text))
+            # a line with nothing after its '>' is dropped with its line break
+            lines = [line[1:].lstrip() for line in block.split('\n')]
+            return 'blockquote', '\n'.join([line for line in lines if line]).strip()
         case BlockType.ULIST:
-            text = re.sub(r"^- ", '', block, flags=re.MULTILINE)
-            return ParentNode('ul', text_list_to_children(text))
+            return 'ul', [line[2:] for line in block.split('\n')]
         case BlockType.OLIST:
-            text = re.sub(r"^\d+\. ", '', block, flags=re.MULTILINE)
-            return ParentNode('ol', text_list_to_children(text))
+            return 'ol', [line[line.index('. ') + 2:] for line in block.split('\n')]
         case BlockType.PARAGRAPH:
-            text = block.replace('\n', ' ')
-            return ParentNode('p', text_to_children(text))
-        
+            return 'p', block.replace('\n', ' ')
+
         case _:
             raise TypeError('Invalid Block Type')
 
 
-def markdown_to_html_node(markdown: str) -> HTMLNode:
-    children = []
-    blocks = markdown_to_blocks(markdown)
+def block_to_html_node(block: str, block_type: BlockType, resolver: UrlResolver = DEFAULT_RESOLVER) -> ParentNode:
+    tag, content = block_to_tag_and_content(block, block_type)
+    match block_type:
+        case BlockType.CODE:
+            return ParentNode(tag, [LeafNode('code', content)])
+        case BlockType.ULIST | BlockType.OLIST:
+            return ParentNode(tag, list_items_to_children(content, resolver))
+        case _:
+            return ParentNode(tag, text_to_children(content, resolver))
+
+
+def blocks_to_html_node(blocks: Iterable[Block], resolver: UrlResolver = DEFAULT_RESOLVER) -> HTMLNode:
+    children = [block_to_html_node(block.text, block.block_type, resolver) for block in blocks]
+    return ParentNode(DOCUMENT_TAG, children)
+
+
+def markdown_to_html_node(markdown: str, resolver: UrlResolver = DEFAULT_RESOLVER) -> HTMLNode:
+    return blocks_to_html_node(parse_blocks(io.StringIO(markdown)), resolver)
+
+
+def iter_block_urls(block: str, block_type: BlockType) -> Iterator[tuple[TextType, str]]:
+    # the link and image URLs of a block, in the order block_to_arena resolves them
+    if block_type == BlockType.CODE or '](' not in block:
+        return
+    _, content = block_to_tag_and_content(block, block_type)
+    for line in content if isinstance(content, list) else [content]:
+        for text_type, _, _, url in iter_inline(line):
+            if url is not None:
+                yield text_type, url
+
+
+def text_to_arena(arena: DocumentArena, text: str, resolver: UrlResolver = DEFAULT_RESOLVER) -> None:
+    # the inline nodes point into text instead of holding copies of it
+    offset = arena.add_text(text)
+    for text_type, start, end, url in iter_inline(text):
+        match text_type:
+            case TextType.LINK:
+                arena.leaf('a', offset + start, offset + end, {"href": resolver.resolve(url)})
+            case TextType.IMAGE:
+                arena.leaf('img', offset, offset, {"src": resolver.resolve(url), "alt": text[start:end],
+                                                   **resolver.image_props(url)})
+            case _:
+                arena.leaf(INLINE_TAGS[text_type], offset + start, offset + end)
+
+
+def block_to_arena(arena: DocumentArena, block: str, block_type: BlockType,
+                   resolver: UrlResolver = DEFAULT_RESOLVER) -> None:
+    tag, content = block_to_tag_and_content(block, block_type)
+    index = arena.open(tag)
+    match block_type:
+        case BlockType.CODE:
+            offset = arena.add_text(content)
+            arena.leaf('code', offset, offset + len(content))
+        case BlockType.ULIST | BlockType.OLIST:
+            for li_text in content:
+                item = arena.open('li')
+                text_to_arena(arena, li_text, resolver)
+                arena.close(item)
+        case _:
+            text_to_arena(arena, content, resolver)
+    arena.close(index)
+
+
+def blocks_to_arena(blocks: Iterable[Block], resolver: UrlResolver = DEFAULT_RESOLVER) -> DocumentArena:
+    # same tree as blocks_to_html_node, built straight into a DocumentArena
+    arena = DocumentArena()
+    root = arena.open(DOCUMENT_TAG)
     for block in blocks:
-        block_type = block_to_block_type(block)
-        children.append(block_to_html_node(block, block_type))
+        block_to_arena(arena, block.text, block.block_type, resolver)
+    arena.close(root)
+    arena.pack()
+    return arena
+
 
-    return ParentNode('div', children)
+def markdown_to_arena(markdown: str, resolver: UrlResolver = DEFAULT_RESOLVER) -> DocumentArena:
+    return blocks_to_arena(parse_blocks(io.StringIO(markdown)), resolver)
 
 
 def extract_title(markdown: str):
@@ -0,0 +1,136 @@
+from pathlib import Path
+import argparse
+import shutil
+from build import MANIFEST_PATH, PUBLIC_FOLDER
+from generate import copy_static_files, remove_stale_outputs
+from links import check_links
+from manifest import BuildManifest, PageRecord
+from metadata import write_page_index
+from shard import SHARD_MANIFEST_NAME, SHARD_PUBLIC_NAME, SHARDS_FOLDER, Shard
+
+
+def load_shards(folders: list[Path]) -> list[tuple[Path, BuildManifest]]:
+    if not folders:
+        raise ValueError(f'No shards to merge, build them with --shard i/N to \'{SHARDS_FOLDER}/\' first.')
+    shards = []
+    for folder in folders:
+        manifest = BuildManifest.load(folder / SHARD_MANIFEST_NAME)
+        if manifest is None or not manifest.shard:
+            raise ValueError(f'No shard manifest in \'{folder}\', build the shard with --shard i/N first.')
+        shards.append((folder, manifest))
+    return shards
+
+
+def shard_outputs(manifest: BuildManifest) -> dict[str, str]:
+    # every output of a shard, relative to its output folder -> the source that made it
+    def relative(output: str) -> str:
+        return Path(output).relative_to(manifest.root).as_posix()
+
+    outputs = {relative(record.output): source for source, record in manifest.pages.items()}
+    outputs.update((relative(output), source) for output, source in manifest.static.items())
+    outputs.update((relative(output), 'generated') for output in manifest.generated)
+    outputs.update((relative(output) + '.gz', output) for output in manifest.compressed)
+    return outputs
+
+
+def build_settings(manifest: BuildManifest) -> tuple:
+    # the shards have to come from the same template and options or their pages don't fit together
+    return manifest.template_hash, manifest.base_path, manifest.compact, manifest.gzip_level, manifest.assets
+
+
+def find_conflicts(shards: list[tuple[Path, BuildManifest]]) -> list[str]:
+    parsed = [Shard.parse(manifest.shard) for _, manifest in shards]
+    count = parsed[0].count
+    if any(shard.count != count for shard in parsed):
+        # shards of two different builds, every other check would only repeat that
+        return [f'the shards split the site in different counts: {", ".join(map(str, parsed))}']
+    conflicts = []
+    indexes = [shard.index for shard in parsed]
+    for index in range(1, count + 1):
+        if indexes.count(index) != 1:
+            conflicts.append(f'shard {index}/{count} is {"missing" if index not in indexes else "given twice"}')
+    first = shards[0][1]
+    outputs: dict[str, tuple[str, str]] = {}
+    sources: dict[str, str] = {}
+    for _, manifest in shards:
+        if build_settings(manifest) != build_settings(first):
+            conflicts.append(f'shard {manifest.shard} was built with another template or options than '
+                             f'shard {first.shard}')
+        for source in manifest.pages:
+            if source in sources:
+                conflicts.append(f'\'{source}\' is built by shard {sources[source]} and shard {manifest.shard}')
+            sources[source] = manifest.shard
+        for output, source in shard_outputs(manifest).items():
+            if output in outputs:
+                other_shard, other_source = outputs[output]
+                conflicts.append(f'\'{output}\' is written from \'{other_source}\' by shard {other_shard} '
+                                 f'and from \'{source}\' by shard {manifest.shard}')
+            outputs[output] = (manifest.shard, source)
+    return conflicts
+
+
+def merge_manifest(merged: BuildManifest, manifest: BuildManifest, dest_root: Path) -> None:
+    # the shard's outputs as they are once copied to dest_root
+    def moved(output: str) -> str:
+        return str(dest_root / Path(output).relative_to(manifest.root))
+
+    for source, record in manifest.pages.items():
+        merged.pages[source] = PageRecord(record.source_hash, moved(record.output), record.links, record.meta,
+                                          record.images)
+    merged.static.update((moved(output), source) for output, source in manifest.static.items())
+    merged.compressed.update((moved(output), content_hash) for output, content_hash in manifest.compressed.items())
+    merged.generated.extend(moved(output) for output in manifest.generated)
+
+
+def merge_shards(folders: list[Path], dest_root: Path = PUBLIC_FOLDER, manifest_path: Path = MANIFEST_PATH,
+                 link: bool = False, page_index: bool = False) -> BuildManifest:
+    # Joins the outputs of the shard builds into dest_root and their manifests into the one a full build
+    # would have written, so the next build without --shard only renders what changed since.
+    shards = load_shards(folders)
+    conflicts = find_conflicts(shards)
+    if conflicts:
+        for conflict in conflicts:
+            print(f'CONFLICT: {conflict}')
+        raise ValueError(f'{len(conflicts)} conflicts between the {len(shards)} shards, nothing was merged.')
+    first = shards[0][1]
+    merged = BuildManifest(first.template_hash, first.base_path, gzip_level=first.gzip_level, compact=first.compact,
+                           assets=first.assets)
+    previous = BuildManifest.load(manifest_path)
+    if previous is None and dest_root.exists():
+        # like a build without a manifest, the output folder can't be trusted
+        shutil.rmtree(dest_root)
+    for folder, manifest in shards:
+        print(f'MERGE: shard {manifest.shard} \'{folder}\' -> \'{dest_root}\'')
+        copy_static_files(folder / SHARD_PUBLIC_NAME, dest_root, link)
+        merge_manifest(merged, manifest, dest_root)
+    if page_index:
+        merged.generated.append(str(write_page_index(merged, dest_root)))
+    # the shards couldn't check the links into each other
+    check_links(merged, dest_root)
+    if previous is not None:
+        remove_stale_outputs(previous, merged, dest_root)
+    merged.save(manifest_path)
+    return merged
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Merge the outputs of the --shard builds into one site.")
+    parser.add_argument('folders', nargs='*', type=Path,
+                        help=f"shard folders to merge, every one in '{SHARDS_FOLDER}/' by default")
+    parser.add_argument('--link', action='store_true', help="hardlink the shard outputs instead of copying them")
+    parser.add_argument('--page-index', action='store_true',
+                        help="write the title, front matter and URL of every page to docs/pages.json")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    folders = args.folders or sorted(path for path in SHARDS_FOLDER.glob('*-of-*') if path.is_dir())
+    try:
+        merge_shards(folders, link=args.link, page_index=args.page_index)
+    except ValueError as error:
+        raise SystemExit(f'MERGE: {error}') from None
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+import datetime
+import json
+import re
+import tomllib
+from collections.abc import Iterator
+from pathlib import Path
+from manifest import BuildManifest
+
+# the line a page's front matter starts and ends with, '---' for the YAML like one, '+++' for TOML
+YAML_FENCE = '---'
+TOML_FENCE = '+++'
+PAGE_INDEX_NAME = 'pages.json'
+YAML_KEY = re.compile(r'([A-Za-z_][\w-]*)\s*:(?:\s+(.*))?$')
+NUMBER = re.compile(r'-?\d+(\.\d+)?')
+
+
+def parse_value(text: str) -> object:
+    # the scalars of the YAML subset, anything else is kept as a string
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in '\'"':
+        return text[1:-1]
+    if text.startswith('[') and text.endswith(']'):
+        return [parse_value(item) for item in text[1:-1].split(',') if item.strip()]
+    lowered = text.lower()
+    if lowered in ('true', 'yes'):
+        return True
+    if lowered in ('false', 'no'):
+        return False
+    if NUMBER.fullmatch(text):
+        return float(text) if '.' in text else int(text)
+    return text
+
+
+def parse_yaml(text: str) -> dict[str, object]:
+    # 'key: value' lines, '[a, b]' lists and '- item' lines under an empty 'key:', no nesting
+    data: dict[str, object] = {}
+    key = None
+    for number, line in enumerate(text.splitlines(), 2):
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            continue
+        if stripped.startswith('- ') and isinstance(data.get(key), list):
+            data[key].append(parse_value(stripped[2:]))
+            continue
+        match = YAML_KEY.match(stripped)
+        if match is None:
+            raise ValueError(f'Invalid front matter on line {number}: {line!r}')
+        key, value = match.groups()
+        data[key] = parse_value(value) if value else []
+    return data
+
+
+def parse_toml(text: str) -> dict[str, object]:
+    try:
+        data = tomllib.loads(text)
+    except tomllib.TOMLDecodeError as error:
+        raise ValueError(f'Invalid front matter: {error}') from None
+    return to_json(data)
+
+
+def to_json(value: object) -> object:
+    # TOML dates become the same ISO strings a YAML date is, the metadata is kept in JSON
+    if isinstance(value, dict):
+        return {key: to_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [to_json(item) for item in value]
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+def read_header(lines: Iterator[str]) -> tuple[dict[str, object], str, int]:
+    # Reads the front matter, if the page has one, and the first line of the markdown after it.
+    # Returns the metadata, that line and its number, the rest of the lines aren't touched.
+    first_line = next(lines, '')
+    fence = first_line.rstrip()
+    if fence not in (YAML_FENCE, TOML_FENCE):
+        return {}, first_line, 1
+    header = []
+    number = 1
+    for line in lines:
+        number += 1
+        if line.rstrip() == fence:
+            break
+        header.append(line)
+    else:
+        raise ValueError(f'Front matter opened with {fence!r} is never closed.')
+    text = ''.join(header)
+    meta = parse_yaml(text) if fence == YAML_FENCE else parse_toml(text)
+    # the title line usually follows a blank line
+    for line in lines:
+        number += 1
+        if line.strip():
+            return meta, line, number
+    return meta, '', number + 1
+
+
+def read_front_matter(path: Path) -> dict[str, object]:
+    # stops after the header, the body of the page is never read
+    with path.open() as fp:
+        return read_header(fp)[0]
+
+
+def is_draft(meta: dict[str, object]) -> bool:
+    return meta.get('draft') is True
+
+
+def page_url(dest: Path, dest_root: Path, base_path: str) -> str:
+    # pages are linked the way the site links them, '/blog/tom/' for blog/tom/index.html
+    url = dest.relative_to(dest_root).as_posix()
+    if url == 'index.html' or url.endswith('/index.html'):
+        url = url[:-len('index.html')]
+    return f'{base_path}{url}'
+
+
+def write_page_index(manifest: BuildManifest, dest_root: Path) -> Path:
+    # the metadata of every page, newest first, the manifest has it for the pages that weren't rendered again
+    entries = [{"url": page_url(Path(record.output), dest_root, manifest.base_path), **record.meta}
+               for record in manifest.pages.values()]
+    entries.sort(key=lambda entry: entry["url"])
+    entries.sort(key=lambda entry: str(entry.get("date", '')), reverse=True)
+    path = dest_root / PAGE_INDEX_NAME
+    path.write_text(json.dumps(entries, ensure_ascii=False, indent=1), encoding='utf-8')
+    print(f'PAGE-INDEX: {len(entries)} pages -> \'{path}\'')
+    return path
@@ -0,0 +1,120 @@
+import re
+from htmlnode import PRESERVE_TAGS, UNQUOTED_VALUE, compact_text
+from page_template import PageTemplate, SimpleTemplate
+
+# whitespace next to these is never shown, so it's dropped between them and any other tag
+BLOCK_TAGS = frozenset((
+    '!doctype', 'html', 'head', 'body', 'title', 'meta', 'link', 'base', 'script', 'style', 'noscript',
+    'template', 'article', 'aside', 'section', 'nav', 'header', 'footer', 'main', 'div', 'p', 'h1', 'h2',
+    'h3', 'h4', 'h5', 'h6', 'ul', 'ol', 'li', 'dl', 'dt', 'dd', 'table', 'thead', 'tbody', 'tfoot', 'tr',
+    'th', 'td', 'caption', 'blockquote', 'pre', 'figure', 'figcaption', 'form', 'fieldset', 'hr', 'br',
+    'address', 'details', 'summary',
+))
+TAG_NAME = re.compile(r'</?([^\s/>]+)')
+# a whole double quoted attribute value, one right before a '/' keeps its quotes or the '/' would join the value
+QUOTED_ATTRIBUTE = re.compile(r'(\s[^\s"\'=<>/]+=)"([^"]*)"(?!/)')
+# bump when the compacted templates change, a compact template compiled before goes to another cache folder
+COMPACT_VERSION = 2
+
+
+def _unquote(match: re.Match) -> str:
+    return f'{match.group(1)}{match.group(2)}' if UNQUOTED_VALUE.fullmatch(match.group(2)) else match.group(0)
+
+
+def unquote_attributes(piece: str, in_value: bool) -> str:
+    # only the values written out in the piece, one a variable ends or starts is left quoted
+    start = 0
+    if in_value:
+        start = piece.find('"') + 1
+        if start == 0:
+            return piece
+    return piece[:start] + QUOTED_ATTRIBUTE.sub(_unquote, piece[start:])
+
+
+class MarkupCompactor:
+    # Compacts the literal HTML of a template one piece at a time, the pieces are
+    # the text between the template's {{ }} and {% %} tags. Tags keep their layout, even
+    # when a variable splits them, only the quotes of their literal attribute values that
+    # don't need them are dropped, and the text inside pre, textarea, ... is kept.
+    def __init__(self) -> None:
+        self.tag: str | None = None
+        self.last_tag: str | None = None
+        self.preserved: str | None = None
+
+    def interrupt(self) -> None:
+        # a variable or statement came between the pieces, the whitespace next to it may be shown
+        self.last_tag = None
+
+    def feed(self, data: str) -> str:
+        out = []
+        pos = 0
+        while pos < len(data):
+            if self.tag is not None:
+                end = data.find('>', pos)
+                stop = len(data) if end == -1 else end + 1
+                piece = data[pos:stop]
+                # nothing inside script or style is a tag, comments and the doctype are left alone too
+                if self.preserved is None and not (self.tag + piece).startswith('<!'):
+                    piece = unquote_attributes(piece, self.tag.count('"') % 2 == 1)
+                self.tag += piece
+                out.append(piece)
+                pos = stop
+                if end != -1:
+                    self._close_tag()
+                continue
+            start = data.find('<', pos)
+            stop = len(data) if start == -1 else start
+            out.append(self._text(data[pos:stop], data, stop))
+            self.last_tag = None
+            if start != -1:
+                self.tag = ''
+            pos = stop
+        return ''.join(out)
+
+    def _text(self, text: str, data: str, stop: int) -> str:
+        if self.preserved is not None or not text:
+            return text
+        if not text.isspace():
+            return compact_text(text)
+        next_tag = TAG_NAME.match(data, stop)
+        if self.last_tag is not None and next_tag is not None:
+            if self.last_tag in BLOCK_TAGS or next_tag.group(1).lower() in BLOCK_TAGS:
+                return ''
+        return ' '
+
+    def _close_tag(self) -> None:
+        match = TAG_NAME.match(self.tag)
+        name = match.group(1).lower() if match else ''
+        if self.preserved is None and name in PRESERVE_TAGS and not self.tag.endswith('/>'):
+            self.preserved = name
+        elif self.tag.startswith('</') and name == self.preserved:
+            self.preserved = None
+        self.last_tag = name
+        self.tag = None
+
+
+def compact_template(template: SimpleTemplate) -> None:
+    # the same pieces the Jinja extension is fed, with a variable between each two
+    compactor = MarkupCompactor()
+    literals = []
+    for literal in template.literals:
+        literals.append(compactor.feed(literal))
+        compactor.interrupt()
+    template.saved = sum(map(len, template.literals)) - sum(map(len, literals))
+    template.literals = literals
+    template.compact = True
+
+
+def is_compact(template: PageTemplate) -> bool:
+    if isinstance(template, SimpleTemplate):
+        return template.compact
+    # a Jinja template, Jinja is imported already
+    from jinja_template import is_compact as jinja_is_compact
+    return jinja_is_compact(template)
+
+
+def compact_savings(template: PageTemplate) -> int:
+    if isinstance(template, SimpleTemplate):
+        return template.saved
+    from jinja_template import compact_savings as jinja_compact_savings
+    return jinja_compact_savings(template)
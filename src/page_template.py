@@ -0,0 +1,67 @@
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from jinja2 import Template
+
+# a template made of nothing but {{ name }} and {{ name('text') }} tags is rendered without Jinja, see SimpleTemplate
+VARIABLE_TAG = re.compile(r'''\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*(?:\(\s*(?:'([^'\\]*)'|"([^"\\]*)")\s*\)\s*)?\}\}''')
+# anything else Jinja would parse, these need the real thing
+JINJA_SYNTAX = ('{{', '{%', '{#')
+# names Jinja reads as constants, operators or its default globals, not as the page's variables
+JINJA_NAMES = frozenset(('true', 'false', 'none', 'True', 'False', 'None', 'and', 'or', 'not', 'in', 'is',
+                         'if', 'else', 'range', 'dict', 'lipsum', 'cycler', 'joiner', 'namespace'))
+NEWLINES = re.compile(r'\r\n|\r')
+
+
+@dataclass(slots=True, eq=False)
+class SimpleTemplate:
+    # Renders a template the way Jinja renders it when the template only prints variables: the literal
+    # text between the tags is split out once and every page joins it with the values. Importing and
+    # compiling Jinja takes longer than the whole build of a small site, so it's left out when it can be.
+    filename: str
+    # one more literal than names, literals[i] comes before names[i],
+    # args[i] is the text names[i] is called with, None when it's only printed
+    literals: list[str]
+    names: list[str]
+    args: list[str | None]
+    # whether the literals were compacted, see minify.py, and the characters left out of every page
+    compact: bool = False
+    saved: int = 0
+
+    @classmethod
+    def parse(cls, source: str, filename: str) -> 'SimpleTemplate | None':
+        # None when the template uses anything but {{ name }}, Jinja renders it then
+        # the same newline handling as Jinja's lexer: '\n' everywhere and no final newline
+        source = NEWLINES.sub('\n', source)
+        if source.endswith('\n'):
+            source = source[:-1]
+        parts = VARIABLE_TAG.split(source)
+        literals = parts[::4]
+        names = parts[1::4]
+        args = [single if single is not None else double for single, double in zip(parts[2::4], parts[3::4])]
+        if any(syntax in literal for literal in literals for syntax in JINJA_SYNTAX):
+            return None
+        if any(name in JINJA_NAMES for name in names):
+            return None
+        return cls(filename, literals, names, args)
+
+    def render(self, *args, **kwargs) -> str:
+        # same call as Template.render(), an undefined variable prints nothing like Jinja's Undefined
+        data = dict(*args, **kwargs)
+        out = [self.literals[0]]
+        for name, arg, literal in zip(self.names, self.args, self.literals[1:]):
+            if name in data:
+                out.append(str(data[name] if arg is None else data[name](arg)))
+            elif arg is not None:
+                # Jinja can't call an undefined variable either
+                raise ValueError(f'{self.filename}: \'{name}\' is undefined')
+            out.append(literal)
+        return ''.join(out)
+
+    def streams_content(self) -> bool:
+        return self.names.count('content') == 1
+
+
+type PageTemplate = SimpleTemplate | Template
@@ -0,0 +1,188 @@
+import json
+import re
+import shutil
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from metadata import page_url
+
+# bump this when the cache or the shards change layout, an older index is then built again from scratch
+SEARCH_VERSION = 1
+# the terms are sharded by their first PREFIX_LENGTH characters, a query only loads the shards of its terms
+PREFIX_LENGTH = 2
+TERM = re.compile(r'\w{2,}')
+SEARCH_FOLDER = 'search'
+INDEX_NAME = 'index.json'
+LOADER_NAME = 'search.js'
+# window.searchSite(query) resolves to the pages having every term of the query as a word or a word prefix,
+# best matches first. index.json is fetched on the first search, a shard the first time a term needs it.
+LOADER_JS = """(() => {
+  const base = new URL('.', document.currentScript.src);
+  const loaded = new Map();
+  const load = (name) => {
+    if (!loaded.has(name)) {
+      loaded.set(name, fetch(new URL(name, base)).then((response) => (response.ok ? response.json() : {})));
+    }
+    return loaded.get(name);
+  };
+
+  window.searchSite = async (query) => {
+    const index = await load('index.json');
+    const terms = query.toLowerCase().match(/[\\p{L}\\p{N}_]{2,}/gu) || [];
+    let scores = null;
+    for (const term of terms) {
+      const prefix = term.slice(0, index.prefix);
+      const shard = index.shards.includes(prefix) ? await load(`${encodeURIComponent(prefix)}.json`) : {};
+      const hits = new Map();
+      for (const [word, postings] of Object.entries(shard)) {
+        if (!word.startsWith(term)) continue;
+        for (const [doc, count] of postings) hits.set(doc, (hits.get(doc) || 0) + count);
+      }
+      scores = scores === null ? hits : new Map([...scores].filter(([doc]) => hits.has(doc))
+        .map(([doc, score]) => [doc, score + hits.get(doc)]));
+    }
+    return [...(scores || [])].sort((a, b) => b[1] - a[1])
+      .map(([doc, score]) => ({ url: index.docs[doc][0], title: index.docs[doc][1], score }));
+  };
+})();
+"""
+
+
+def tokenize(text: str) -> list[str]:
+    return TERM.findall(text.lower())
+
+
+@dataclass(slots=True)
+class SearchPage:
+    id: int
+    url: str
+    title: str
+    # the distinct terms of the page, the shards hold how often each one is used
+    terms: list[str]
+
+
+@dataclass(slots=True)
+class SearchIndex:
+    # Inverted index of the site's text, written as term -> [[page id, count], ...] shards.
+    # The terms of every page are kept in the cache, so a build only patches the shards
+    # the rendered and removed pages had or have terms in, the other shards aren't touched.
+    dest_root: Path
+    base_path: str = '/'
+    pages: dict[str, SearchPage] = field(default_factory=dict)
+    # page id -> terms it had before this build, and its terms and counts now
+    old_terms: dict[int, set[str]] = field(default_factory=dict)
+    new_terms: dict[int, Counter] = field(default_factory=dict)
+    # ids left by removed pages, taken again before new ones
+    free_ids: list[int] = field(default_factory=list)
+    next_id: int = 0
+
+    @property
+    def dest_dir(self) -> Path:
+        return self.dest_root / SEARCH_FOLDER
+
+    @classmethod
+    def create(cls, dest_root: Path, base_path: str = '/') -> 'SearchIndex':
+        # shards left by an older index would be patched as if they were current
+        shutil.rmtree(dest_root / SEARCH_FOLDER, ignore_errors=True)
+        return cls(dest_root, base_path)
+
+    @classmethod
+    def load(cls, path: Path, dest_root: Path, base_path: str = '/') -> 'SearchIndex | None':
+        # None when the cache or the written index is missing or out of date, the index is then built again
+        if not path.exists() or not (dest_root / SEARCH_FOLDER / INDEX_NAME).exists():
+            return None
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != SEARCH_VERSION or data.get("prefix") != PREFIX_LENGTH:
+            return None
+        pages = {source: SearchPage(*page) for source, page in data["pages"].items()}
+        used = {page.id for page in pages.values()}
+        next_id = max(used, default=-1) + 1
+        free_ids = sorted(set(range(next_id)) - used, reverse=True)
+        return cls(dest_root, base_path, pages, free_ids=free_ids, next_id=next_id)
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": SEARCH_VERSION,
+            "prefix": PREFIX_LENGTH,
+            "pages": {source: [page.id, page.url, page.title, page.terms] for source, page in self.pages.items()}
+        }
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(data, separators=(',', ':')))
+        tmp_path.replace(path)
+
+    def add_page(self, source: Path, dest: Path, title: str, terms: Counter) -> None:
+        old = self.pages.get(str(source))
+        if old is not None:
+            page_id = old.id
+        elif self.free_ids:
+            page_id = self.free_ids.pop()
+        else:
+            page_id = self.next_id
+            self.next_id += 1
+        self.old_terms.setdefault(page_id, set(old.terms) if old is not None else set())
+        self.new_terms[page_id] = terms
+        self.pages[str(source)] = SearchPage(page_id, page_url(dest, self.dest_root, self.base_path), title,
+                                               sorted(terms))
+
+    def remove_missing(self, sources: set[str] | dict) -> None:
+        for source in [source for source in self.pages if source not in sources]:
+            old = self.pages.pop(source)
+            self.old_terms.setdefault(old.id, set(old.terms))
+            self.new_terms[old.id] = Counter()
+            self.free_ids.append(old.id)
+
+    def write(self) -> list[Path]:
+        # patches the shards of the changed pages and returns every file of the index
+        self.dest_dir.mkdir(parents=True, exist_ok=True)
+        added: dict[str, dict[str, list[list[int]]]] = defaultdict(lambda: defaultdict(list))
+        dirty = {term[:PREFIX_LENGTH] for terms in self.old_terms.values() for term in terms}
+        for page_id, terms in self.new_terms.items():
+            for term, count in terms.items():
+                added[term[:PREFIX_LENGTH]][term].append([page_id, count])
+        dirty.update(added)
+        changed = set(self.new_terms)
+        written = sum(self._write_shard(prefix, changed, added.get(prefix, {})) for prefix in dirty)
+        print(f'SEARCH: {len(changed)} pages indexed, {written} of {len(dirty)} shards changed, '
+              f'{len(self.pages)} pages in the index')
+        self.old_terms.clear()
+        self.new_terms.clear()
+
+        shards = sorted(path.stem for path in self.dest_dir.glob('*.json') if path.name != INDEX_NAME)
+        docs: list[list[str] | None] = [None] * self.next_id
+        for page in self.pages.values():
+            docs[page.id] = [page.url, page.title]
+        self._write_json(self.dest_dir / INDEX_NAME, {"prefix": PREFIX_LENGTH, "docs": docs, "shards": shards})
+        (self.dest_dir / LOADER_NAME).write_text(LOADER_JS)
+        return [self.dest_dir / INDEX_NAME, self.dest_dir / LOADER_NAME] + [self.shard_path(prefix) for prefix in shards]
+
+    def shard_path(self, prefix: str) -> Path:
+        return self.dest_dir / f'{prefix}.json'
+
+    def _write_shard(self, prefix: str, changed: set[int], added: dict[str, list[list[int]]]) -> bool:
+        # an edit rarely changes how often a page uses a word, most shards come out the same and aren't written
+        path = self.shard_path(prefix)
+        original = json.loads(path.read_text(encoding='utf-8')) if path.exists() else {}
+        shard = dict(original)
+        for term in list(shard):
+            postings = [posting for posting in shard[term] if posting[0] not in changed]
+            if postings:
+                shard[term] = postings
+            else:
+                del shard[term]
+        for term, postings in added.items():
+            shard[term] = sorted(shard.get(term, []) + postings)
+        if shard == original:
+            return False
+        if shard:
+            self._write_json(path, dict(sorted(shard.items())))
+        else:
+            path.unlink()
+        return True
+
+    @staticmethod
+    def _write_json(path: Path, data: object) -> None:
+        path.write_text(json.dumps(data, ensure_ascii=False, separators=(',', ':')), encoding='utf-8')
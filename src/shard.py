@@ -0,0 +1,52 @@
+import hashlib
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+# a shard build writes to shards/<i>-of-<N>/ instead of docs/ and .cache/manifest.json, merge.py joins them
+SHARDS_FOLDER = Path("shards")
+SHARD_PUBLIC_NAME = "docs"
+SHARD_MANIFEST_NAME = "manifest.json"
+SHARD_SPEC = re.compile(r'(\d+)/(\d+)')
+
+
+def shard_of(path: Path, count: int) -> int:
+    # sha256 of the path, unlike hash() it's the same in every process and on every machine
+    digest = hashlib.sha256(path.as_posix().encode()).digest()
+    return int.from_bytes(digest[:8], 'big') % count + 1
+
+
+@dataclass(slots=True, frozen=True)
+class Shard:
+    # shard index of count, counted from 1 like '--shard 1/4'
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, text: str) -> 'Shard':
+        match = SHARD_SPEC.fullmatch(text.strip())
+        if match is None:
+            raise ValueError(f'Invalid shard {text!r}, expected i/N like 1/4')
+        index, count = int(match.group(1)), int(match.group(2))
+        if not 1 <= index <= count:
+            raise ValueError(f'Invalid shard {text!r}, i has to be between 1 and N')
+        return cls(index, count)
+
+    def owns(self, path: Path) -> bool:
+        # path relative to the content or static folder, every file belongs to exactly one shard
+        return shard_of(path, self.count) == self.index
+
+    @property
+    def folder(self) -> Path:
+        return SHARDS_FOLDER / f'{self.index}-of-{self.count}'
+
+    @property
+    def public_path(self) -> Path:
+        return self.folder / SHARD_PUBLIC_NAME
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.folder / SHARD_MANIFEST_NAME
+
+    def __str__(self) -> str:
+        return f'{self.index}/{self.count}'
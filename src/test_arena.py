@@ -0,0 +1,90 @@
+import io
+import unittest
+
+from arena import ArenaNode, DocumentArena
+from htmlnode import BlockType, LeafNode, ParentNode, UrlResolver
+from md_to_html import block_to_arena, markdown_to_arena, markdown_to_html_node
+
+MARKDOWN = """
+# Title with **bold**
+
+This is a [link](/blog/post) and ![image](/images/post.png) with _italic_ and `code`
+
+> quoted
+> text
+
+- one
+- **two**
+
+1. first
+2. second
+
+```
+code **stays**
+```
+"""
+
+
+class TestDocumentArena(unittest.TestCase):
+
+    def test_to_html(self):
+        arena = markdown_to_arena(MARKDOWN, UrlResolver("/site/"))
+        self.assertEqual(markdown_to_html_node(MARKDOWN, UrlResolver("/site/")).to_html(), arena.to_html())
+
+    def test_to_html_node(self):
+        arena = markdown_to_arena(MARKDOWN)
+        self.assertEqual(markdown_to_html_node(MARKDOWN), arena.root().to_html_node())
+
+    def test_node_api(self):
+        root = markdown_to_arena("# Title\n\n[link](/blog) text").root()
+        self.assertEqual('div', root.tag)
+        self.assertIsNone(root.value)
+        heading, paragraph = root.children
+        self.assertEqual('<h1>Title</h1>', heading.to_html())
+        link, text = paragraph.children
+        self.assertEqual('a', link.tag)
+        self.assertEqual('link', link.value)
+        self.assertEqual({"href": "/blog"}, link.props)
+        self.assertEqual(' href="/blog"', link.props_to_html())
+        self.assertIsNone(text.tag)
+        self.assertEqual(' text', text.value)
+        self.assertEqual({}, text.props)
+        self.assertIsNone(text.children)
+
+    def test_write_html(self):
+        fp = io.StringIO()
+        markdown_to_arena(MARKDOWN).root().write_html(fp)
+        self.assertEqual(markdown_to_html_node(MARKDOWN).to_html(), fp.getvalue())
+
+    def test_single_text_string(self):
+        arena = markdown_to_arena(MARKDOWN)
+        self.assertEqual(1, len(arena.chunks))
+
+    def test_clear(self):
+        arena = DocumentArena()
+        block_to_arena(arena, "- one\n- two", BlockType.ULIST)
+        self.assertEqual('<ul><li>one</li><li>two</li></ul>', arena.to_html())
+        arena.clear()
+        block_to_arena(arena, "text", BlockType.PARAGRAPH)
+        self.assertEqual('<p>text</p>', arena.to_html())
+        self.assertEqual(2, len(arena))
+
+    def test_empty_leaf(self):
+        arena = markdown_to_arena("[](/blog) text")
+        self.assertRaises(ValueError, arena.to_html)
+        self.assertRaises(ValueError, markdown_to_html_node("[](/blog) text").to_html)
+
+    def test_parent_without_children(self):
+        arena = DocumentArena()
+        arena.close(arena.open('p'))
+        self.assertRaises(ValueError, arena.to_html)
+
+    def test_adapter_types(self):
+        node = markdown_to_arena("text").root().to_html_node()
+        self.assertIsInstance(node, ParentNode)
+        self.assertIsInstance(node.children[0].children[0], LeafNode)
+        self.assertIsInstance(markdown_to_arena("text").root(), ArenaNode)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from assets import AssetMap, fingerprinted_name, is_fingerprinted
+from block_cache import BlockCache
+from generate import TEMPLATE_NAME, copy_static_files, fingerprint_assets, generate_page_recursive, load_template
+from htmlnode import Block, BlockType, UrlResolver
+from links import find_broken_links
+from manifest import BuildManifest, hash_file
+
+ASSETS = AssetMap.create({"index.css": "index.3f9a1c2b.css", "images/tom.png": "images/tom.66709e99.png"})
+
+
+class TestAssetMap(unittest.TestCase):
+
+    def test_fingerprinted_name(self):
+        content_hash = "3f9a1c2b" + "0" * 56
+        self.assertEqual("index.3f9a1c2b.css", fingerprinted_name("index.css", content_hash))
+        self.assertEqual("a/b.tar.3f9a1c2b.gz", fingerprinted_name("a/b.tar.gz", content_hash))
+        self.assertEqual("LICENSE.3f9a1c2b", fingerprinted_name("LICENSE", content_hash))
+        self.assertEqual("a/.env.3f9a1c2b", fingerprinted_name("a/.env", content_hash))
+        self.assertTrue(is_fingerprinted(Path("static/index.css")))
+        self.assertFalse(is_fingerprinted(Path("static/about.html")))
+        self.assertFalse(is_fingerprinted(Path("static/robots.txt")))
+
+    def test_resolve(self):
+        resolver = UrlResolver("/site/", ASSETS)
+        self.assertEqual("/site/images/tom.66709e99.png", resolver.resolve("/images/tom.png"))
+        self.assertEqual("/site/index.3f9a1c2b.css?v=1#top", resolver.resolve("/index.css?v=1#top"))
+        self.assertEqual("/site/blog/tom", resolver.resolve("/blog/tom"))
+        self.assertEqual("images/tom.png", resolver.resolve("images/tom.png"))
+        self.assertEqual("/site/index.3f9a1c2b.css", resolver.asset("index.css"))
+        self.assertEqual("/site/index.css", UrlResolver("/site/").asset("/index.css"))
+
+    def test_cache_key(self):
+        block = Block("![Tom](/images/tom.png)", BlockType.PARAGRAPH)
+        key = BlockCache.key(block, UrlResolver("/site/", ASSETS))
+        self.assertNotEqual(key, BlockCache.key(block, UrlResolver("/site/")))
+        other = AssetMap.create({**ASSETS.paths, "index.css": "index.00000000.css"})
+        self.assertNotEqual(key, BlockCache.key(block, UrlResolver("/site/", other)))
+
+
+class TestFingerprintBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.static = root / "static"
+        self.content = root / "content"
+        self.templates = root / "templates"
+        self.dest = root / "docs"
+        for folder in (self.static / "images", self.content, self.templates):
+            folder.mkdir(parents=True)
+        (self.static / "index.css").write_text("body {}")
+        (self.static / "images" / "tom.png").write_bytes(b"\x89PNG tom")
+        (self.static / "about.html").write_text("<p>about</p>")
+        (self.templates / TEMPLATE_NAME).write_text("<link href=\"{{ asset('index.css') }}\">{{ content }}")
+        (self.content / "index.md").write_text("# Home\n\n![Tom](/images/tom.png) [About](/about.html)")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, previous: dict[str, str]) -> tuple[AssetMap, BuildManifest]:
+        assets = fingerprint_assets(self.static, self.dest, previous)
+        manifest = BuildManifest("", "/site/", assets=assets.paths)
+        for source, dest in copy_static_files(self.static, self.dest, assets=assets):
+            manifest.add_static(source, dest)
+        generate_page_recursive(self.content, load_template(self.templates), self.dest, "/site/", manifest,
+                                assets=assets)
+        return assets, manifest
+
+    def test_build(self):
+        assets, manifest = self.build({})
+        css = fingerprinted_name("index.css", hash_file(self.static / "index.css"))
+        self.assertEqual({"index.css", "images/tom.png"}, assets.paths.keys())
+        self.assertEqual(css, assets.paths["index.css"])
+        self.assertTrue((self.dest / css).exists())
+        self.assertTrue((self.dest / "about.html").exists())
+        # the asset keeps its own name for the static files that link it, the same file under both names
+        self.assertTrue((self.dest / css).samefile(self.dest / "index.css"))
+        self.assertEqual({"index.css", css, "images/tom.png", assets.paths["images/tom.png"], "about.html"},
+                         {Path(output).relative_to(self.dest).as_posix() for output in manifest.static})
+        page = (self.dest / "index.html").read_text()
+        self.assertIn(f'<link href="/site/{css}">', page)
+        self.assertIn(f'src="/site/{assets.paths["images/tom.png"]}"', page)
+        # the markdown links the asset by its own name, the check knows both
+        self.assertEqual((2, []), find_broken_links(manifest, self.dest))
+
+    def test_changed_asset(self):
+        assets, previous = self.build({})
+        (self.static / "index.css").write_text("body { margin: 0 }")
+        changed, current = self.build(assets.paths)
+        self.assertEqual("body { margin: 0 }", (self.dest / "index.css").read_text())
+        self.assertEqual("body { margin: 0 }", (self.dest / changed.paths["index.css"]).read_text())
+        # only the old fingerprinted name goes, the original one is still an output
+        self.assertListEqual([self.dest / assets.paths["index.css"]], previous.stale_outputs(current))
+
+    def test_names_kept(self):
+        assets, _ = self.build({})
+        self.assertEqual(assets.paths, fingerprint_assets(self.static, self.dest, assets.paths).paths)
+        # an output with the size and time of its asset keeps the previous name without the asset being hashed
+        output = self.dest / assets.paths["index.css"]
+        output.rename(self.dest / "index.cafebabe.css")
+        previous = {**assets.paths, "index.css": "index.cafebabe.css"}
+        self.assertEqual(previous, fingerprint_assets(self.static, self.dest, previous).paths)
+        (self.static / "index.css").write_text("body { margin: 0 }")
+        changed = fingerprint_assets(self.static, self.dest, previous)
+        self.assertEqual(fingerprinted_name("index.css", hash_file(self.static / "index.css")),
+                         changed.paths["index.css"])
+        self.assertEqual(assets.paths["images/tom.png"], changed.paths["images/tom.png"])
+
+
+if __name__ == "__main__":
+    unittest.main()
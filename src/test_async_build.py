@@ -0,0 +1,97 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from async_build import generate_page_recursive_async
+from block_cache import BlockCache
+from generate import TEMPLATE_NAME, generate_page_recursive, load_template, write_page
+from instrument import BuildTrace
+from manifest import BuildManifest
+
+
+class TestAsyncBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        self.templates = self.root / "templates"
+        self.templates.mkdir()
+        (self.templates / TEMPLATE_NAME).write_text("<title>{{ title }}</title>{{ content }}")
+        for idx in range(20):
+            page = self.content / f"post-{idx}" / "index.md"
+            page.parent.mkdir(parents=True)
+            page.write_text(f"# Post {idx}\n\n[Home](/) and **bold {idx}**\n\n- one\n- two")
+        self.template = load_template(self.templates)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_tree(self, path: Path) -> dict[str, bytes]:
+        return {str(file.relative_to(path)): file.read_bytes() for file in path.rglob("*") if file.is_file()}
+
+    def test_matches_serial(self):
+        generate_page_recursive(self.content, self.template, self.root / "serial", "/site/")
+        generate_page_recursive_async(self.content, self.template, self.root / "async", "/site/", concurrency=3)
+        self.assertDictEqual(self.read_tree(self.root / "serial"), self.read_tree(self.root / "async"))
+
+    def test_block_cache(self):
+        cache = BlockCache.open(self.root / "blocks.sqlite")
+        generate_page_recursive_async(self.content, self.template, self.root / "cold", "/", cache=cache, concurrency=2)
+        hits = cache.stats.hits
+        generate_page_recursive_async(self.content, self.template, self.root / "warm", "/", cache=cache, concurrency=2)
+        cache.close()
+        self.assertEqual(60, cache.stats.hits - hits)
+        self.assertDictEqual(self.read_tree(self.root / "cold"), self.read_tree(self.root / "warm"))
+
+    def test_trace(self):
+        trace = BuildTrace(enabled=True)
+        generate_page_recursive_async(self.content, self.template, self.root / "docs", "/", trace=trace, concurrency=4)
+        self.assertEqual(20, len(trace.pages))
+        self.assertTrue(all({"read", "queue", "write"} <= page.stages.keys() for page in trace.pages))
+        self.assertEqual(60, trace.count_totals()["blocks"])
+
+    def test_manifest_matches_serial(self):
+        (self.content / "draft.md").write_text("---\ndraft: true\n---\n# Draft")
+        (self.content / "post-3" / "index.md").write_text("---\ntags: [a]\n---\n\n# Post 3\n\n[Home](/)")
+        serial = BuildManifest("", "/")
+        generate_page_recursive(self.content, self.template, self.root / "serial", "/", serial)
+        manifest = BuildManifest("", "/")
+        generate_page_recursive_async(self.content, self.template, self.root / "async", "/", manifest, concurrency=4)
+        self.assertEqual([(source, record.source_hash, record.links, record.meta)
+                          for source, record in serial.pages.items()],
+                         [(source, record.source_hash, record.links, record.meta)
+                          for source, record in manifest.pages.items()])
+        self.assertFalse((self.root / "async" / "draft.html").exists())
+        # the pages that didn't change are read and hashed, not rendered
+        trace = BuildTrace(enabled=True)
+        (self.content / "post-5" / "index.md").write_text("# Post 5\n\nchanged")
+        generate_page_recursive_async(self.content, self.template, self.root / "async", "/", BuildManifest("", "/"),
+                                      manifest, trace, concurrency=4)
+        self.assertEqual([str(self.content / "post-5" / "index.md")], [page.name for page in trace.pages])
+
+    def test_failure(self):
+        (self.content / "broken.md").write_text("no title")
+        with self.assertRaises(ValueError):
+            generate_page_recursive_async(self.content, self.template, self.root / "docs", "/", concurrency=2)
+
+
+    def test_failed_write_keeps_previous_output(self):
+        generate_page_recursive_async(self.content, self.template, self.root / "docs", "/", concurrency=2)
+        before = self.read_tree(self.root / "docs")
+
+        def interrupted(chunks):
+            for chunk in chunks:
+                yield chunk[:10]
+                raise OSError("disk full")
+
+        (self.content / "post-5" / "index.md").write_text("# Post 5\n\nchanged")
+        with patch("async_build.write_page", lambda dest, chunks: write_page(dest, interrupted(chunks))):
+            with self.assertRaises(OSError):
+                generate_page_recursive_async(self.content, self.template, self.root / "docs", "/", concurrency=2)
+        # no page was cut short and no temporary file is left
+        self.assertDictEqual(before, self.read_tree(self.root / "docs"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+import sqlite3
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from block_cache import DEFAULT_MAX_BYTES, BlockCache
+from generate import TEMPLATE_NAME, discover_pages, generate_page_recursive, generate_pages_parallel, load_template
+from htmlnode import Block, BlockType, UrlResolver
+
+
+class TestBlockCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.path = self.root / "blocks.sqlite"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_get_and_put(self):
+        cache = BlockCache.open(self.path)
+        key = BlockCache.key(Block("text", BlockType.PARAGRAPH), UrlResolver())
+        self.assertIsNone(cache.get(key))
+        cache.put(key, "<p>text</p>", 2, "text")
+        self.assertEqual(("<p>text</p>", 2, "text"), cache.get(key))
+        cache.close()
+
+        cache = BlockCache.open(self.path)
+        self.assertEqual(("<p>text</p>", 2, "text"), cache.get(key))
+        self.assertEqual(1, cache.stats.hits)
+        cache.close()
+
+    def test_key(self):
+        block = Block("[post](/blog/post)", BlockType.PARAGRAPH)
+        key = BlockCache.key(block, UrlResolver())
+        self.assertEqual(key, BlockCache.key(Block("[post](/blog/post)", BlockType.PARAGRAPH, 10), UrlResolver()))
+        self.assertNotEqual(key, BlockCache.key(Block("[post](/blog/post)", BlockType.QUOTE), UrlResolver()))
+        self.assertNotEqual(key, BlockCache.key(Block("[post](/blog/other)", BlockType.PARAGRAPH), UrlResolver()))
+        self.assertNotEqual(key, BlockCache.key(block, UrlResolver("/site/")))
+        self.assertNotEqual(key, BlockCache.key(block, UrlResolver(), compact=True))
+
+    def test_old_schema_dropped(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute('CREATE TABLE blocks (key BLOB PRIMARY KEY, html TEXT NOT NULL, '
+                           'size INTEGER NOT NULL, used INTEGER NOT NULL)')
+        connection.execute("INSERT INTO blocks VALUES (x'00', '<p>old</p>', 10, 0)")
+        connection.commit()
+        connection.close()
+        cache = BlockCache.open(self.path)
+        self.assertIsNone(cache.get(b"\0"))
+        cache.put(b"key", "<p>text</p>")
+        cache.flush()
+        self.assertEqual(11, cache.size())
+        cache.close()
+
+    def test_stats(self):
+        cache = BlockCache.open(self.path)
+        cache.get(b"missing")
+        cache.put(b"key", "<p>text</p>")
+        cache.get(b"key")
+        cache.get(b"key")
+        self.assertEqual((2, 1), (cache.stats.hits, cache.stats.misses))
+        self.assertAlmostEqual(2 / 3, cache.stats.hit_rate())
+        cache.close()
+
+    def test_full_buffer_flushed(self):
+        # the write buffer is bounded by the cache's limit, a cold build doesn't keep every block until close()
+        cache = BlockCache.open(self.path, max_bytes=10)
+        cache.put(b"a", "123", 0, "123")
+        self.assertEqual(0, cache.size())
+        cache.put(b"b", "12345")
+        self.assertEqual(({}, 0), (cache.pending, cache.buffered_bytes))
+        self.assertEqual(8, cache.size())
+        self.assertEqual(("123", 0, "123"), cache.get(b"a"))
+        cache.close()
+
+    def test_full_cache_evicted_while_written(self):
+        cache = BlockCache.open(self.path, max_bytes=10)
+        for key in (b"a", b"b", b"c"):
+            time.sleep(0.001)
+            cache.put(key, "1234567890")
+        # every put fills the buffer, the oldest entries go once the cache is over its limit
+        self.assertEqual((10, 2), (cache.size(), cache.stats.evicted))
+        self.assertIsNotNone(cache.get(b"c"))
+        cache.close()
+
+    def test_evict_least_recently_used(self):
+        cache = BlockCache.open(self.path, max_bytes=10)
+        cache.put(b"old", "12345")
+        cache.flush()
+        time.sleep(0.001)
+        cache.put(b"new", "12345")
+        cache.flush()
+        time.sleep(0.001)
+        # a hit makes the old entry the most recently used one
+        cache.get(b"old")
+        cache.put(b"newest", "12345")
+        cache.flush()
+        self.assertEqual(15, cache.size())
+        self.assertEqual(1, cache.evict())
+        self.assertIsNone(cache.get(b"new"))
+        self.assertEqual(("12345", 0, None), cache.get(b"old"))
+        self.assertEqual(("12345", 0, None), cache.get(b"newest"))
+        cache.close()
+
+
+class TestCachedBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        self.templates = self.root / "templates"
+        self.content.mkdir()
+        self.templates.mkdir()
+        (self.templates / TEMPLATE_NAME).write_text("<title>{{ title }}</title>{{ content }}")
+        (self.content / "index.md").write_text("# Home\n\n[Post](/blog/post) **bold**\n\n- one\n- two\n\nlast")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cached_build_matches(self):
+        template = load_template(self.templates)
+        generate_page_recursive(self.content, template, self.root / "plain", "/site/")
+        cache = BlockCache.open(self.root / "blocks.sqlite")
+        generate_page_recursive(self.content, template, self.root / "cold", "/site/", cache=cache)
+        self.assertEqual((0, 4), (cache.stats.hits, cache.stats.misses))
+        (self.content / "index.md").write_text("# Home\n\n[Post](/blog/post) **bold**\n\n- one\n- two\n\nchanged")
+        generate_page_recursive(self.content, template, self.root / "warm", "/site/", cache=cache)
+        self.assertEqual((3, 5), (cache.stats.hits, cache.stats.misses))
+        cache.close()
+
+        generate_page_recursive(self.content, template, self.root / "plain", "/site/")
+        self.assertEqual((self.root / "plain" / "index.html").read_text(), (self.root / "warm" / "index.html").read_text())
+
+    def test_parallel_build_keeps_limit(self):
+        # a cache bigger than the default size, well within the one the build is given
+        path = self.root / "blocks.sqlite"
+        cache = BlockCache.open(path, 2 * DEFAULT_MAX_BYTES)
+        entry = "x" * (1024 * 1024)
+        for idx in range(DEFAULT_MAX_BYTES // len(entry) + 4):
+            cache.put(str(idx).encode(), entry)
+        size = cache.size()
+        cache.close()
+        # pages with blocks big enough to fill the workers' write buffers, a full buffer is when they evict
+        for idx in range(2):
+            (self.content / f"page-{idx}.md").write_text(f"# Page {idx}\n\n{'word ' * 300_000}")
+        stats = generate_pages_parallel(discover_pages(self.content, self.root / "docs"), self.templates, None, "/", 2,
+                                        block_cache_path=path, block_cache_bytes=2 * DEFAULT_MAX_BYTES)
+        # every worker writes its page's blocks, none of them evicts what was there
+        self.assertEqual((0, 8), (stats.evicted, stats.misses))
+        cache = BlockCache.open(path, 2 * DEFAULT_MAX_BYTES)
+        self.assertLess(size, cache.size())
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
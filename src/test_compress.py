@@ -0,0 +1,56 @@
+import gzip
+import tempfile
+import unittest
+from pathlib import Path
+
+from compress import compress_outputs, is_compressible, sidecar_path
+
+
+class TestCompressOutputs(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.page = self.root / "index.html"
+        self.page.write_text("<p>page</p>" * 100)
+        self.css = self.root / "index.css"
+        self.css.write_text("body { color: black; }")
+        self.image = self.root / "logo.png"
+        self.image.write_bytes(b"\x89PNG")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sidecar_path(self):
+        self.assertEqual(self.root / "index.html.gz", sidecar_path(self.page))
+
+    def test_is_compressible(self):
+        self.assertTrue(is_compressible(self.page))
+        self.assertTrue(is_compressible(Path("STYLE.CSS")))
+        self.assertFalse(is_compressible(self.image))
+
+    def test_compress(self):
+        hashes = compress_outputs([self.page, self.css, self.image], {}, 9)
+        self.assertCountEqual([str(self.page), str(self.css)], hashes)
+        self.assertEqual(self.page.read_bytes(), gzip.decompress(sidecar_path(self.page).read_bytes()))
+        self.assertEqual(self.css.read_bytes(), gzip.decompress(sidecar_path(self.css).read_bytes()))
+        self.assertFalse(sidecar_path(self.image).exists())
+
+    def test_skip_unchanged(self):
+        hashes = compress_outputs([self.page, self.css], {}, 9)
+        sidecar_path(self.page).write_bytes(b"kept")
+        self.css.write_text("body { color: white; }")
+        self.assertEqual(hashes[str(self.page)], compress_outputs([self.page, self.css], hashes, 9)[str(self.page)])
+        # the page didn't change so its sidecar wasn't written again, the stylesheet's was
+        self.assertEqual(b"kept", sidecar_path(self.page).read_bytes())
+        self.assertEqual(self.css.read_bytes(), gzip.decompress(sidecar_path(self.css).read_bytes()))
+
+    def test_missing_sidecar(self):
+        hashes = compress_outputs([self.page], {}, 9)
+        sidecar_path(self.page).unlink()
+        compress_outputs([self.page], hashes, 9)
+        self.assertEqual(self.page.read_bytes(), gzip.decompress(sidecar_path(self.page).read_bytes()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from generate import (TEMPLATE_NAME, copy_static_files, discover_pages, generate_page_recursive,
+                      generate_pages_parallel, iter_pages, load_template)
+
+
+class TestGenerate(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        self.templates = self.root / "templates"
+        (self.content / "blog" / "post").mkdir(parents=True)
+        (self.content / "empty").mkdir()
+        self.templates.mkdir()
+        (self.templates / TEMPLATE_NAME).write_text(
+            "<title>{{ title }}</title><link href=\"{{ base_path }}index.css\"><article>{{ content }}</article>"
+        )
+        (self.content / "index.md").write_text("# Home\n\n[Post](/blog/post) and **bold** text")
+        (self.content / "blog" / "post" / "index.md").write_text(
+            "# Post\n\n![image](/images/post.png)\n\n- one\n- two\n\n```\ncode\n```"
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_tree(self, path: Path) -> dict[str, bytes]:
+        return {str(file.relative_to(path)): file.read_bytes() for file in path.rglob("*") if file.is_file()}
+
+    def test_discover_pages(self):
+        dest = self.root / "docs"
+        pages = discover_pages(self.content, dest)
+        self.assertCountEqual(
+            [
+                (self.content / "index.md", dest / "index.html"),
+                (self.content / "blog" / "post" / "index.md", dest / "blog" / "post" / "index.html"),
+            ],
+            pages
+        )
+        self.assertTrue((dest / "empty").is_dir())
+
+    def test_iter_pages_is_lazy(self):
+        dest = self.root / "docs"
+        (self.content / "blog" / "post.txt").write_text("not a page")
+        (self.content / ".md").write_text("# Hidden")
+        pages = iter_pages(self.content, dest)
+        # nothing is walked until the first page is asked for, the folders are created as they're reached
+        self.assertFalse(dest.exists())
+        first = next(pages)
+        self.assertEqual([first, *pages], discover_pages(self.content, dest))
+
+    def test_generate_page_recursive(self):
+        dest = self.root / "docs"
+        generate_page_recursive(self.content, load_template(self.templates), dest, "/site/")
+        self.assertEqual(
+            '<title>Home</title><link href="/site/index.css"><article><div><h1>Home</h1>'
+            '<p><a href="/site/blog/post">Post</a> and <b>bold</b> text</p></div></article>',
+            (dest / "index.html").read_text()
+        )
+
+    def test_generate_page_template_repeats_content(self):
+        dest = self.root / "docs"
+        (self.templates / TEMPLATE_NAME).write_text("{{ content }}|{{ content|length }}")
+        generate_page_recursive(self.content, load_template(self.templates), dest, "/site/")
+        content = ('<div><h1>Home</h1><p><a href="/site/blog/post">Post</a> and <b>bold</b> text</p></div>')
+        self.assertEqual(f"{content}|{len(content)}", (dest / "index.html").read_text())
+
+    def test_failed_page_keeps_previous_output(self):
+        dest = self.root / "docs"
+        template = load_template(self.templates)
+        generate_page_recursive(self.content, template, dest, "/site/")
+        page = (dest / "index.html").read_text()
+        # the unbalanced delimiter only fails once the head and the first blocks are streamed
+        (self.content / "index.md").write_text("# Home\n\nfine\n\n**broken")
+        with self.assertRaises(SyntaxError):
+            generate_page_recursive(self.content, template, dest, "/site/")
+        self.assertEqual(page, (dest / "index.html").read_text())
+        self.assertEqual([], list(dest.rglob("*.tmp")))
+
+    def test_parallel_matches_serial(self):
+        serial = self.root / "serial"
+        parallel = self.root / "parallel"
+        generate_page_recursive(self.content, load_template(self.templates), serial, "/site/")
+        generate_pages_parallel(discover_pages(self.content, parallel), self.templates, None, "/site/", 2)
+        self.assertDictEqual(self.read_tree(serial), self.read_tree(parallel))
+
+    def test_parallel_fails_fast(self):
+        (self.content / "broken.md").write_text("no title")
+        with self.assertRaises(ValueError):
+            generate_pages_parallel(discover_pages(self.content, self.root / "docs"), self.templates, None, "/", 2)
+
+
+class TestCopyStaticFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.static = self.root / "static"
+        self.dest = self.root / "docs"
+        (self.static / "images").mkdir(parents=True)
+        (self.static / "index.css").write_text("body {}")
+        (self.static / "images" / "logo.png").write_bytes(b"\x89PNG")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_copy(self):
+        files = copy_static_files(self.static, self.dest)
+        self.assertCountEqual(
+            [
+                (self.static / "index.css", self.dest / "index.css"),
+                (self.static / "images" / "logo.png", self.dest / "images" / "logo.png"),
+            ],
+            files
+        )
+        self.assertEqual("body {}", (self.dest / "index.css").read_text())
+        self.assertEqual(b"\x89PNG", (self.dest / "images" / "logo.png").read_bytes())
+
+    def test_copy_only_changed(self):
+        copy_static_files(self.static, self.dest)
+        # an unchanged source must not be copied again, even if the output was edited
+        (self.dest / "images" / "logo.png").write_bytes(b"GNP\x89")
+        os.utime(self.dest / "images" / "logo.png", ns=(0, (self.static / "images" / "logo.png").stat().st_mtime_ns))
+        (self.static / "index.css").write_text("body { margin: 0 }")
+        copy_static_files(self.static, self.dest)
+        self.assertEqual("body { margin: 0 }", (self.dest / "index.css").read_text())
+        self.assertEqual(b"GNP\x89", (self.dest / "images" / "logo.png").read_bytes())
+
+    def test_link(self):
+        copy_static_files(self.static, self.dest, link=True)
+        self.assertTrue((self.dest / "index.css").samefile(self.static / "index.css"))
+        # replacing the source must not write through the hardlink
+        (self.static / "index.css").unlink()
+        (self.static / "index.css").write_text("body { margin: 0 }")
+        copy_static_files(self.static, self.dest, link=True)
+        self.assertEqual("body { margin: 0 }", (self.dest / "index.css").read_text())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
+import io
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode, TextType, TextNode
+from htmlnode import HTMLNode, LeafNode, ParentNode, TextType, TextNode, UrlResolver
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -79,6 +80,36 @@ class TestHTMLNode(unittest.TestCase):
             "<div><span><b>grandchild</b></span></div>",
         )
 
+    def test_to_html_no_children(self):
+        parent_node = ParentNode("div", [ParentNode("span", [])])
+        self.assertRaises(ValueError, parent_node.to_html)
+
+    def test_to_html_no_tag(self):
+        parent_node = ParentNode(None, [LeafNode("b", "child")])
+        self.assertRaises(ValueError, parent_node.to_html)
+
+    def test_iter_html(self):
+        props = {"href": "/blog"}
+        parent_node = ParentNode("p", [LeafNode(None, "Read the "), LeafNode("a", "blog", props)])
+        self.assertListEqual(
+            ['<p>', 'Read the ', '<a href="/blog">blog</a>', '</p>'],
+            list(parent_node.iter_html())
+        )
+
+    def test_write_html(self):
+        parent_node = ParentNode("ul", [ParentNode("li", [LeafNode(None, str(idx))]) for idx in range(3)])
+        fp = io.StringIO()
+        parent_node.write_html(fp)
+        self.assertEqual(fp.getvalue(), "<ul><li>0</li><li>1</li><li>2</li></ul>")
+
+    def test_to_html_deeply_nested(self):
+        node = LeafNode("b", "deep")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span>" * 5000 + "<b>deep</b>"))
+        self.assertTrue(html.endswith("</span>" * 5000))
+
     # TextNode() testcases
 
     def test_textnode_eq(self):
@@ -141,6 +172,25 @@ class TestHTMLNode(unittest.TestCase):
         self.assertEqual(html_node.value, '')
         self.assertEqual(html_node.props, {"src": "https://www.boot.dev/img/bootdev-logo-full-small.webp", "alt": "This is an image node"})
     
+    def test_text_node_to_html_node_resolver(self):
+        resolver = UrlResolver("/site/")
+        link = TextNode("Post", TextType.LINK, "/blog/post").to_html_node(resolver)
+        image = TextNode("Logo", TextType.IMAGE, "/images/logo.png").to_html_node(resolver)
+        self.assertEqual(link.props, {"href": "/site/blog/post"})
+        self.assertEqual(image.props, {"src": "/site/images/logo.png", "alt": "Logo"})
+
+    # UrlResolver() testcases
+    def test_url_resolver(self):
+        resolver = UrlResolver("/site/")
+        self.assertEqual(resolver.resolve("/"), "/site/")
+        self.assertEqual(resolver.resolve("/index.css"), "/site/index.css")
+        self.assertEqual(resolver.resolve("blog/post"), "blog/post")
+        self.assertEqual(resolver.resolve("https://www.boot.dev/"), "https://www.boot.dev/")
+        self.assertEqual(resolver.resolve("//cdn.boot.dev/logo.png"), "//cdn.boot.dev/logo.png")
+
+    def test_url_resolver_default(self):
+        self.assertEqual(UrlResolver().resolve("/blog/post"), "/blog/post")
+
     def test_text_node_to_html_node_non_text_type(self):
         node = TextNode("This is an invalid node", 'number')
         self.assertRaises(ValueError, node.to_html_node)
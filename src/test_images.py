@@ -0,0 +1,181 @@
+import os
+import struct
+import tempfile
+import unittest
+import unittest.mock
+from pathlib import Path
+
+from block_cache import BlockCache
+from generate import TEMPLATE_NAME, generate_page, generate_page_recursive, iter_page, load_template
+from htmlnode import Block, BlockType, UrlResolver
+from images import PNG_SIGNATURE, ImageSizes, image_size, measure_images
+from manifest import BuildManifest
+from md_to_html import markdown_to_html_node
+
+REPO_STATIC = Path(__file__).resolve().parent.parent / "static"
+
+
+def png(width: int, height: int) -> bytes:
+    return PNG_SIGNATURE + struct.pack('>I', 13) + b'IHDR' + struct.pack('>II', width, height) + b'\x08\x02\x00\x00\x00'
+
+
+def webp(chunk: bytes, payload: bytes) -> bytes:
+    return b'RIFF' + struct.pack('<I', 30) + b'WEBP' + chunk + struct.pack('<I', 10) + payload
+
+
+class TestImageSize(unittest.TestCase):
+
+    def test_formats(self):
+        self.assertEqual((640, 480), image_size(png(640, 480)))
+        self.assertEqual((320, 200), image_size(b'GIF89a' + struct.pack('<HH', 320, 200) + b'\x00\x00\x00'))
+        # an APP0 segment, fill bytes, then the frame header with the height before the width
+        jpeg = (b'\xff\xd8\xff\xe0' + struct.pack('>H', 16) + b'JFIF\x00' + b'\x00' * 9 + b'\xff\xff'
+                b'\xff\xc2' + struct.pack('>HBHH', 17, 8, 600, 800) + b'\x03' + b'\x00' * 9)
+        self.assertEqual((800, 600), image_size(jpeg))
+        lossy = b'\x00\x00\x00\x9d\x01\x2a' + struct.pack('<HH', 400, 300)
+        self.assertEqual((400, 300), image_size(webp(b'VP8 ', lossy)))
+        bits = (400 - 1) | (300 - 1) << 14
+        self.assertEqual((400, 300), image_size(webp(b'VP8L', b'\x2f' + bits.to_bytes(4, 'little'))))
+        extended = b'\x00' * 4 + (5000 - 1).to_bytes(3, 'little') + (3000 - 1).to_bytes(3, 'little')
+        self.assertEqual((5000, 3000), image_size(webp(b'VP8X', extended)))
+        self.assertEqual((928, 468), image_size((REPO_STATIC / "images" / "tom.png").read_bytes()))
+
+    def test_unknown(self):
+        self.assertIsNone(image_size(b'<svg></svg>'))
+        self.assertIsNone(image_size(PNG_SIGNATURE))
+        self.assertIsNone(image_size(b'\xff\xd8\xff\xda' + b'\x00' * 20))
+        self.assertIsNone(image_size(b'\xff\xd8\xff\xe0\x00\x10JFIF'))
+
+
+class TestMeasureImages(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.static = self.root / "static"
+        self.cache_path = self.root / "images.json"
+        (self.static / "images").mkdir(parents=True)
+        (self.static / "images" / "a.png").write_bytes(png(10, 20))
+        (self.static / "b.GIF").write_bytes(b'GIF87a' + struct.pack('<HH', 3, 4) + b'\x00\x00\x00')
+        (self.static / "broken.jpg").write_bytes(b'not a jpeg')
+        (self.static / "index.css").write_text("body {}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def measure(self) -> ImageSizes:
+        with unittest.mock.patch('images.image_size', wraps=image_size) as read:
+            sizes = measure_images(self.static, self.cache_path)
+        self.reads = read.call_count
+        return sizes
+
+    def test_cached_by_hash(self):
+        sizes = self.measure()
+        self.assertEqual({"images/a.png": (10, 20), "b.GIF": (3, 4)}, sizes.sizes)
+        self.assertEqual(3, self.reads)
+        self.assertEqual(sizes.key, self.measure().key)
+        self.assertEqual(0, self.reads)
+        # a copy or a touched file has a content the cache knows
+        (self.static / "c.png").write_bytes(png(10, 20))
+        os.utime(self.static / "b.GIF", ns=(0, 0))
+        self.assertEqual((10, 20), self.measure().size("c.png?v=2"))
+        self.assertEqual(0, self.reads)
+        (self.static / "images" / "a.png").write_bytes(png(30, 40))
+        (self.static / "b.GIF").unlink()
+        sizes = self.measure()
+        self.assertEqual({"images/a.png": (30, 40), "c.png": (10, 20)}, sizes.sizes)
+        self.assertEqual(1, self.reads)
+
+
+class TestImageProps(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.templates = Path(self.tmp.name)
+        (self.templates / TEMPLATE_NAME).write_text("{{ content }}")
+        self.images = ImageSizes.create({"tom.png": (928, 468), "ring.png": (20, 10)})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_resolver(self):
+        resolver = UrlResolver("/site/", images=self.images)
+        markdown = "![Tom](/tom.png) ![Ring](/ring.png)\n\n![Far](https://a.b/c.png)"
+        html = markdown_to_html_node(markdown, resolver).to_html()
+        self.assertIn('<img src="/site/tom.png" alt="Tom" width="928" height="468">', html)
+        self.assertIn('<img src="/site/ring.png" alt="Ring" width="20" height="10" loading="lazy" decoding="async">',
+                      html)
+        self.assertIn('<img src="https://a.b/c.png" alt="Far" loading="lazy" decoding="async">', html)
+        self.assertNotIn("width", markdown_to_html_node("![Tom](/tom.png)").to_html())
+
+    def render(self, markdown: str, cache: BlockCache | None) -> str:
+        return ''.join(iter_page(markdown.splitlines(True), load_template(self.templates), "/", cache=cache,
+                                 images=self.images))
+
+    def test_cached_blocks(self):
+        # the same block is the page's first image on one page and a lazy one on the other
+        first = "# A\n\n![Ring](/ring.png)\n\n![Tom](/tom.png)"
+        second = "# B\n\n![Tom](/tom.png)\n\n![Ring](/ring.png)"
+        cache = BlockCache.open(Path(self.tmp.name) / "blocks.sqlite")
+        try:
+            for markdown in (first, second, first, second):
+                self.assertEqual(self.render(markdown, None), self.render(markdown, cache))
+        finally:
+            cache.close()
+        self.assertEqual(1, self.render(second, None).count('loading="lazy"'))
+
+    def test_block_key(self):
+        block = Block("![Tom](/tom.png)", BlockType.PARAGRAPH)
+        key = BlockCache.key(block, UrlResolver("/", images=self.images))
+        # other images of the site don't matter, the block's own do
+        added = ImageSizes.create({**self.images.sizes, "new.png": (1, 1)})
+        self.assertEqual(key, BlockCache.key(block, UrlResolver("/", images=added)))
+        resized = ImageSizes.create({**self.images.sizes, "tom.png": (1, 1)})
+        self.assertNotEqual(key, BlockCache.key(block, UrlResolver("/", images=resized)))
+        self.assertNotEqual(key, BlockCache.key(block, UrlResolver("/", images=self.images, images_seen=1)))
+        # nor does an image earlier on the page for a block without any
+        text = Block("[Tom](/tom.png)", BlockType.PARAGRAPH)
+        self.assertEqual(BlockCache.key(text, UrlResolver("/", images=self.images)),
+                         BlockCache.key(text, UrlResolver("/", images=added, images_seen=1)))
+
+
+class TestImageFreshness(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.content = root / "content"
+        self.templates = root / "templates"
+        self.dest = root / "docs"
+        for folder in (self.content, self.templates):
+            folder.mkdir()
+        (self.templates / TEMPLATE_NAME).write_text("{{ content }}")
+        (self.content / "tom.md").write_text("# Tom\n\n![Tom](/tom.png?v=1)")
+        (self.content / "ring.md").write_text("# Ring\n\n![Ring](/ring.png) ![Far](https://a.b/c.png)")
+        (self.content / "text.md").write_text("# Text\n\nno images")
+        self.previous = None
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, sizes: dict[str, tuple[int, int]]) -> list[str]:
+        manifest = BuildManifest("", "/")
+        with unittest.mock.patch('generate.generate_page', wraps=generate_page) as render:
+            generate_page_recursive(self.content, load_template(self.templates), self.dest, "/", manifest,
+                                    self.previous, images=ImageSizes.create(sizes))
+        self.previous = manifest
+        return sorted(call.args[0].name for call in render.call_args_list)
+
+    def test_only_pages_of_changed_images(self):
+        self.assertEqual(["ring.md", "text.md", "tom.md"], self.build({"tom.png": (928, 468)}))
+        self.assertEqual({"tom.png": [928, 468]}, self.previous.pages[str(self.content / "tom.md")].images)
+        self.assertEqual({"ring.png": None}, self.previous.pages[str(self.content / "ring.md")].images)
+        # an image no page shows, then the missing one a page already links, then one resized
+        self.assertEqual([], self.build({"tom.png": (928, 468), "new.png": (1, 1)}))
+        self.assertEqual(["ring.md"], self.build({"tom.png": (928, 468), "ring.png": (20, 10)}))
+        self.assertEqual(["tom.md"], self.build({"tom.png": (1, 1), "ring.png": (20, 10)}))
+        self.assertIn('width="1" height="1"', (self.dest / "tom.html").read_text())
+
+
+if __name__ == "__main__":
+    unittest.main()
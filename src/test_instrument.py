@@ -0,0 +1,65 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from generate import TEMPLATE_NAME, discover_pages, generate_page_recursive, generate_pages_parallel, load_template
+from instrument import NO_TRACE, BuildTrace
+
+
+class TestBuildTrace(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        self.templates = self.root / "templates"
+        self.content.mkdir()
+        self.templates.mkdir()
+        (self.templates / TEMPLATE_NAME).write_text("<title>{{ title }}</title>{{ content }}")
+        (self.content / "index.md").write_text("# Home\n\n[Post](/blog/post)\n\n- one\n- two")
+        (self.content / "about.md").write_text("# About\n\ntext")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_disabled(self):
+        trace = BuildTrace()
+        self.assertIs(NO_TRACE, trace.page("content/index.md"))
+        generate_page_recursive(self.content, load_template(self.templates), self.root / "docs", "/", trace=trace)
+        self.assertListEqual([], trace.pages)
+
+    def test_page_stages(self):
+        trace = BuildTrace(enabled=True)
+        generate_page_recursive(self.content, load_template(self.templates), self.root / "docs", "/", trace=trace)
+        pages = {page.name: page for page in trace.pages}
+        self.assertCountEqual([str(self.content / "index.md"), str(self.content / "about.md")], pages)
+        index = pages[str(self.content / "index.md")]
+        self.assertLessEqual({"read", "blocks", "inline", "to_html", "render", "write"}, index.stages.keys())
+        self.assertEqual(3, index.counts["blocks"])
+        self.assertEqual(len((self.root / "docs" / "index.html").read_text()), index.counts["chars"])
+        self.assertGreaterEqual(index.duration, sum(index.stages.values()) - 1e-6)
+
+    def test_parallel_pages_are_collected(self):
+        trace = BuildTrace(enabled=True)
+        pages = discover_pages(self.content, self.root / "docs")
+        generate_pages_parallel(pages, self.templates, None, "/", 2, trace)
+        self.assertCountEqual([str(source) for source, _ in pages], [page.name for page in trace.pages])
+        self.assertEqual(5, trace.count_totals()["blocks"])
+
+    def test_export_chrome_trace(self):
+        trace = BuildTrace(enabled=True)
+        with trace.span("pages"):
+            generate_page_recursive(self.content, load_template(self.templates), self.root / "docs", "/", trace=trace)
+        path = self.root / "build.json"
+        trace.export(path)
+        data = json.loads(path.read_text())
+        events = data["traceEvents"]
+        self.assertTrue(all(event["ph"] == "X" and event["dur"] >= 0 for event in events))
+        self.assertListEqual(["pages"], [event["name"] for event in events if event["cat"] == "build"])
+        self.assertEqual(2, len([event for event in events if event["cat"] == "page"]))
+        self.assertEqual(5, data["otherData"]["counts"]["blocks"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from block_cache import BlockCache
+from generate import TEMPLATE_NAME, generate_page_recursive, load_template
+from htmlnode import Block, BlockType, TextType
+from links import LinkCollector, check_links, find_broken_links, is_internal, target_exists, url_to_path
+from manifest import BuildManifest
+from md_to_html import iter_block_urls
+
+
+class TestLinkCollector(unittest.TestCase):
+
+    def test_is_internal(self):
+        self.assertTrue(is_internal("/blog/post"))
+        self.assertTrue(is_internal("images/post.png"))
+        self.assertTrue(is_internal("../about"))
+        self.assertFalse(is_internal("https://www.boot.dev"))
+        self.assertFalse(is_internal("mailto:me@example.com"))
+        self.assertFalse(is_internal("//cdn.example.com/lib.js"))
+        self.assertFalse(is_internal("#top"))
+        self.assertFalse(is_internal(""))
+
+    def test_collects_first_line(self):
+        collector = LinkCollector("/site/")
+        collector.start_block(Block("text", BlockType.PARAGRAPH, 3))
+        self.assertEqual("/site/blog", collector.resolve("/blog"))
+        self.assertEqual("https://www.boot.dev", collector.resolve("https://www.boot.dev"))
+        collector.start_block(Block("text", BlockType.PARAGRAPH, 7))
+        collector.resolve("/blog")
+        collector.resolve("/about")
+        self.assertEqual({"/blog": 3, "/about": 7}, collector.links)
+
+    def test_cached_block(self):
+        collector = LinkCollector()
+        collector.start_block(Block("- [one](/one)\n- ![two](/two.png) [x](https://x.org)", BlockType.ULIST, 5),
+                              cached=True)
+        self.assertEqual({"/one": 5, "/two.png": 5}, collector.links)
+
+    def test_iter_block_urls(self):
+        self.assertEqual([(TextType.LINK, "/a"), (TextType.IMAGE, "/b.png")],
+                         list(iter_block_urls("> [a](/a)\n> ![b](/b.png)", BlockType.QUOTE)))
+        self.assertEqual([], list(iter_block_urls("```\n[a](/a)\n```", BlockType.CODE)))
+
+
+class TestLinkCheck(unittest.TestCase):
+
+    def test_url_to_path(self):
+        self.assertEqual("blog/post", url_to_path("/blog/post", "index.html"))
+        self.assertEqual("blog/post", url_to_path("/blog/post/#comments", "index.html"))
+        self.assertEqual("blog/tom/images/a b.png", url_to_path("images/a%20b.png", "blog/tom/index.html"))
+        self.assertEqual("about.html", url_to_path("../../about.html?x=1", "blog/tom/index.html"))
+        self.assertEqual("", url_to_path("/", "blog/tom/index.html"))
+
+    def test_target_exists(self):
+        targets = {"index.html", "blog/post/index.html", "about.html", "index.css"}
+        for path in ("", "blog/post", "about", "about.html", "index.css"):
+            self.assertTrue(target_exists(path, targets), path)
+        for path in ("blog", "contact", "blog/post.html"):
+            self.assertFalse(target_exists(path, targets), path)
+
+
+class TestLinkCheckBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        self.templates = self.root / "templates"
+        self.dest = self.root / "docs"
+        (self.content / "blog").mkdir(parents=True)
+        self.templates.mkdir()
+        (self.templates / TEMPLATE_NAME).write_text("{{ content }}")
+        (self.content / "index.md").write_text(
+            "# Home\n\n[Post](/blog/post) and [missing](/missing)\n\n"
+            "a paragraph\nwith an ![image](/images/gone.png)\n\n[Home](/) [Site](https://www.boot.dev)"
+        )
+        (self.content / "blog" / "post.md").write_text("# Post\n\n[Back](../index.html) [Up](..)")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, manifest: BuildManifest, cache: BlockCache | None = None) -> list:
+        generate_page_recursive(self.content, load_template(self.templates), self.dest, "/site/", manifest, cache=cache)
+        return find_broken_links(manifest, self.dest)
+
+    def test_broken_links(self):
+        manifest = BuildManifest("", "/site/")
+        checked, broken = self.build(manifest)
+        self.assertEqual(6, checked)
+        source = str(self.content / "index.md")
+        self.assertEqual([(source, 3, "/missing"), (source, 5, "/images/gone.png")],
+                         [(link.source, link.line, link.url) for link in broken])
+
+    def test_check_links_exact_line(self):
+        manifest = BuildManifest("", "/site/")
+        self.build(manifest)
+        broken = check_links(manifest, self.dest)
+        self.assertEqual([3, 6], [link.line for link in broken])
+
+    def test_fresh_pages_keep_links(self):
+        previous = BuildManifest("", "/site/")
+        self.build(previous)
+        manifest = BuildManifest("", "/site/")
+        generate_page_recursive(self.content, load_template(self.templates), self.dest, "/site/", manifest, previous)
+        self.assertEqual(previous.pages, manifest.pages)
+        self.assertEqual(2, len(find_broken_links(manifest, self.dest)[1]))
+
+    def test_cached_blocks_keep_links(self):
+        cache = BlockCache.open(self.root / "blocks.sqlite")
+        self.build(BuildManifest("", "/site/"), cache)
+        manifest = BuildManifest("", "/site/")
+        checked, broken = self.build(manifest, cache)
+        self.assertGreater(cache.stats.hits, 0)
+        self.assertEqual(6, checked)
+        self.assertEqual(2, len(broken))
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from manifest import BuildManifest, PageRecord, hash_bytes
+
+
+class TestBuildManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_save_and_load(self):
+        path = self.root / "manifest.json"
+        manifest = BuildManifest("abc", "/")
+        manifest.add_page(Path("content/index.md"), Path("docs/index.html"), "123")
+        manifest.add_static(Path("static/index.css"), Path("docs/index.css"))
+        manifest.compressed["docs/index.html"] = "456"
+        manifest.gzip_level = 9
+        manifest.compact = True
+        manifest.search = True
+        manifest.generated.append("docs/search/index.json")
+        manifest.save(path)
+        self.assertEqual(BuildManifest.load(path), manifest)
+
+    def test_load_missing(self):
+        self.assertIsNone(BuildManifest.load(self.root / "missing.json"))
+
+    def test_load_old_version(self):
+        path = self.root / "manifest.json"
+        path.write_text(json.dumps({"version": 0, "template_hash": "", "base_path": "/", "pages": {}}))
+        self.assertIsNone(BuildManifest.load(path))
+
+    def test_load_corrupt(self):
+        path = self.root / "manifest.json"
+        path.write_text("{not json")
+        self.assertIsNone(BuildManifest.load(path))
+
+    def test_matches(self):
+        manifest = BuildManifest("abc", "/")
+        self.assertTrue(manifest.matches(BuildManifest("abc", "/")))
+        self.assertFalse(manifest.matches(BuildManifest("abd", "/")))
+        self.assertFalse(manifest.matches(BuildManifest("abc", "/site/")))
+
+    def test_is_fresh(self):
+        dest = self.root / "index.html"
+        source = Path("content/index.md")
+        manifest = BuildManifest("abc", "/")
+        manifest.add_page(source, dest, hash_bytes(b"# Title"))
+        # output was never written
+        self.assertFalse(manifest.is_fresh(source, dest, hash_bytes(b"# Title")))
+        dest.write_text("<html></html>")
+        self.assertTrue(manifest.is_fresh(source, dest, hash_bytes(b"# Title")))
+        self.assertFalse(manifest.is_fresh(source, dest, hash_bytes(b"# Changed")))
+        self.assertFalse(manifest.is_fresh(Path("content/other.md"), dest, hash_bytes(b"# Title")))
+
+    def test_stale_outputs(self):
+        previous = BuildManifest("abc", "/", {
+            "content/index.md": PageRecord("1", "docs/index.html"),
+            "content/old/index.md": PageRecord("2", "docs/old/index.html"),
+        }, {"docs/old.png": "static/old.png", "docs/index.css": "static/index.css"})
+        current = BuildManifest("abc", "/", {
+            "content/index.md": PageRecord("1", "docs/index.html"),
+        }, {"docs/index.css": "static/index.css"})
+        self.assertListEqual([Path("docs/old/index.html"), Path("docs/old.png")], previous.stale_outputs(current))
+
+    def test_stale_sidecars(self):
+        previous = BuildManifest("abc", "/", {
+            "content/index.md": PageRecord("1", "docs/index.html"),
+        }, compressed={"docs/index.html": "1"}, gzip_level=9)
+        # built again without --gzip
+        current = BuildManifest("abc", "/", {
+            "content/index.md": PageRecord("1", "docs/index.html"),
+        })
+        self.assertListEqual([Path("docs/index.html.gz")], previous.stale_outputs(current))
+
+
+if __name__ == "__main__":
+    unittest.main()
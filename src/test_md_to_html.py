@@ -4,9 +4,9 @@ from md_to_html import (extract_markdown_links, extract_markdown_images,
                         split_nodes_delimiter, text_to_textnodes,
                         markdown_to_blocks, block_to_block_type,
                         block_to_html_node, markdown_to_html_node,
-                        extract_title
+                        extract_title, parse_blocks
                         )
-from htmlnode import ParentNode, LeafNode, TextType, TextNode, BlockType
+from htmlnode import ParentNode, LeafNode, TextType, TextNode, Block, BlockType, UrlResolver
 
 
 class TestMDtoHTMLNode(unittest.TestCase):
@@ -595,6 +595,39 @@ class TestMDtoHTMLNode(unittest.TestCase):
             new_nodes
         )
 
+    def test_split_code_inside_italic(self):
+        text = "An _italic `not code`_ text"
+        new_nodes = text_to_textnodes(text)
+        self.assertListEqual(
+            [
+                TextNode("An ", TextType.TEXT),
+                TextNode("italic `not code`", TextType.ITALIC),
+                TextNode(" text", TextType.TEXT),
+            ],
+            new_nodes
+        )
+
+    def test_split_italic_inside_code(self):
+        self.assertRaises(SyntaxError, text_to_textnodes, "`code _not italic_`")
+
+    def test_split_bold_inside_italic(self):
+        self.assertRaises(SyntaxError, text_to_textnodes, "_italic **bold** italic_")
+
+    def test_split_delimiter_around_link(self):
+        self.assertRaises(SyntaxError, text_to_textnodes, "**bold [link](https://x.y) bold**")
+
+    def test_split_empty_delimiters(self):
+        self.assertListEqual(
+            [
+                TextNode("empty", TextType.TEXT),
+                TextNode(" bold", TextType.TEXT)
+            ],
+            text_to_textnodes("empty**** bold")
+        )
+
+    def test_split_empty_text(self):
+        self.assertListEqual([TextNode("", TextType.TEXT)], text_to_textnodes(""))
+
     # markdown_to_blocks() testcases
     def test_markdown_to_blocks(self):
         md = """
@@ -662,6 +695,32 @@ This is the same paragraph on a new line
             ],
         )
 
+    def test_markdown_to_blocks_code_with_blank_lines(self):
+        md = "```\nfirst\n\n\nsecond\n```\n\nparagraph"
+        blocks = markdown_to_blocks(md)
+        self.assertEqual(blocks, ["```\nfirst\n\n\nsecond\n```", "paragraph"])
+
+    # parse_blocks() testcases
+
+    def test_parse_blocks(self):
+        lines = iter(["# Title\n", "\n", "- one\n", "- two\n", "\n", "\n", "1. first\n", "   \n", "\n", "> quote"])
+        self.assertListEqual(
+            [
+                Block("# Title", BlockType.HEADING, 1),
+                Block("- one\n- two", BlockType.ULIST, 3),
+                Block("1. first", BlockType.OLIST, 7),
+                Block("> quote", BlockType.QUOTE, 10),
+            ],
+            list(parse_blocks(lines))
+        )
+
+    def test_parse_blocks_is_lazy(self):
+        def lines():
+            yield "first block\n"
+            yield "\n"
+            raise AssertionError("read past the first block")
+        self.assertEqual(Block("first block", BlockType.PARAGRAPH, 1), next(parse_blocks(lines())))
+
     # block_to_block_type() testcases
 
     def test_block_heading(self):
@@ -704,6 +763,12 @@ This is the same paragraph on a new line
         blocktype = block_to_block_type(text)
         self.assertEqual(BlockType.OLIST, blocktype)
 
+    def test_block_olist_two_digits(self):
+        text = "\n".join(f"{idx}. item {idx}" for idx in range(1, 12))
+        result = block_to_html_node(text, BlockType.OLIST)
+        children = [ParentNode('li', [LeafNode(None, f'item {idx}')]) for idx in range(1, 12)]
+        self.assertEqual(ParentNode('ol', children), result)
+
     def test_block_paragraph(self):
         text = "This is just a paragraph"
         blocktype = block_to_block_type(text)
@@ -755,6 +820,11 @@ This is the same paragraph on a new line
         ]
         self.assertEqual(ParentNode('h2', children), result)
 
+    def test_block_heading_hash_in_text(self):
+        text = '# C# and F#'
+        result = block_to_html_node(text, BlockType.HEADING)
+        self.assertEqual(ParentNode('h1', [LeafNode(None, 'C# and F#')]), result)
+
     def test_block_code(self):
         text = '``` This is a code block ```'
         result = block_to_html_node(text, BlockType.CODE)
@@ -798,6 +868,11 @@ the **same** even with inline stuff
         ]
         self.assertEqual(ParentNode('blockquote', children), result)
 
+    def test_block_quote_empty_lines(self):
+        text = ">   quote 1\n>\n>  \n> quote 2\n>"
+        result = block_to_html_node(text, BlockType.QUOTE)
+        self.assertEqual(ParentNode('blockquote', [LeafNode(None, 'quote 1\nquote 2')]), result)
+
     def test_block_ulist(self):
         text = """
 - item 1
@@ -896,6 +971,22 @@ the **same** even with inline stuff
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+    def test_base_path_only_rewrites_urls(self):
+        md = """
+[Post](/blog/post) and ![Logo](/logo.png) but not `href="/blog"`
+
+```
+<a href="/blog">src="/logo.png"</a>
+```
+"""
+        node = markdown_to_html_node(md, UrlResolver("/site/"))
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            '<div><p><a href="/site/blog/post">Post</a> and <img src="/site/logo.png" alt="Logo"> but not <code>href="/blog"</code></p>'
+            '<pre><code><a href="/blog">src="/logo.png"</a>\n</code></pre></div>',
+        )
+
     def test_heading_with_paragraphs(self):
         md = """
 ### This is an h3 heading
@@ -0,0 +1,119 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from generate import TEMPLATE_NAME, discover_pages, generate_page_recursive, load_template
+from links import find_broken_links
+from manifest import BuildManifest
+from metadata import parse_yaml, read_front_matter, read_header, write_page_index
+
+PAGE = """---
+title: "The Shire: a guide"
+date: 2024-05-01
+tags: [hobbits, maps]
+authors:
+  - Bilbo
+  - Frodo
+draft: false
+---
+
+# Shire
+
+[Missing](/missing)
+"""
+
+
+class TestFrontMatter(unittest.TestCase):
+
+    def test_parse_yaml(self):
+        meta, first_line, number = read_header(iter(PAGE.splitlines(True)))
+        self.assertEqual({"title": "The Shire: a guide", "date": "2024-05-01", "tags": ["hobbits", "maps"],
+                          "authors": ["Bilbo", "Frodo"], "draft": False}, meta)
+        self.assertEqual(("# Shire\n", 11), (first_line, number))
+
+    def test_parse_toml(self):
+        lines = iter(['+++\n', 'title = "Bree"\n', 'date = 2024-05-01\n', 'weight = 3\n', '+++\n', '# Bree\n'])
+        self.assertEqual(({"title": "Bree", "date": "2024-05-01", "weight": 3}, "# Bree\n", 6), read_header(lines))
+
+    def test_no_front_matter(self):
+        lines = iter(["# Home\n", "\n", "text\n"])
+        self.assertEqual(({}, "# Home\n", 1), read_header(lines))
+        self.assertEqual(["\n", "text\n"], list(lines))
+
+    def test_reads_header_only(self):
+        lines = iter(PAGE.splitlines(True))
+        read_header(lines)
+        self.assertEqual("\n", next(lines))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, read_header, iter(["---\n", "title: Home\n", "# Home\n"]))
+        self.assertRaises(ValueError, parse_yaml, "just text")
+        self.assertRaises(ValueError, read_header, iter(["+++\n", "title = \n", "+++\n"]))
+
+
+class TestFrontMatterBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        self.templates = self.root / "templates"
+        self.dest = self.root / "docs"
+        self.content.mkdir()
+        self.templates.mkdir()
+        (self.templates / TEMPLATE_NAME).write_text(
+            "<title>{{ title }}</title><p>{{ meta.date }} {{ meta.tags | join(',') }}</p>{{ content }}"
+        )
+        (self.content / "shire.md").write_text(PAGE)
+        (self.content / "index.md").write_text("# Home\n\n[Shire](/shire)")
+        (self.content / "moria.md").write_text("---\ndraft: true\n---\n# Moria")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, manifest: BuildManifest | None = None, previous: BuildManifest | None = None,
+              drafts: bool = False) -> None:
+        generate_page_recursive(self.content, load_template(self.templates), self.dest, "/", manifest, previous,
+                                drafts=drafts)
+
+    def test_drafts_skipped(self):
+        self.assertCountEqual([self.content / "shire.md", self.content / "index.md"],
+                              [source for source, _ in discover_pages(self.content, self.dest)])
+        self.assertEqual(3, len(discover_pages(self.content, self.dest, drafts=True)))
+        self.build()
+        self.assertFalse((self.dest / "moria.html").exists())
+        self.build(drafts=True)
+        self.assertTrue((self.dest / "moria.html").exists())
+
+    def test_template_data(self):
+        self.build()
+        page = (self.dest / "shire.html").read_text()
+        self.assertTrue(page.startswith("<title>The Shire: a guide</title><p>2024-05-01 hobbits,maps</p>"), page)
+        self.assertIn("<h1>Shire</h1>", page)
+
+    def test_link_lines(self):
+        manifest = BuildManifest("", "/")
+        self.build(manifest)
+        self.assertEqual(13, find_broken_links(manifest, self.dest)[1][0].line)
+
+    def test_page_index(self):
+        previous = BuildManifest("", "/")
+        self.build(previous)
+        manifest = BuildManifest("", "/")
+        # the pages aren't rendered again, their metadata comes from the previous manifest
+        self.build(manifest, previous)
+        index = json.loads(write_page_index(manifest, self.dest).read_text())
+        self.assertEqual([
+            {"url": "/shire.html", "title": "The Shire: a guide", "date": "2024-05-01", "tags": ["hobbits", "maps"],
+             "authors": ["Bilbo", "Frodo"], "draft": False},
+            {"url": "/", "title": "Home"},
+        ], index)
+
+    def test_read_front_matter(self):
+        self.assertEqual({"draft": True}, read_front_matter(self.content / "moria.md"))
+        self.assertEqual({}, read_front_matter(self.content / "index.md"))
+
+
+if __name__ == "__main__":
+    unittest.main()
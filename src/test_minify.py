@@ -0,0 +1,172 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from arena import DocumentArena
+from generate import (TEMPLATE_NAME, PageStats, discover_pages, generate_page_recursive, generate_pages_parallel,
+                      iter_page, load_template)
+from htmlnode import LeafNode, ParentNode
+from md_to_html import markdown_to_arena, markdown_to_html_node
+from minify import MarkupCompactor, compact_savings, is_compact
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <title>{{ title }}</title>
+    <link href="{{ base_path }}index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <p>Written   by <b>me</b> <i>{{ title }}</i></p>
+    <pre>  keep
+    this  </pre>
+    <article>{{ content }}</article>
+  </body>
+</html>"""
+
+MARKDOWN = """# Title   with  **bold**
+
+A [link](/blog/post) and ![an image](/images/post.png)
+over two lines
+
+```
+code   **stays**
+  indented
+```
+
+- one  item
+- `code  span`
+"""
+
+
+class TestCompactNodes(unittest.TestCase):
+
+    def test_leaf(self):
+        node = LeafNode('a', "a   link\n", {"href": "/blog/post", "title": "two words"})
+        self.assertEqual('<a href=/blog/post title="two words">a link </a>', node.to_html(compact=True))
+        self.assertEqual('<a href="/blog/post" title="two words">a   link\n</a>', node.to_html())
+
+    def test_preserved(self):
+        node = ParentNode('div', [
+            ParentNode('pre', [LeafNode('code', "x  =\n  1")]),
+            LeafNode(None, "after  pre"),
+        ])
+        self.assertEqual('<div><pre><code>x  =\n  1</code></pre>after pre</div>', node.to_html(compact=True))
+
+    def test_empty_value_keeps_quotes(self):
+        node = LeafNode('img', '', {"src": "/a.png", "alt": ""})
+        self.assertEqual('<img src=/a.png alt="">', node.to_html(compact=True))
+
+    def test_arena_matches_nodes(self):
+        arena = markdown_to_arena(MARKDOWN)
+        html = arena.to_html(compact=True)
+        self.assertEqual(markdown_to_html_node(MARKDOWN).to_html(compact=True), html)
+        self.assertEqual(len(arena.to_html()) - len(html), arena.saved)
+        self.assertIn('<pre><code>code   **stays**\n  indented\n</code></pre>', html)
+        self.assertIn('<code>code  span</code>', html)
+
+    def test_arena_saved_cleared(self):
+        arena = DocumentArena()
+        arena.leaf('p', arena.add_text("a  b"), 4)
+        arena.to_html(compact=True)
+        self.assertEqual(1, arena.saved)
+        arena.clear()
+        self.assertEqual(0, arena.saved)
+
+
+class TestMarkupCompactor(unittest.TestCase):
+
+    def test_whitespace_between_tags(self):
+        compactor = MarkupCompactor()
+        self.assertEqual('<ul><li>one</li><li>two</li></ul><b>a</b> <i>b</i>',
+                         compactor.feed('<ul>\n  <li>one</li>\n  <li>two</li>\n</ul>\n<b>a</b>\n<i>b</i>'))
+
+    def test_split_tag(self):
+        compactor = MarkupCompactor()
+        self.assertEqual('<a title="a  ', compactor.feed('<a title="a  '))
+        compactor.interrupt()
+        self.assertEqual('  b">x y</a>', compactor.feed('  b">x  \n y</a>'))
+
+    def test_unquoted_attributes(self):
+        compactor = MarkupCompactor()
+        self.assertEqual('<meta charset=utf-8 /><meta name=viewport content="width=device-width, a=1" />'
+                         '<img alt="" src="a.png"/><a href=/blog/>x</a>',
+                         compactor.feed('<meta charset="utf-8" /><meta name="viewport" '
+                                        'content="width=device-width, a=1" /><img alt="" src="a.png"/>'
+                                        '<a href="/blog/">x</a>'))
+        # only the values the template writes out, not the ones around a variable
+        self.assertEqual('<link href="', compactor.feed('<link href="'))
+        compactor.interrupt()
+        self.assertEqual('" rel=stylesheet class="', compactor.feed('" rel="stylesheet" class="'))
+        compactor.interrupt()
+        self.assertEqual('" />', compactor.feed('" />'))
+        # script and style text isn't markup, comments stay as written
+        self.assertEqual('<script>let a = \'<b class="x">\';</script><!-- <b class="x"> -->',
+                         compactor.feed('<script>let a = \'<b class="x">\';</script><!-- <b class="x"> -->'))
+
+    def test_next_to_variable(self):
+        compactor = MarkupCompactor()
+        self.assertEqual('<p>Hi ', compactor.feed('<p>Hi   '))
+        compactor.interrupt()
+        self.assertEqual(' !</p>', compactor.feed('\n !</p>'))
+
+    def test_preserved(self):
+        compactor = MarkupCompactor()
+        self.assertEqual('<pre> a\n  b </pre><p>',
+                         compactor.feed('<pre> a\n  b </pre>\n<p>'))
+        self.assertEqual('<script>\n  let a;\n</script><p>',
+                         compactor.feed('<script>\n  let a;\n</script>\n  <p>'))
+
+
+class TestCompactBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        self.templates = self.root / "templates"
+        self.content.mkdir()
+        self.templates.mkdir()
+        (self.templates / TEMPLATE_NAME).write_text(TEMPLATE)
+        (self.content / "index.md").write_text(MARKDOWN)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_template(self):
+        template = load_template(self.templates, self.root / "cache", compact=True)
+        self.assertTrue(is_compact(template))
+        self.assertFalse(is_compact(load_template(self.templates, self.root / "cache")))
+        self.assertEqual(
+            '<!doctype html><html><head><title>T</title><link href="/index.css" rel=stylesheet /></head>'
+            '<body><p>Written by <b>me</b> <i>T</i></p><pre>  keep\n    this  </pre><article>x</article>'
+            '</body></html>',
+            template.render(title="T", base_path="/", content="x")
+        )
+        normal = load_template(self.templates).render(title="T", base_path="/", content="x")
+        self.assertEqual(len(normal) - len(template.render(title="T", base_path="/", content="x")),
+                         compact_savings(template))
+
+    def test_bytecode_cache_keeps_modes_apart(self):
+        cache = self.root / "cache"
+        load_template(self.templates, cache)
+        compact = load_template(self.templates, cache, compact=True)
+        self.assertNotIn('\n  <head>', compact.render(title="T", base_path="/", content="x"))
+
+    def test_page_savings(self):
+        normal = ''.join(iter_page(MARKDOWN.splitlines(True), load_template(self.templates), "/site/"))
+        stats = PageStats()
+        template = load_template(self.templates, compact=True)
+        compact = ''.join(iter_page(MARKDOWN.splitlines(True), template, "/site/", stats=stats))
+        self.assertEqual(len(normal) - len(compact), stats.saved)
+        self.assertIn('<a href=/site/blog/post>link</a>', compact)
+
+    def test_parallel_matches_serial(self):
+        serial = self.root / "serial"
+        parallel = self.root / "parallel"
+        generate_page_recursive(self.content, load_template(self.templates, compact=True), serial, "/")
+        generate_pages_parallel(discover_pages(self.content, parallel), self.templates, None, "/", 2, compact=True)
+        self.assertEqual((serial / "index.html").read_text(), (parallel / "index.html").read_text())
+
+
+if __name__ == "__main__":
+    unittest.main()
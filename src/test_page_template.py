@@ -0,0 +1,79 @@
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from jinja2 import Template
+from generate import TEMPLATE_NAME, load_template, streams_content
+from jinja_template import load_jinja_template
+from minify import compact_savings, is_compact
+from page_template import SimpleTemplate
+
+REPO_TEMPLATE = Path(__file__).resolve().parent.parent / "templates" / TEMPLATE_NAME
+DATA = {"title": "Tom", "base_path": "/site/", "content": "<p>body</p>", "meta": {"date": "2024"},
+        "asset": lambda path: f"/site/{path}"}
+
+
+class TestSimpleTemplate(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.templates = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, source: str) -> None:
+        (self.templates / TEMPLATE_NAME).write_text(source)
+
+    def test_parse(self):
+        template = SimpleTemplate.parse("<title>{{ title }}</title>{{content}}\n", "t.html")
+        self.assertEqual(["<title>", "</title>", ""], template.literals)
+        self.assertEqual(["title", "content"], template.names)
+        template = SimpleTemplate.parse("{{ asset('index.css') }} {{asset( \"a b.png\" )}}", "t.html")
+        self.assertEqual(["asset", "asset"], template.names)
+        self.assertEqual(["index.css", "a b.png"], template.args)
+        self.assertEqual("/site/index.css /site/a b.png", template.render(DATA))
+        self.assertRaises(ValueError, template.render, {})
+        for source in ("{{ content|safe }}", "{% if x %}{% endif %}", "{# note #}", "{{ meta.date }}",
+                       "{{ true }}", "{{- title }}", "{{ range }}", "{{ asset(path) }}", "{{ asset('a', 'b') }}"):
+            self.assertIsNone(SimpleTemplate.parse(source, "t.html"), source)
+
+    def test_renders_like_jinja(self):
+        for source in (REPO_TEMPLATE.read_text(), "a {{ title }}\r\nb {{ missing }} {{ title }}\n\n", "{{ meta }}",
+                       "<img src=\"{{ asset('tom.png') }}\">"):
+            self.write(source)
+            template = load_template(self.templates)
+            self.assertIsInstance(template, SimpleTemplate)
+            jinja = load_jinja_template(self.templates, TEMPLATE_NAME)
+            self.assertEqual(jinja.render(DATA), template.render(DATA))
+            self.assertEqual(jinja.render(**DATA), template.render(**DATA))
+
+    def test_compact_like_jinja(self):
+        self.write(REPO_TEMPLATE.read_text())
+        template = load_template(self.templates, compact=True)
+        jinja = load_jinja_template(self.templates, TEMPLATE_NAME, compact=True)
+        self.assertTrue(is_compact(template))
+        self.assertEqual(jinja.render(DATA), template.render(DATA))
+        self.assertEqual(compact_savings(jinja), compact_savings(template))
+        self.assertFalse(is_compact(load_template(self.templates)))
+
+    def test_falls_back_to_jinja(self):
+        self.write("{% for tag in meta.tags %}{{ tag }} {% endfor %}{{ content }}")
+        template = load_template(self.templates)
+        self.assertIsInstance(template, Template)
+        self.assertEqual("a b <p>x</p>", template.render(meta={"tags": ["a", "b"]}, content="<p>x</p>"))
+        self.assertTrue(streams_content(template))
+        self.write("{{ content }}{{ content }}")
+        self.assertFalse(streams_content(load_template(self.templates)))
+
+    def test_build_does_not_import_jinja(self):
+        code = "import sys, build; print(sorted({'jinja2', 'asyncio', 'multiprocessing'} & sys.modules.keys()))"
+        result = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parent,
+                                capture_output=True, text=True, check=True)
+        self.assertEqual("[]", result.stdout.strip())
+
+
+if __name__ == "__main__":
+    unittest.main()
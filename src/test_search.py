@@ -0,0 +1,139 @@
+import json
+import tempfile
+import unittest
+from collections import Counter
+from pathlib import Path
+
+from block_cache import BlockCache
+from generate import TEMPLATE_NAME, generate_page_recursive, load_template
+from search import INDEX_NAME, LOADER_NAME, SEARCH_FOLDER, SearchIndex, tokenize
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.dest = self.root / "docs"
+        self.cache = self.root / "search.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_index(self) -> dict[str, object]:
+        folder = self.dest / SEARCH_FOLDER
+        return {path.name: path.read_text() for path in folder.iterdir()}
+
+    def test_tokenize(self):
+        self.assertEqual(["the", "ring", "of", "power", "élan", "42"], tokenize("The Ring of Power: a élan, 42!"))
+
+    def test_write(self):
+        index = SearchIndex.create(self.dest, "/site/")
+        index.add_page(Path("content/index.md"), self.dest / "index.html", "Home", Counter(["ring", "ring", "power"]))
+        index.add_page(Path("content/blog/post.md"), self.dest / "blog" / "post" / "index.html", "Post",
+                       Counter(["rivendell", "ring"]))
+        outputs = index.write()
+        folder = self.dest / SEARCH_FOLDER
+        self.assertCountEqual([folder / INDEX_NAME, folder / LOADER_NAME, folder / "ri.json", folder / "po.json"],
+                              outputs)
+        self.assertEqual({"ring": [[0, 2], [1, 1]], "rivendell": [[1, 1]]},
+                         json.loads((folder / "ri.json").read_text()))
+        self.assertEqual({"prefix": 2, "docs": [["/site/", "Home"], ["/site/blog/post/", "Post"]], "shards": ["po", "ri"]},
+                         json.loads((folder / INDEX_NAME).read_text()))
+
+    def test_incremental_matches_full(self):
+        pages = {
+            "a.md": Counter(["ring", "power"]),
+            "b.md": Counter(["ring", "rivendell"]),
+            "c.md": Counter(["shire"]),
+        }
+        index = SearchIndex.create(self.dest)
+        for source, terms in pages.items():
+            index.add_page(Path(source), self.dest / f"{source[0]}.html", source, terms)
+        index.write()
+        index.save(self.cache)
+
+        pages["b.md"] = Counter(["ring", "moria"])
+        del pages["a.md"]
+        index = SearchIndex.load(self.cache, self.dest)
+        index.add_page(Path("b.md"), self.dest / "b.html", "b.md", pages["b.md"])
+        index.remove_missing(pages)
+        index.write()
+        incremental = self.read_index()
+
+        full = SearchIndex.create(self.dest)
+        full.add_page(Path("placeholder.md"), self.dest / "a.html", "", Counter())
+        full.add_page(Path("b.md"), self.dest / "b.html", "b.md", pages["b.md"])
+        full.add_page(Path("c.md"), self.dest / "c.html", "c.md", pages["c.md"])
+        full.remove_missing({"b.md", "c.md"})
+        full.write()
+        self.assertEqual(self.read_index(), incremental)
+        self.assertFalse((self.dest / SEARCH_FOLDER / "po.json").exists())
+
+    def test_removed_ids_are_reused(self):
+        index = SearchIndex.create(self.dest)
+        index.add_page(Path("a.md"), self.dest / "a.html", "a", Counter(["ring"]))
+        index.add_page(Path("b.md"), self.dest / "b.html", "b", Counter(["ring"]))
+        index.write()
+        index.save(self.cache)
+        index = SearchIndex.load(self.cache, self.dest)
+        index.remove_missing({"b.md"})
+        index.write()
+        index.add_page(Path("c.md"), self.dest / "c.html", "c", Counter(["ring"]))
+        self.assertEqual(0, index.pages["c.md"].id)
+
+    def test_load_needs_written_index(self):
+        index = SearchIndex.create(self.dest)
+        index.add_page(Path("a.md"), self.dest / "a.html", "a", Counter(["ring"]))
+        index.write()
+        index.save(self.cache)
+        self.assertIsNotNone(SearchIndex.load(self.cache, self.dest))
+        (self.dest / SEARCH_FOLDER / INDEX_NAME).unlink()
+        self.assertIsNone(SearchIndex.load(self.cache, self.dest))
+
+
+class TestSearchBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        self.templates = self.root / "templates"
+        self.dest = self.root / "docs"
+        self.content.mkdir()
+        self.templates.mkdir()
+        (self.templates / TEMPLATE_NAME).write_text("{{ content }}")
+        (self.content / "index.md").write_text(
+            "# Home Page\n\nThe **ring** and [the shire](/shire) ![a map](/map.png)\n\n- ring\n- moria\n\n"
+            "```\ncode_only\n```"
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, cache: BlockCache | None = None) -> SearchIndex:
+        index = SearchIndex.create(self.dest)
+        generate_page_recursive(self.content, load_template(self.templates), self.dest, "/", cache=cache, search=index)
+        return index
+
+    def test_page_terms(self):
+        index = self.build()
+        terms = Counter({"the": 2, "ring": 2, "home": 1, "page": 1, "and": 1, "shire": 1, "map": 1, "moria": 1,
+                         "code_only": 1})
+        self.assertEqual(terms, index.new_terms[0])
+        self.assertEqual("Home Page", index.pages[str(self.content / "index.md")].title)
+
+    def test_cached_blocks(self):
+        cache = BlockCache.open(self.root / "blocks.sqlite")
+        # stored without their text, the blocks are rendered again for the index
+        generate_page_recursive(self.content, load_template(self.templates), self.dest, "/", cache=cache)
+        expected = self.build().new_terms[0]
+        self.assertEqual(expected, self.build(cache).new_terms[0])
+        hits = cache.stats.hits
+        self.assertEqual(expected, self.build(cache).new_terms[0])
+        self.assertEqual(hits + 4, cache.stats.hits)
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from manifest import BuildManifest
+from merge import find_conflicts, load_shards
+from shard import Shard, shard_of
+
+SRC_PATH = Path(__file__).resolve().parent
+REPO_PATH = SRC_PATH.parent
+
+
+def run(script: str, *args: str, cwd: Path) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, str(SRC_PATH / script), *args], cwd=cwd,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+
+def wait(process: subprocess.Popen) -> str:
+    output = process.communicate()[0]
+    if process.returncode != 0:
+        raise AssertionError(output)
+    return output
+
+
+def read_tree(root: Path) -> dict[str, bytes]:
+    return {path.relative_to(root).as_posix(): path.read_bytes() for path in root.rglob('*') if path.is_file()}
+
+
+class TestShard(unittest.TestCase):
+
+    def test_parse(self):
+        self.assertEqual(Shard(2, 4), Shard.parse("2/4"))
+        self.assertEqual("2/4", str(Shard.parse(" 2/4 ")))
+        self.assertEqual(Path("shards/2-of-4/docs"), Shard(2, 4).public_path)
+        for text in ("0/4", "5/4", "1", "a/b", "1/0"):
+            self.assertRaises(ValueError, Shard.parse, text)
+
+    def test_every_path_in_one_shard(self):
+        paths = [Path(f"blog/post-{idx}/index.md") for idx in range(200)]
+        shards = [Shard(index, 4) for index in range(1, 5)]
+        for path in paths:
+            self.assertEqual(1, sum(shard.owns(path) for shard in shards))
+        # the same in every process, the shards of one site can be built on different machines
+        self.assertEqual(1, shard_of(Path("blog/tom/index.md"), 4))
+        self.assertTrue(all(sum(shard.owns(path) for path in paths) > 20 for shard in shards))
+
+
+class TestShardedBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.full = self.root / "full"
+        self.sharded = self.root / "sharded"
+        for site in (self.full, self.sharded):
+            for folder in ("content", "static", "templates"):
+                shutil.copytree(REPO_PATH / folder, site / folder)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build_shards(self, count: int) -> None:
+        # every shard in its own process at the same time, like on separate machines
+        shards = [run("main.py", "/site/", "--shard", f"{index}/{count}", cwd=self.sharded)
+                  for index in range(1, count + 1)]
+        for process in shards:
+            wait(process)
+
+    def test_merge_matches_full_build(self):
+        wait(run("main.py", "/site/", "--page-index", cwd=self.full))
+        self.build_shards(3)
+        output = wait(run("merge.py", "--page-index", cwd=self.sharded))
+        self.assertIn("0 broken", output)
+        self.assertEqual(read_tree(self.full / "docs"), read_tree(self.sharded / "docs"))
+        full = BuildManifest.load(self.full / ".cache" / "manifest.json")
+        merged = BuildManifest.load(self.sharded / ".cache" / "manifest.json")
+        self.assertEqual({source: (record.links, record.meta, record.images) for source, record in full.pages.items()},
+                         {source: (record.links, record.meta, record.images) for source, record in merged.pages.items()})
+        # the merged manifest is the one the full build wrote, nothing is rendered again
+        output = wait(run("main.py", "/site/", cwd=self.sharded))
+        self.assertNotIn("Generating page", output)
+
+    def test_conflicts(self):
+        # b.md and b.html are in different shards of two but are both written to docs/b.html
+        (self.sharded / "content" / "b.md").write_text("# B")
+        (self.sharded / "static" / "b.html").write_text("<p>b</p>")
+        self.build_shards(2)
+        shards = load_shards([self.sharded / "shards" / "1-of-2", self.sharded / "shards" / "2-of-2"])
+        self.assertEqual(["'b.html' is written from 'content/b.md' by shard 1/2 "
+                          "and from 'static/b.html' by shard 2/2"], find_conflicts(shards))
+        self.assertEqual(["shard 2/2 is missing"], find_conflicts(shards[:1]))
+        shards[1][1].base_path = "/other/"
+        self.assertIn("shard 2/2 was built with another template or options than shard 1/2",
+                      find_conflicts(shards))
+        process = run("merge.py", cwd=self.sharded)
+        self.assertIn("CONFLICT: 'b.html'", process.communicate()[0])
+        self.assertEqual(1, process.returncode)
+        self.assertFalse((self.sharded / "docs").exists())
+        self.assertIsNone(BuildManifest.load(self.sharded / ".cache" / "manifest.json"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from generate import TEMPLATE_NAME, load_template
+from manifest import BuildManifest
+from watch import SiteWatcher, WatchedTree, watched_trees
+
+
+class TestWatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        (self.root / "blog").mkdir()
+        (self.root / "index.md").write_text("# Home")
+        (self.root / "blog" / "post.md").write_text("# Post")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_scan(self):
+        tree = WatchedTree.scan(self.root)
+        self.assertCountEqual([str(self.root / "index.md"), str(self.root / "blog" / "post.md")], tree.files)
+        self.assertEqual(([], []), tree.changes())
+
+    def test_changes(self):
+        tree = WatchedTree.scan(self.root)
+        (self.root / "index.md").write_text("# Home page")
+        os.utime(self.root / "index.md", ns=(0, 0))
+        (self.root / "blog" / "post.md").unlink()
+        (self.root / "blog" / "new.md").write_text("# New")
+        changed, removed = tree.changes()
+        self.assertCountEqual([self.root / "index.md", self.root / "blog" / "new.md"], changed)
+        self.assertListEqual([self.root / "blog" / "post.md"], removed)
+        self.assertEqual(([], []), tree.changes())
+
+    def test_folders(self):
+        tree = WatchedTree.scan(self.root)
+        (self.root / "docs" / "guide").mkdir(parents=True)
+        (self.root / "docs" / "guide" / "start.md").write_text("# Start")
+        shutil.rmtree(self.root / "blog")
+        self.assertEqual(([self.root / "docs" / "guide" / "start.md"], [self.root / "blog" / "post.md"]),
+                         tree.changes())
+
+    def test_saved_through_rename(self):
+        tree = WatchedTree.scan(self.root)
+        (self.root / "blog" / "post.md.tmp").write_text("# Post saved")
+        os.replace(self.root / "blog" / "post.md.tmp", self.root / "blog" / "post.md")
+        self.assertEqual(([self.root / "blog" / "post.md"], []), tree.changes())
+
+    def test_sweep(self):
+        for i in range(4):
+            (self.root / f"page-{i}.md").write_text("# Page")
+        tree = WatchedTree.scan(self.root)
+        paths = sorted(tree.files)
+        for path in paths:
+            Path(path).write_text("# Edited")
+            os.utime(path, ns=(0, 0))
+        # edits in place are found a slice at a time, every file within a full sweep
+        with patch("watch.SWEEP_FILES", 2):
+            polls = [tree.changes()[0] for _ in range(3)]
+        self.assertListEqual([2, 2, 2], [len(changed) for changed in polls])
+        self.assertCountEqual([Path(path) for path in paths], sum(polls, []))
+        # with no files swept at all only the file changed last is checked
+        with patch("watch.SWEEP_FILES", 0), patch("watch.RECENT_FILES", 1):
+            Path(paths[0]).write_text("# Edited again")
+            self.assertEqual(([Path(paths[0])], []), tree.changes())
+            Path(paths[0]).write_text("# Edited once more")
+            Path(paths[1]).write_text("# Edited again")
+            self.assertEqual(([Path(paths[0])], []), tree.changes())
+
+
+class TestSiteWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        # the watcher works on the site's folders in the current directory
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.root)
+        for folder in ("content", "templates", "static", "docs"):
+            (self.root / folder).mkdir()
+        (self.root / "content" / "index.md").write_text("# Home")
+        self.template = self.root / "templates" / TEMPLATE_NAME
+        self.template.write_text("{% if title %}<title>{{ title }}</title>{% endif %}{{ content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_broken_template(self):
+        watcher = SiteWatcher("/", BuildManifest("abc", "/"), load_template(Path("templates")), watched_trees())
+        template = watcher.template
+        self.template.write_text("{% if title %}<h1>{{ title }}</h1>{{ content }}")
+        (self.root / "content" / "index.md").write_text("# Home page")
+        watcher.poll()
+        # the watcher keeps its template and the page waits for a template that loads
+        self.assertIs(template, watcher.template)
+        self.assertEqual("abc", watcher.manifest.template_hash)
+        self.assertFalse((self.root / "docs" / "index.html").exists())
+        self.template.write_text("{% if title %}<h1>{{ title }}</h1>{% endif %}{{ content }}")
+        watcher.poll()
+        self.assertIn("<h1>Home page</h1>", (self.root / "docs" / "index.html").read_text())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,276 @@
+import argparse
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from jinja2 import TemplateError
+from block_cache import BlockCache
+from build import (BLOCK_CACHE_PATH, CONTENT_FOLDER, IMAGE_CACHE_PATH, MANIFEST_PATH, PUBLIC_FOLDER, STATIC_FOLDER,
+                   TEMPLATES_FOLDER, TEMPLATE_CACHE_FOLDER, BuildOptions, build_site, close_block_cache)
+from generate import TEMPLATE_NAME, copy_static_files, generate_page, load_template, remove_stale_outputs
+from images import ImageSizes, measure_images, sizes_changed
+from links import check_links
+from metadata import is_draft, read_front_matter
+from page_template import PageTemplate
+from manifest import BuildManifest, hash_file
+
+
+# besides the recently changed files every poll stats at most this many, a bigger tree is gone through over
+# several polls
+SWEEP_FILES = 1000
+# how many of the last changed files are stat'ed on every poll
+RECENT_FILES = 64
+
+
+@dataclass(slots=True)
+class WatchedFolder:
+    mtime: int
+    files: set[str] = field(default_factory=set)
+    folders: set[str] = field(default_factory=set)
+
+
+@dataclass(slots=True)
+class WatchedTree:
+    # Every folder is stat'ed on each poll and only the ones whose time changed are listed again, that catches any
+    # file created, deleted or renamed, editors that save through a temporary file too. An edit in place only
+    # changes the file, the files changed lately are stat'ed on every poll and the others a slice at a time.
+    root: Path
+    folders: dict[str, WatchedFolder] = field(default_factory=dict)
+    # modification time and size of every file, keyed the same way as the manifest
+    files: dict[str, tuple[int, int]] = field(default_factory=dict)
+    recent: dict[str, None] = field(default_factory=dict)
+    sweep: list[str] = field(default_factory=list)
+
+    @classmethod
+    def scan(cls, root: Path) -> 'WatchedTree':
+        tree = cls(root)
+        tree._add_folder(str(root), [])
+        return tree
+
+    def changes(self) -> tuple[list[Path], list[Path]]:
+        changed, removed = [], []
+        for path, folder in list(self.folders.items()):
+            # a folder deleted with its parent is gone when the parent is listed again
+            if path not in self.folders:
+                continue
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            if mtime != folder.mtime:
+                self._rescan(path, folder, changed, removed)
+        if not self.sweep:
+            self.sweep = list(self.files)
+        # not a negative index, [-0:] would be the whole list
+        sweep = max(len(self.sweep) - SWEEP_FILES, 0)
+        checked = list(self.recent) + self.sweep[sweep:]
+        del self.sweep[sweep:]
+        for path in checked:
+            self._check(path, changed)
+        for path in removed:
+            self.recent.pop(str(path), None)
+        for path in changed:
+            self.recent.pop(str(path), None)
+            self.recent[str(path)] = None
+        for path in list(self.recent)[:-RECENT_FILES]:
+            del self.recent[path]
+        return changed, removed
+
+    def _check(self, path: str, changed: list[Path]) -> None:
+        if path not in self.files:
+            return
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            # its folder changed too, the next poll lists it again
+            return
+        if self.files[path] != (stat.st_mtime_ns, stat.st_size):
+            self.files[path] = (stat.st_mtime_ns, stat.st_size)
+            changed.append(Path(path))
+
+    def _add_folder(self, path: str, changed: list[Path]) -> None:
+        pending = [path]
+        while pending:
+            path = pending.pop()
+            # the time is taken before the listing, a file added meanwhile gets the folder listed again
+            folder = self.folders[path] = WatchedFolder(os.stat(path).st_mtime_ns)
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        folder.folders.add(entry.path)
+                        pending.append(entry.path)
+                    else:
+                        stat = entry.stat()
+                        folder.files.add(entry.path)
+                        self.files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+                        changed.append(Path(entry.path))
+
+    def _remove_folder(self, path: str, removed: list[Path]) -> None:
+        pending = [path]
+        while pending:
+            folder = self.folders.pop(pending.pop())
+            pending.extend(folder.folders)
+            for file in folder.files:
+                del self.files[file]
+                removed.append(Path(file))
+
+    def _rescan(self, path: str, folder: WatchedFolder, changed: list[Path], removed: list[Path]) -> None:
+        folder.mtime = os.stat(path).st_mtime_ns
+        files, folders = set(), set()
+        with os.scandir(path) as entries:
+            for entry in entries:
+                (folders if entry.is_dir() else files).add(entry.path)
+        for subfolder in folder.folders - folders:
+            self._remove_folder(subfolder, removed)
+        for subfolder in folders - folder.folders:
+            self._add_folder(subfolder, changed)
+        for file in folder.files - files:
+            del self.files[file]
+            removed.append(Path(file))
+        for file in files - folder.files:
+            # new to the tree, _check compares it with a time no file has
+            self.files[file] = (-1, -1)
+        folder.files, folder.folders = files, folders
+        # a file saved over through a rename keeps its name, all of the folder's files are checked
+        for file in files:
+            self._check(file, changed)
+
+
+def watched_trees() -> dict[Path, WatchedTree]:
+    return {folder: WatchedTree.scan(folder) for folder in (CONTENT_FOLDER, TEMPLATES_FOLDER, STATIC_FOLDER)}
+
+
+@dataclass(slots=True)
+class SiteWatcher:
+    base_path: str
+    manifest: BuildManifest
+    template: PageTemplate
+    trees: dict[Path, WatchedTree] = field(default_factory=dict)
+    # an edit usually touches one block, the rest of the page comes from the cache
+    cache: BlockCache | None = None
+    # sizes of the static images the pages' <img> tags get
+    images: ImageSizes | None = None
+
+    def changes(self, folder: Path) -> tuple[list[Path], list[Path]]:
+        return self.trees[folder].changes()
+
+    def poll(self) -> None:
+        start = time.perf_counter()
+        templates_changed, templates_removed = self.changes(TEMPLATES_FOLDER)
+        template = None
+        if templates_changed or templates_removed:
+            try:
+                template = load_template(TEMPLATES_FOLDER, TEMPLATE_CACHE_FOLDER)
+            except (OSError, TemplateError) as error:
+                # the pages keep the old template, the other changes wait for the next poll, the next save tries again
+                print(f'ERROR: \'{TEMPLATES_FOLDER / TEMPLATE_NAME}\': {error}')
+                return
+        content_changed, content_removed = self.changes(CONTENT_FOLDER)
+        static_changed, static_removed = self.changes(STATIC_FOLDER)
+        if not (templates_changed or templates_removed or content_changed or content_removed
+                or static_changed or static_removed):
+            return
+
+        sources = {source for source in content_changed if source.suffix == '.md'}
+        if template is not None:
+            # the template is part of every page
+            self.template = template
+            self.manifest.template_hash = hash_file(TEMPLATES_FOLDER / TEMPLATE_NAME)
+            sources.update(Path(source) for source in self.manifest.pages)
+        if self.images is not None and (static_changed or static_removed):
+            images = measure_images(STATIC_FOLDER, IMAGE_CACHE_PATH)
+            if images.key != self.images.key:
+                # only the pages that show an image whose size changed
+                self.images = images
+                sources.update(Path(source) for source, record in self.manifest.pages.items()
+                               if sizes_changed(record.images, images))
+        for source in sources:
+            dest = PUBLIC_FOLDER / source.relative_to(CONTENT_FOLDER).with_suffix('.html')
+            try:
+                if is_draft(read_front_matter(source)):
+                    # a page marked as a draft leaves the site like a deleted one
+                    print(f'DRAFT: \'{source}\' skipped')
+                    content_removed.append(source)
+                    continue
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                stats = generate_page(source, self.template, dest, self.base_path, cache=self.cache,
+                                      images=self.images)
+            except (ValueError, SyntaxError) as error:
+                # keep the other pages going, the next save of this one rebuilds it
+                print(f'ERROR: \'{source}\': {error}')
+                continue
+            self.manifest.add_page(source, dest, hash_file(source), stats.links, stats.meta, stats.images)
+        if self.cache is not None:
+            self.cache.flush()
+
+        if static_changed or static_removed:
+            self.manifest.static.clear()
+            for source, dest in copy_static_files(STATIC_FOLDER, PUBLIC_FOLDER):
+                self.manifest.add_static(source, dest)
+
+        # the outputs of deleted sources are the ones the manifest no longer lists
+        removed = BuildManifest(self.manifest.template_hash, self.base_path)
+        for source in content_removed:
+            if str(source) in self.manifest.pages:
+                removed.pages[str(source)] = self.manifest.pages.pop(str(source))
+        for source in static_removed:
+            removed.static[str(PUBLIC_FOLDER / source.relative_to(STATIC_FOLDER))] = str(source)
+        remove_stale_outputs(removed, self.manifest, PUBLIC_FOLDER)
+        # an edit can break the links of other pages too, the whole site is checked again
+        check_links(self.manifest, PUBLIC_FOLDER)
+
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f'REBUILD: {len(sources)} pages in {elapsed:.1f} ms')
+
+
+def serve(folder: Path, port: int) -> ThreadingHTTPServer:
+    # files are read from disk on every request, so a rebuilt page is served right away
+    handler = partial(SimpleHTTPRequestHandler, directory=str(folder))
+    server = ThreadingHTTPServer(('', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f'SERVE: \'{folder}\' at http://localhost:{port}/')
+    return server
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the site, serve it and rebuild the pages affected by every change.")
+    parser.add_argument('base_path', nargs='?', default='/', help="URL prefix for the generated links")
+    parser.add_argument('--port', type=int, default=8000, help="port of the development server")
+    parser.add_argument('--interval', type=float, default=0.1, metavar='SECONDS', help="how often to check for changes")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    options = BuildOptions(args.base_path)
+    # taken before the build so edits made while it runs are picked up by the first poll
+    trees = watched_trees()
+    # the manifest and the template stay in this process between rebuilds
+    manifest = build_site(options)
+    template = load_template(TEMPLATES_FOLDER, TEMPLATE_CACHE_FOLDER)
+    cache = BlockCache.open(BLOCK_CACHE_PATH, options.block_cache_bytes)
+    images = measure_images(STATIC_FOLDER, IMAGE_CACHE_PATH)
+    watcher = SiteWatcher(options.base_path, manifest, template, trees, cache, images)
+    server = serve(PUBLIC_FOLDER, args.port)
+    print(f'WATCH: \'{CONTENT_FOLDER}\', \'{TEMPLATES_FOLDER}\', \'{STATIC_FOLDER}\'')
+    try:
+        while True:
+            time.sleep(args.interval)
+            try:
+                watcher.poll()
+            except OSError as error:
+                # a file that vanished halfway through a rebuild shouldn't stop the watcher
+                print(f'ERROR: {error}')
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        watcher.manifest.save(MANIFEST_PATH)
+        close_block_cache(cache)
+
+
+if __name__ == '__main__':
+    main()